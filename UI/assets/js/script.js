@@ -4,6 +4,7 @@
 const API_PREDICT_URL = 'http://127.0.0.1:8000/predict';
 const API_BASE_URL = 'http://127.0.0.1:8000';
 const API_URL = `${API_BASE_URL}/predict`;
+const API_PREDICT_BATCH_URL = `${API_BASE_URL}/predict/batch`;
 const API_REGISTER = `${API_BASE_URL}/register`;
 const API_LOGIN = `${API_BASE_URL}/login`;
 const API_LOGOUT = `${API_BASE_URL}/logout`;
@@ -36,25 +37,7 @@ function getAuthHeader() {
 // =====================================================================
 // 1. CẤU HÌNH HỆ THỐNG
 // =====================================================================
-const SCALER_CONFIG = {
-    person_age: { mean: 27.76417777777778, scale: 6.045041043106284 },
-    person_income: { mean: 80319.05322222222, scale: 80421.60504361271 },
-    person_emp_exp: { mean: 5.410333333333333, scale: 6.0634647136215225 },
-    loan_amnt: { mean: 9583.157555555556, scale: 6314.816524743712 },
-    loan_int_rate: { mean: 11.006605777777779, scale: 2.9787751821717214 },
-    loan_percent_income: { mean: 0.1397248888888889, scale: 0.08721133898301228 },
-    cb_person_cred_hist_length: { mean: 5.8674888888888885, scale: 3.8796587371240796 },
-    credit_score: { mean: 632.6087555555556, scale: 50.43530459912891 },
-};
-
-const CAT_MAP = {
-    person_gender: { 'female': 0, 'male': 1, 'nu': 0, 'nam': 1 },
-    person_education: { 'high school': 3, 'bachelor': 1,  'master': 4, 'doctorate': 2 },
-    person_home_ownership: { 'mortgage': 0, 'own': 2, 'rent': 3},
-    loan_intent: { 'education': 1, 'medical': 3, 'venture': 5, 'personal': 4, 'debtconsolidation': 0, 'homeimprovement': 2 },
-    previous_loan_defaults_on_file: { 'no': 0, 'yes': 1, 'khong': 0, 'co': 1 }
-};
-
+// Server tự mã hóa categorical và chuẩn hóa numeric, client chỉ gửi giá trị thô
 const FIELD_LIST = [
     'person_age', 'person_gender', 'person_education', 'person_income',
     'person_emp_exp', 'person_home_ownership', 'loan_amnt', 'loan_intent',
@@ -335,30 +318,6 @@ function setupLogoutListener() {
     });
 }
 
-// =====================================================================
-// 3. DATA PREPROCESSING
-// =====================================================================
-function preprocessValue(key, value) {
-    if (CAT_MAP[key]) {
-        const normalizedVal = String(value).toLowerCase().trim();
-        if (CAT_MAP[key][normalizedVal] !== undefined) {
-            value = CAT_MAP[key][normalizedVal];
-        }
-    }
-
-    let numVal = Number(value);
-    if (isNaN(numVal)) numVal = 0;
-
-    const config = SCALER_CONFIG[key];
-    if (config) {
-        if (config.scale === 0 || config.scale < 1e-8) {
-            return 0;
-        }
-        return (numVal - config.mean) / config.scale;
-    }
-    return numVal;
-}
-
 // =====================================================================
 // 4. SINGLE PREDICTION
 // =====================================================================
@@ -380,16 +339,12 @@ if (singleForm) {
         spinner.classList.remove('hidden');
         resBox.classList.add('hidden');
 
-        const processedData = {};
+        const bodyToSend = {};
         FIELD_LIST.forEach(field => {
-            const rawVal = document.getElementById(field).value;
-            processedData[field] = preprocessValue(field, rawVal);
+            bodyToSend[field] = document.getElementById(field).value;
         });
 
-        const vectorPayload = FIELD_LIST.map(field => processedData[field]);
-        const bodyToSend = vectorPayload;
-
-        console.log("Vector gửi đi:", bodyToSend);
+        console.log("Hồ sơ gửi đi:", bodyToSend);
 
         try {
             const response = await fetch(API_PREDICT_URL, {
@@ -762,6 +717,8 @@ async function processBatch() {
     spinner.classList.remove('hidden');
     tbody.innerHTML = "";
 
+    // Bước 1: chuẩn bị hồ sơ cho toàn bộ file, đánh dấu các dòng có credit_score không hợp lệ
+    const entries = [];
     let count = 0;
     for (const row of batchData) {
         count++;
@@ -770,61 +727,82 @@ async function processBatch() {
         // Validate credit_score before processing
         const creditScoreKey = Object.keys(row).find(k => k.toLowerCase() === 'credit_score');
         const creditScoreVal = creditScoreKey ? row[creditScoreKey] : 0;
-        
+
         if (creditScoreVal && !validateCreditScore(creditScoreVal)) {
-            const tr = document.createElement('tr');
-            tr.className = "hover:bg-slate-50 transition border-b border-gray-100 bg-red-50";
-            tr.innerHTML = `
-                <td class="px-5 py-4 text-sm text-gray-500 text-center">${count}</td>
-                <td class="px-5 py-4 text-sm font-bold text-gray-800">${name}</td>
-                <td class="px-5 py-4 text-sm text-gray-600">-</td>
-                <td class="px-5 py-4 text-sm text-center text-gray-600">${creditScoreVal}</td>
-                <td class="px-5 py-4 text-sm text-center"><span class="px-2 py-1 text-red-900 bg-red-200 rounded text-xs">Invalid Score</span></td>
-                <td class="px-5 py-4 text-sm text-center">-</td>
-            `;
-            tbody.appendChild(tr);
+            entries.push({ count, name, row, creditScoreVal, invalidScore: true });
             continue;
         }
 
-        const processedData = {};
+        const application = {};
         FIELD_LIST.forEach(key => {
             const rowKey = Object.keys(row).find(k => k.toLowerCase() === key.toLowerCase());
-            const rawVal = rowKey ? row[rowKey] : 0;
-            processedData[key] = preprocessValue(key, rawVal);
+            application[key] = rowKey ? row[rowKey] : null;
         });
 
-        const vectorPayload = FIELD_LIST.map(key => processedData[key]);
-        const bodyToSend = vectorPayload;
-
-        let statusHtml = `<span class="text-gray-400 text-xs italic">Đang xử lý...</span>`;
-        let displayStatus = -1;
+        entries.push({ count, name, row, application, displayStatus: -1 });
+    }
 
+    // Bước 2: gửi tất cả hồ sơ thô trong một request tới /predict/batch
+    const validEntries = entries.filter(entry => !entry.invalidScore);
+    if (validEntries.length > 0) {
         try {
-            const res = await fetch(API_PREDICT_URL, {
+            const res = await fetch(API_PREDICT_BATCH_URL, {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
                     ...getAuthHeader()
                 },
-                body: JSON.stringify(bodyToSend)
+                body: JSON.stringify(validEntries.map(entry => entry.application))
             });
 
             if (res.status === 401) {
                 clearToken();
                 initAuthUI();
                 alert('Token hết hạn, vui lòng đăng nhập lại');
-                break;
+                btnBatch.disabled = false;
+                spinner.classList.add('hidden');
+                return;
             }
 
             if (res.ok) {
                 const data = await res.json();
-                if (data.prediction && Array.isArray(data.prediction)) {
-                    displayStatus = data.prediction[0];
+                if (Array.isArray(data.predictions)) {
+                    data.predictions.forEach((prediction, i) => {
+                        if (prediction !== null && validEntries[i]) {
+                            validEntries[i].displayStatus = prediction;
+                        }
+                    });
+                }
+                if (Array.isArray(data.errors) && data.errors.length > 0) {
+                    console.warn("Các dòng lỗi:", data.errors);
                 }
             }
         } catch (e) {
             console.error(e);
         }
+    }
+
+    // Bước 3: hiển thị kết quả
+    for (const entry of entries) {
+        const { count, name, row } = entry;
+
+        if (entry.invalidScore) {
+            const tr = document.createElement('tr');
+            tr.className = "hover:bg-slate-50 transition border-b border-gray-100 bg-red-50";
+            tr.innerHTML = `
+                <td class="px-5 py-4 text-sm text-gray-500 text-center">${count}</td>
+                <td class="px-5 py-4 text-sm font-bold text-gray-800">${name}</td>
+                <td class="px-5 py-4 text-sm text-gray-600">-</td>
+                <td class="px-5 py-4 text-sm text-center text-gray-600">${entry.creditScoreVal}</td>
+                <td class="px-5 py-4 text-sm text-center"><span class="px-2 py-1 text-red-900 bg-red-200 rounded text-xs">Invalid Score</span></td>
+                <td class="px-5 py-4 text-sm text-center">-</td>
+            `;
+            tbody.appendChild(tr);
+            continue;
+        }
+
+        const displayStatus = entry.displayStatus;
+        let statusHtml = `<span class="text-gray-400 text-xs italic">Đang xử lý...</span>`;
 
         if (displayStatus == 1) {
             statusHtml = `<span class="px-2 py-1 font-bold text-green-900 bg-green-200 rounded-full text-xs">Rủi ro thấp</span>`;
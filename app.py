@@ -1,3 +1,4 @@
+import os
 import time
 import logging
 import joblib
@@ -5,12 +6,13 @@ import numpy as np
 from typing import List
 from functools import wraps
 from fastapi import FastAPI, HTTPException
-from fastapi.responses import Response
+from fastapi.responses import Response, JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 # Import OpenTelemetryy
 from opentelemetry import trace
-from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace import TracerProvider, SpanLimits
+from opentelemetry.sdk.trace.sampling import ALWAYS_ON, ParentBased, TraceIdRatioBased
 from opentelemetry.sdk.trace.export import BatchSpanProcessor
 from opentelemetry.exporter.jaeger.thrift import JaegerExporter
 from opentelemetry.sdk.resources import SERVICE_NAME, Resource
@@ -24,20 +26,42 @@ from opentelemetry.exporter.prometheus import PrometheusMetricReader
 from opentelemetry.metrics import get_meter_provider, set_meter_provider
 
 # Import Prometheus client
-from prometheus_client import Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST, REGISTRY
+from prometheus_client import Counter, Gauge, Histogram, generate_latest, CONTENT_TYPE_LATEST, REGISTRY
 # Bổ sung 
 from contextlib import asynccontextmanager 
 
-# Thiết lập logging
-logging.basicConfig(level=logging.INFO)
+from readiness import ReadinessState
+from structured_logging import configure_logging, parse_sample_rates, LogSamplingMiddleware
+from trace_sampling import ExportQueueProcessor, TailSamplingProcessor
+
+# Thiết lập logging: JSON qua QueueHandler (ghi stdout trên thread riêng), log INFO của /predict lấy mẫu 1%
+log_handler = configure_logging(
+    os.getenv("LOG_LEVEL", "INFO"),
+    json_format=os.getenv("LOG_FORMAT", "json") == "json",
+    sample_rates=parse_sample_rates(os.getenv("LOG_SAMPLE_RATES", "/predict=0.01")),
+)
 logger = logging.getLogger(__name__)
 
+# Số dòng giả dùng để warmup mô hình trước khi báo sẵn sàng
+MODEL_WARMUP_ROWS = int(os.getenv("MODEL_WARMUP_ROWS", "64"))
+
+# Lấy mẫu trace (xem trace_sampling.py): tỉ lệ head, tail sampling giữ trace lỗi / chậm, giới hạn độ dài attribute
+TRACE_SAMPLE_RATIO = float(os.getenv("TRACE_SAMPLE_RATIO", "0.01"))
+TRACE_TAIL_SAMPLING = os.getenv("TRACE_TAIL_SAMPLING", "1") == "1"
+TRACE_SLOW_THRESHOLD_MS = float(os.getenv("TRACE_SLOW_THRESHOLD_MS", "500"))
+TRACE_MAX_ATTRIBUTE_LENGTH = int(os.getenv("TRACE_MAX_ATTRIBUTE_LENGTH", "256"))
+TRACE_EXPORT_QUEUE_SIZE = int(os.getenv("TRACE_EXPORT_QUEUE_SIZE", "2048"))
+
 # Resource chung cho cả tracing và metrics
 resource = Resource.create({SERVICE_NAME: "ml-prediction-service"})
 
 # 1. Thiết lập Tracing với Jaeger
 set_tracer_provider(
-    TracerProvider(resource=resource)
+    TracerProvider(
+        resource=resource,
+        sampler=ALWAYS_ON if TRACE_TAIL_SAMPLING else ParentBased(TraceIdRatioBased(TRACE_SAMPLE_RATIO)),
+        span_limits=SpanLimits(max_span_attribute_length=TRACE_MAX_ATTRIBUTE_LENGTH),
+    )
 )
 
 # Tạo Jaeger Exporter
@@ -45,11 +69,8 @@ jaeger_exporter = JaegerExporter(
     #agent_host_name="jaeger",
     agent_host_name="jaeger.monitoring.svc.cluster.local",  # Sử dụng DNS của Jaeger trong Cluster --> trỏ đến service Jaeger nằm ở namespace "monitoring"
     agent_port=6831,
-)
-
-# Thêm processor để gửi span đến Jaeger
-trace.get_tracer_provider().add_span_processor(
-    BatchSpanProcessor(jaeger_exporter)
+    # Batch vượt giới hạn gói UDP được tách nhỏ
+    udp_split_oversized_batches=True,
 )
 
 # Lấy tracer
@@ -75,9 +96,56 @@ error_counter = Counter(
     ['operation', 'error_type']
 )
 
+trace_sampling_counter = Counter(
+    'ml_trace_sampling_decisions_total',
+    'Tail sampling decisions per trace (error, slow, ratio = exported; dropped)',
+    ['decision']
+)
+
+trace_spans_dropped_counter = Counter(
+    'ml_trace_spans_dropped_total',
+    'Spans dropped before export (queue_full, pending_overflow)',
+    ['reason']
+)
+
+trace_export_queue_gauge = Gauge(
+    'ml_trace_export_queue_depth',
+    'Spans waiting in the Jaeger export queue'
+)
+
+# Thêm processor để gửi span đến Jaeger, span chỉ vào hàng đợi export sau khi qua lấy mẫu
+span_export_processor = BatchSpanProcessor(jaeger_exporter, max_queue_size=TRACE_EXPORT_QUEUE_SIZE)
+if TRACE_TAIL_SAMPLING:
+    trace_processor = TailSamplingProcessor(
+        span_export_processor,
+        ratio=TRACE_SAMPLE_RATIO,
+        slow_threshold_ms=TRACE_SLOW_THRESHOLD_MS,
+        on_decision=lambda decision: trace_sampling_counter.labels(decision=decision).inc(),
+        on_drop=lambda reason: trace_spans_dropped_counter.labels(reason=reason).inc(),
+    )
+else:
+    trace_processor = ExportQueueProcessor(
+        span_export_processor,
+        on_drop=lambda reason: trace_spans_dropped_counter.labels(reason=reason).inc(),
+    )
+trace.get_tracer_provider().add_span_processor(trace_processor)
+trace_export_queue_gauge.set_function(trace_processor.queue_depth)
+
 ### Bổ sung Lifespan context
 cached_model = None
 
+# /readyz: mô hình đã load và đã warmup
+readiness = ReadinessState(['model', 'warmup'])
+
+def warmup_model(model):
+    """Dự đoán trên các dòng giả (ngẫu nhiên, cố định seed) trước request thật đầu tiên"""
+    n_features = getattr(model, 'n_features_in_', 13)
+    rows = np.random.default_rng(0).normal(size=(MODEL_WARMUP_ROWS, n_features))
+    predictions = model.predict(rows)
+    model.predict(rows[:1])
+    if len(predictions) != MODEL_WARMUP_ROWS:
+        raise ValueError(f"Warmup returned {len(predictions)} predictions for {MODEL_WARMUP_ROWS} rows")
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
@@ -86,13 +154,24 @@ async def lifespan(app: FastAPI):
     try:
         cached_model = load_model()
         logger.info("Model load succesfully")
+        readiness.mark('model', True)
     except Exception as e:
-        logger.error(f"Failed to load model during startup: {e}")
+        logger.error("Failed to load model during startup: %s", e)
+        readiness.mark('model', False, f"{type(e).__name__}: {e}")
+    
+    if cached_model is not None:
+        try:
+            warmup_model(cached_model)
+            readiness.mark('warmup', True)
+        except Exception as e:
+            logger.error("Model warmup failed during startup: %s", e)
+            readiness.mark('warmup', False, f"{type(e).__name__}: {e}")
     
     yield
     
     # Shutdown n cleanup
     logger.info("Shutting down ML Prediction Service...")
+    readiness.mark('model', False, "shutting down")
     cached_model = None
     
 # Tạo FastAPI app
@@ -111,6 +190,9 @@ app.add_middleware(
     max_age=600,  # Cache preflight response trong 10 phút
 )
 
+# Quyết định lấy mẫu log cho mỗi request theo route
+app.add_middleware(LogSamplingMiddleware, sampler=log_handler.sampler)
+
 # 2. Tạo decorator trace-span để tự động trace cho các function
 def trace_span(span_name):
     def decorator(func):
@@ -134,7 +216,7 @@ def load_model():
         model = joblib.load("model_ml.joblib")
         return model
     except Exception as e:
-        logger.error(f"Error loading model: {e}")
+        logger.error("Error loading model: %s", e)
         
         # Thiết lập metrics error_counter khi load model
         
@@ -142,13 +224,23 @@ def load_model():
         
         raise HTTPException(status_code=500, detail=f"Failed to load model: {str(e)}")
 
+def get_cached_model():
+    global cached_model
+    if cached_model is None:
+        cached_model = load_model()
+        # Startup thất bại nhưng load lại được: pod trở lại sẵn sàng
+        readiness.mark('model', True)
+        warmup_model(cached_model)
+        readiness.mark('warmup', True)
+    return cached_model
+
 # 4. Tracing cho hàm dự đoán predictor
 @trace_span("predictor")
 def make_prediction(model, features):
     start_time = time.time()
     
     try:
-        logger.info(f"Making prediction with features: {features}")
+        logger.debug("Making prediction with features: %s", features)
         
         # Kiểm tra input
         if not features:
@@ -160,7 +252,7 @@ def make_prediction(model, features):
         # Thực hiện dự đoán
         prediction = model.predict(features_array)
         
-        logger.info(f"Prediction result: {prediction}")
+        logger.debug("Prediction result: %s", prediction)
         
         # Chuyển đổi kết quả thành list
         result = prediction.tolist()
@@ -173,7 +265,7 @@ def make_prediction(model, features):
         return result
         
     except Exception as e:
-        logger.error(f"Error making prediction: {e}")
+        logger.error("Error making prediction: %s", e)
         
         # Thiết lập metric cho error_counter
         
@@ -193,27 +285,29 @@ def predict(features: List[float]):
     
     try:
         with tracer.start_as_current_span("prediction-endpoint") as span:
-            logger.info(f"Received prediction request with features: {features}")
+            logger.debug("Received prediction request with features: %s", features)
             
             # Thêm thông tin vào span
-            span.set_attribute("input.features", str(features))
+            if span.is_recording():
+                span.set_attribute("input.features", str(features))
             span.set_attribute("input.length", len(features))
             
-            # Load model
-            model = load_model()
+            # Dùng model đã load sẵn trong lifespan, chỉ load lại khi startup thất bại
+            model = get_cached_model()
             
             # Thực hiện dự đoán
             prediction = make_prediction(model, features)
             
             # Thêm thông tin prediction vào span
-            span.set_attribute("prediction.result", str(prediction))
+            if span.is_recording():
+                span.set_attribute("prediction.result", str(prediction))
             span.set_attribute("prediction.success", True)
             
             # Record endpoint metrics
             endpoint_duration = time.time() - endpoint_start_time
             prediction_duration_histogram.labels(endpoint="/predict", status="success").observe(endpoint_duration)
             
-            logger.info(f"Returning prediction: {prediction}")
+            logger.info("Returning prediction: %s", prediction)
             return {"prediction": prediction, "status": "success"}
             
     except HTTPException as he:
@@ -223,7 +317,7 @@ def predict(features: List[float]):
         error_counter.labels(operation="endpoint", error_type="HTTPException").inc()
         raise he
     except Exception as e:
-        logger.error(f"Unexpected error in prediction endpoint: {e}")
+        logger.error("Unexpected error in prediction endpoint: %s", e)
         
         # Record unexpected error metrics
         endpoint_duration = time.time() - endpoint_start_time
@@ -243,15 +337,22 @@ def get_metrics():
 def root():
     return {"message": "ML Prediction Service is running"}
 
+@app.get("/livez")
+async def livez():
+    """Liveness probe: chỉ xác nhận process còn phản hồi, không chạm tới mô hình"""
+    return {"status": "alive"}
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness probe: 200 khi mô hình đã load và warmup, 503 kèm trạng thái từng dependency nếu chưa"""
+    report = readiness.report()
+    return JSONResponse(report, status_code=200 if report['status'] == 'ready' else 503)
+
 @app.get("/health")
 def health():
     try:
-        # Kiểm tra xem có thể load model được không
-        try:
-            load_model()
-            model_loaded = True
-        except:
-            model_loaded = False
+        # Chỉ kiểm tra model đã có trong bộ nhớ, không unpickle lại từ đĩa
+        model_loaded = cached_model is not None
         
         return {
             "status": "healthy",
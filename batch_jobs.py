@@ -0,0 +1,145 @@
+"""
+Pool worker chạy các job chấm điểm nền (batch lớn không gắn với một HTTP request hay một tab trình duyệt).
+
+Trạng thái job và kết quả lưu trong DB của service; module này chỉ lo hàng đợi, các thread worker,
+tín hiệu dừng khi service tắt và tốc độ / ETA của các job đang chạy trong process.
+"""
+
+import time
+import queue
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+COMPLETED = 'completed'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+FINISHED_STATUSES = (COMPLETED, FAILED, CANCELLED)
+
+
+class JobInterrupted(Exception):
+    """Service đang tắt: job dừng sau chunk đã commit và được chạy tiếp ở lần khởi động sau"""
+
+
+class JobCancelled(Exception):
+    """Người dùng đã hủy job"""
+
+
+class JobProgress:
+    """Tiến độ của một job trong lần chạy hiện tại (tốc độ chỉ tính các dòng chạy trong lần này)"""
+
+    def __init__(self, stopping):
+        self._stopping = stopping
+        self.processed = 0
+        self.total = None
+        self._start_rows = 0
+        self._started = None
+
+    def begin(self, processed, total):
+        """Bắt đầu (hoặc chạy tiếp) từ `processed` dòng đã commit"""
+        self.processed = self._start_rows = processed
+        self.total = total
+        self._started = time.monotonic()
+
+    def advance(self, processed):
+        self.processed = processed
+
+    def check(self):
+        """Gọi giữa các chunk: ném JobInterrupted khi service đang tắt"""
+        if self._stopping.is_set():
+            raise JobInterrupted()
+
+    def throughput(self):
+        """Số dòng mỗi giây"""
+        if self._started is None:
+            return None
+        elapsed = time.monotonic() - self._started
+        return (self.processed - self._start_rows) / elapsed if elapsed > 0 else 0.0
+
+    def eta_seconds(self):
+        rate = self.throughput()
+        if not rate or self.total is None:
+            return None
+        return max(self.total - self.processed, 0) / rate
+
+
+class JobRunner:
+    """Các thread worker lấy job id từ hàng đợi và gọi run_job(job_id, progress)"""
+
+    def __init__(self, run_job, workers=1, active_gauge=None):
+        self.run_job = run_job
+        self.workers = workers
+        self.active_gauge = active_gauge
+        self._queue = queue.Queue()
+        self._stopping = threading.Event()
+        self._threads = []
+        self._pending = set()
+        self._active = {}
+        self._lock = threading.Lock()
+
+    def start(self):
+        self._stopping.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"batch-job-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, job_id):
+        """Đưa job vào hàng đợi; job đang chờ hoặc đang chạy trong process này thì bỏ qua"""
+        with self._lock:
+            if job_id in self._pending or job_id in self._active:
+                return False
+            self._pending.add(job_id)
+        self._queue.put(job_id)
+        return True
+
+    def _work(self):
+        while True:
+            job_id = self._queue.get()
+            if job_id is None or self._stopping.is_set():
+                return
+
+            progress = JobProgress(self._stopping)
+            with self._lock:
+                self._pending.discard(job_id)
+                self._active[job_id] = progress
+            if self.active_gauge is not None:
+                self.active_gauge.inc()
+            try:
+                self.run_job(job_id, progress)
+            except Exception as e:
+                logger.error("Batch job %s crashed: %s", job_id, e)
+            finally:
+                with self._lock:
+                    del self._active[job_id]
+                if self.active_gauge is not None:
+                    self.active_gauge.dec()
+
+    def progress(self, job_id):
+        """Tiến độ của job nếu nó đang chạy trong process này"""
+        return self._active.get(job_id)
+
+    def shutdown(self, timeout=None):
+        """Dừng các worker; job đang chạy dừng ở ranh giới chunk tiếp theo"""
+        self._stopping.set()
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        with self._lock:
+            self._pending.clear()
+        # Bỏ các job id còn trong hàng đợi, lần khởi động sau chúng được lấy lại từ DB
+        while not self._queue.empty():
+            self._queue.get_nowait()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'queued': len(self._pending),
+                'running': sorted(self._active),
+            }
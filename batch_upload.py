@@ -0,0 +1,161 @@
+"""
+Đọc file hồ sơ (CSV/XLSX) upload lên theo từng chunk để chấm điểm dạng stream.
+File được duyệt tuần tự từng dòng (XLSX mở ở chế độ read-only) nên bộ nhớ không tăng theo kích thước file;
+chunk đầu nhỏ để kết quả đầu tiên về sớm, các chunk sau lớn dần tới chunk_rows.
+
+Quy tắc ghép tên cột giống script.js: tên hồ sơ lấy từ Ho_ten / Name / HO_TEN / Full Name,
+cột features không phân biệt hoa thường.
+"""
+
+import io
+import os
+import csv
+import codecs
+import json
+import logging
+
+from preprocessing import FEATURE_COLS
+
+logger = logging.getLogger(__name__)
+
+# Thứ tự ưu tiên giống script.js: row['Ho_ten'] || row['Name'] || row['HO_TEN'] || row['Full Name']
+NAME_COLUMNS = ('Ho_ten', 'Name', 'HO_TEN', 'Full Name')
+
+SUPPORTED_EXTENSIONS = ('.csv', '.xlsx')
+
+OUTPUT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+CSV_HEADER = ['row', 'name', 'prediction', 'error']
+
+
+def _is_blank(value):
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def iter_csv_rows(fileobj):
+    """Các dòng của file CSV (UTF-8, có hoặc không có BOM)"""
+    # Giải mã từng dòng thay vì bọc TextIOWrapper: file upload do framework đóng, không bị đóng theo wrapper
+    yield from csv.reader(codecs.iterdecode(fileobj, 'utf-8-sig'))
+
+
+def iter_xlsx_rows(fileobj):
+    """Các dòng của sheet đầu tiên, đọc ở chế độ read-only (không load cả workbook vào bộ nhớ)"""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        yield from workbook.worksheets[0].iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def iter_rows(fileobj, filename):
+    extension = os.path.splitext(filename or '')[1].lower()
+    if extension == '.csv':
+        return iter_csv_rows(fileobj)
+    if extension == '.xlsx':
+        return iter_xlsx_rows(fileobj)
+    raise ValueError(f"Unsupported file type: {extension or filename}. Supported: {', '.join(SUPPORTED_EXTENSIONS)}")
+
+
+class ColumnMapping:
+    """Vị trí cột tên hồ sơ và các cột features trong dòng tiêu đề"""
+
+    def __init__(self, headers):
+        headers = ['' if header is None else str(header).strip() for header in headers]
+        self.features = {}
+        for idx, header in enumerate(headers):
+            col = header.lower()
+            if col in FEATURE_COLS and col not in self.features:
+                self.features[col] = idx
+        self.names = [headers.index(name) for name in NAME_COLUMNS if name in headers]
+
+    def name(self, row, row_number):
+        for idx in self.names:
+            if idx < len(row) and not _is_blank(row[idx]):
+                return str(row[idx])
+        return f"Hồ sơ #{row_number}"
+
+    def columns(self, rows):
+        """Dữ liệu dạng cột {tên feature: danh sách giá trị} cho FeaturePreprocessor.transform_columns"""
+        return {
+            col: [row[idx] if idx < len(row) else None for row in rows]
+            for col, idx in self.features.items()
+        }
+
+
+def read_chunks(fileobj, filename, chunk_rows=2000, first_chunk_rows=100):
+    """
+    Đọc file theo chunk, yield (chỉ số dòng đầu, danh sách tên hồ sơ, dữ liệu dạng cột)
+
+    Dòng trống bị bỏ qua; dòng đầu tiên không trống là tiêu đề.
+    Ném ValueError khi file không có cột feature nào (kiểm tra ngay ở lần next() đầu tiên)
+    """
+    rows = iter_rows(fileobj, filename)
+    mapping = None
+    start = 0
+    size = min(first_chunk_rows, chunk_rows)
+    buffer = []
+
+    for row in rows:
+        if all(_is_blank(value) for value in row):
+            continue
+        if mapping is None:
+            mapping = ColumnMapping(row)
+            if not mapping.features:
+                raise ValueError(f"No feature columns found in header. Expected some of: {', '.join(FEATURE_COLS)}")
+            continue
+        buffer.append(row)
+        if len(buffer) >= size:
+            yield start, _names(mapping, buffer, start), mapping.columns(buffer)
+            start += len(buffer)
+            buffer = []
+            size = min(size * 2, chunk_rows)
+
+    if mapping is None:
+        raise ValueError("File is empty")
+    if buffer:
+        yield start, _names(mapping, buffer, start), mapping.columns(buffer)
+
+
+def count_rows(fileobj, filename):
+    """Số dòng dữ liệu (không tính tiêu đề và dòng trống), dùng để tính tiến độ / ETA của job"""
+    n_rows = sum(1 for row in iter_rows(fileobj, filename) if not all(_is_blank(value) for value in row))
+    return max(n_rows - 1, 0)
+
+
+def _names(mapping, rows, start):
+    # Số thứ tự hồ sơ bắt đầu từ 1 giống bảng kết quả trên UI
+    return [mapping.name(row, start + i + 1) for i, row in enumerate(rows)]
+
+
+def result_records(start, names, predictions, errors):
+    """Kết quả từng dòng của một chunk; `errors` theo chỉ số dòng trong chunk giống score_batch"""
+    detail = {error['row']: error['detail'] for error in errors}
+    for i, (name, prediction) in enumerate(zip(names, predictions)):
+        record = {'row': start + i, 'name': name}
+        if i in detail:
+            record['error'] = detail[i]
+        else:
+            record['prediction'] = prediction
+        yield record
+
+
+def format_results(start, names, predictions, errors, output='ndjson'):
+    """Ghép kết quả một chunk thành text NDJSON (một object mỗi dòng) hoặc CSV"""
+    records = result_records(start, names, predictions, errors)
+    if output == 'ndjson':
+        return ''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in records)
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_HEADER)
+    writer.writerows(records)
+    return buffer.getvalue()
+
+
+def csv_header():
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(CSV_HEADER)
+    return buffer.getvalue()
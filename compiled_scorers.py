@@ -0,0 +1,292 @@
+"""
+Biên dịch mô hình đã huấn luyện thành scorer thuần NumPy.
+Cây của XGBoost / Random Forest được trải phẳng thành các mảng node liên tục và duyệt
+vector hóa cho cả batch; Logistic Regression được gộp StandardScaler vào hệ số
+để chấm điểm chỉ còn một phép nhân vô hướng.
+"""
+
+import os
+import json
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Số dòng tối đa duyệt cùng lúc (ma trận node có kích thước rows x trees)
+CHUNK_ROWS = 8192
+
+# Duyệt cây bằng NumPy nhanh hơn predict gốc với batch nhỏ (bỏ được overhead tạo DMatrix/validate),
+# batch lớn thì predict đa luồng của XGBoost/scikit-learn nhanh hơn
+TREE_MAX_ROWS = 32
+
+
+class TreeEnsembleScorer:
+    """
+    Tập cây dạng mảng: node lá trỏ về chính nó nên sau max_depth bước mọi dòng đều dừng ở lá
+
+    `strict=True` rẽ trái khi x < threshold (XGBoost), False khi x <= threshold (scikit-learn)
+    """
+
+    def __init__(self, feature, threshold, left, right, default_left, leaf_values, roots, max_depth, strict):
+        self.feature = feature
+        self.threshold = threshold
+        # children[:, 0] là con trái, children[:, 1] là con phải: một lần gather cho mỗi bước
+        self.children = np.column_stack([left, right])
+        self.default_left = default_left
+        self.leaf_values = leaf_values
+        self.roots = roots
+        self.max_depth = max_depth
+        self.strict = strict
+        self.max_rows = TREE_MAX_ROWS
+
+    def handles(self, n_rows):
+        """Batch có đủ nhỏ để scorer biên dịch nhanh hơn mô hình gốc không"""
+        return self.max_rows is None or n_rows <= self.max_rows
+
+    @property
+    def nbytes(self):
+        arrays = (self.feature, self.threshold, self.children, self.default_left, self.leaf_values, self.roots)
+        return sum(a.nbytes for a in arrays)
+
+    def leaves(self, X):
+        """Chỉ số lá của từng (dòng, cây), kích thước (n_rows, n_trees)"""
+        # Cả XGBoost và scikit-learn đều so sánh features ở float32
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        n_rows, n_features = X.shape
+        flat_X = X.ravel()
+        row_offset = (np.arange(n_rows, dtype=np.int32) * n_features)[:, None]
+        has_missing = np.isnan(flat_X).any()
+        node = np.broadcast_to(self.roots, (n_rows, len(self.roots)))
+        for _ in range(self.max_depth):
+            x = flat_X[row_offset + self.feature[node]]
+            threshold = self.threshold[node]
+            go_right = x >= threshold if self.strict else x > threshold
+            if has_missing:
+                go_right = np.where(np.isnan(x), ~self.default_left[node], go_right)
+            node = self.children[node, go_right.view(np.int8)]
+        return node
+
+    def _chunks(self, X, fn):
+        X = np.asarray(X)
+        if len(X) <= CHUNK_ROWS:
+            return fn(X)
+        return np.concatenate([fn(X[i:i + CHUNK_ROWS]) for i in range(0, len(X), CHUNK_ROWS)])
+
+
+class CompiledXGBoost(TreeEnsembleScorer):
+    """XGBoost binary:logistic: margin = base_margin + tổng giá trị lá"""
+
+    def __init__(self, base_margin, classes, **arrays):
+        super().__init__(**arrays)
+        self.base_margin = base_margin
+        self.classes_ = classes
+
+    def decision_function(self, X):
+        def margin(chunk):
+            # Cộng dồn ở float32 giống XGBoost
+            return self.leaf_values[self.leaves(chunk)].sum(axis=1, dtype=np.float32) + np.float32(self.base_margin)
+        return self._chunks(X, margin)
+
+    def predict_proba(self, X):
+        positive = 1.0 / (1.0 + np.exp(-self.decision_function(X).astype(np.float64)))
+        return np.column_stack([1.0 - positive, positive])
+
+    def predict(self, X):
+        return self.classes_[(self.decision_function(X) > 0).astype(int)]
+
+
+class CompiledRandomForest(TreeEnsembleScorer):
+    """Random Forest: trung bình xác suất lớp của các cây, chọn lớp lớn nhất"""
+
+    def __init__(self, classes, **arrays):
+        super().__init__(**arrays)
+        self.classes_ = classes
+
+    def predict_proba(self, X):
+        def proba(chunk):
+            return self.leaf_values[self.leaves(chunk)].mean(axis=1)
+        return self._chunks(X, proba)
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+class CompiledLinear:
+    """Logistic Regression với StandardScaler gộp vào hệ số: z = X @ w + b"""
+
+    def __init__(self, weights, intercept, classes):
+        self.weights = weights
+        self.intercept = intercept
+        self.classes_ = classes
+
+    def handles(self, n_rows):
+        return True
+
+    @property
+    def nbytes(self):
+        return self.weights.nbytes + 8
+
+    def decision_function(self, X):
+        return np.asarray(X, dtype=np.float64) @ self.weights + self.intercept
+
+    def predict_proba(self, X):
+        positive = 1.0 / (1.0 + np.exp(-self.decision_function(X)))
+        return np.column_stack([1.0 - positive, positive])
+
+    def predict(self, X):
+        return self.classes_[(self.decision_function(X) > 0).astype(int)]
+
+
+def _tree_depth(left, right):
+    depth = {0: 0}
+    max_depth = 0
+    for node in range(len(left)):
+        if left[node] >= 0:
+            depth[left[node]] = depth[right[node]] = depth[node] + 1
+            max_depth = max(max_depth, depth[node] + 1)
+    return max_depth
+
+
+def flatten_trees(trees, strict):
+    """
+    Ghép các cây thành mảng node chung, trả về kwargs cho TreeEnsembleScorer
+
+    trees: danh sách dict(feature, threshold, left, right, default_left, value), chỉ số node cục bộ, lá có left = -1
+    """
+    feature, threshold, left, right, default_left, values, roots = [], [], [], [], [], [], []
+    max_depth = 0
+    offset = 0
+    for tree in trees:
+        n_nodes = len(tree['left'])
+        node_ids = np.arange(n_nodes) + offset
+        is_leaf = np.asarray(tree['left']) < 0
+        feature.append(np.where(is_leaf, 0, tree['feature']))
+        threshold.append(np.asarray(tree['threshold']))
+        left.append(np.where(is_leaf, node_ids, np.asarray(tree['left']) + offset))
+        right.append(np.where(is_leaf, node_ids, np.asarray(tree['right']) + offset))
+        default_left.append(np.asarray(tree['default_left'], dtype=bool))
+        values.append(np.asarray(tree['value']))
+        roots.append(offset)
+        max_depth = max(max_depth, _tree_depth(tree['left'], tree['right']))
+        offset += n_nodes
+
+    return dict(
+        feature=np.concatenate(feature).astype(np.int32),
+        threshold=np.concatenate(threshold),
+        left=np.concatenate(left).astype(np.int32),
+        right=np.concatenate(right).astype(np.int32),
+        default_left=np.concatenate(default_left),
+        leaf_values=np.concatenate(values),
+        roots=np.asarray(roots, dtype=np.int32),
+        max_depth=max_depth,
+        strict=strict,
+    )
+
+
+def compile_xgboost(model):
+    """Trải phẳng cây của XGBClassifier (binary:logistic) từ model JSON của booster"""
+    learner = json.loads(model.get_booster().save_raw(raw_format='json'))['learner']
+    objective = learner['objective']['name']
+    if objective != 'binary:logistic':
+        raise ValueError(f"Unsupported XGBoost objective: {objective}")
+
+    booster = learner['gradient_booster']
+    if booster['name'] != 'gbtree':
+        raise ValueError(f"Unsupported XGBoost booster: {booster['name']}")
+
+    trees = []
+    for tree in booster['model']['trees']:
+        if any(tree['split_type']):
+            raise ValueError("Categorical splits are not supported")
+        left = np.asarray(tree['left_children'])
+        trees.append({
+            'feature': tree['split_indices'],
+            'threshold': np.asarray(tree['split_conditions'], dtype=np.float32),
+            'left': left,
+            'right': tree['right_children'],
+            'default_left': tree['default_left'],
+            # Với node lá, split_conditions chứa giá trị lá
+            'value': np.where(left < 0, np.asarray(tree['split_conditions'], dtype=np.float32), 0).astype(np.float32),
+        })
+
+    # base_score lưu ở không gian xác suất, margin gốc là logit của nó
+    base_score = float(learner['learner_model_param']['base_score'])
+    base_margin = np.log(base_score / (1.0 - base_score))
+    arrays = flatten_trees(trees, strict=True)
+    return CompiledXGBoost(base_margin=base_margin, classes=np.asarray(model.classes_), **arrays)
+
+
+def compile_random_forest(model):
+    """Trải phẳng các cây của RandomForestClassifier"""
+    trees = []
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        value = tree.value[:, 0, :]
+        trees.append({
+            'feature': tree.feature,
+            'threshold': tree.threshold,
+            'left': tree.children_left,
+            'right': tree.children_right,
+            'default_left': np.ones(tree.node_count, dtype=bool),
+            # Xác suất lớp tại mỗi node giống DecisionTreeClassifier.predict_proba
+            'value': value / value.sum(axis=1, keepdims=True),
+        })
+    arrays = flatten_trees(trees, strict=False)
+    return CompiledRandomForest(classes=np.asarray(model.classes_), **arrays)
+
+
+def compile_logistic(model, scaler=None):
+    """Gộp (X - mean) / scale vào hệ số: w' = w / scale, b' = b - sum(w * mean / scale)"""
+    if model.coef_.shape[0] != 1:
+        raise ValueError("Only binary logistic regression is supported")
+    weights = model.coef_[0].astype(np.float64)
+    intercept = float(model.intercept_[0])
+    if scaler is not None:
+        scale = scaler.scale_ if scaler.scale_ is not None else np.ones_like(weights)
+        mean = scaler.mean_ if scaler.mean_ is not None else np.zeros_like(weights)
+        weights = weights / scale
+        intercept = intercept - float(np.dot(weights, mean))
+    return CompiledLinear(weights, intercept, np.asarray(model.classes_))
+
+
+SCORER_TYPES = {cls.__name__: cls for cls in (CompiledXGBoost, CompiledRandomForest, CompiledLinear)}
+
+
+def save_scorer(scorer, directory):
+    """Lưu scorer thành các file .npy không nén (mmap được) kèm scorer.json cho tham số vô hướng"""
+    os.makedirs(directory, exist_ok=True)
+    params = {}
+    for name, value in vars(scorer).items():
+        if isinstance(value, np.ndarray):
+            np.save(os.path.join(directory, f"{name}.npy"), value, allow_pickle=False)
+        else:
+            params[name] = value.item() if isinstance(value, np.generic) else value
+    with open(os.path.join(directory, 'scorer.json'), 'w') as f:
+        json.dump({'type': type(scorer).__name__, 'params': params}, f)
+
+
+def load_scorer(directory, mmap_mode=None):
+    """
+    Đọc scorer đã lưu; mmap_mode='r' map các mảng read-only từ file,
+    nhiều process đọc cùng store dùng chung page cache thay vì mỗi process một bản
+    """
+    with open(os.path.join(directory, 'scorer.json')) as f:
+        meta = json.load(f)
+    scorer = SCORER_TYPES[meta['type']].__new__(SCORER_TYPES[meta['type']])
+    for file_name in os.listdir(directory):
+        if file_name.endswith('.npy'):
+            setattr(scorer, file_name[:-4], np.load(os.path.join(directory, file_name), mmap_mode=mmap_mode))
+    for name, value in meta['params'].items():
+        setattr(scorer, name, value)
+    return scorer
+
+
+def compile_model(model, scaler=None):
+    """Chọn cách biên dịch theo loại mô hình"""
+    if hasattr(model, 'get_booster'):
+        return compile_xgboost(model)
+    if hasattr(model, 'estimators_'):
+        return compile_random_forest(model)
+    if hasattr(model, 'coef_'):
+        return compile_logistic(model, scaler)
+    raise ValueError(f"Cannot compile model of type {type(model).__name__}")
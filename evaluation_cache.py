@@ -0,0 +1,71 @@
+"""
+Key cache kết quả /evaluate và gộp các lần đánh giá giống nhau đang chạy đồng thời.
+
+Key là fingerprint nội dung dataset + phiên bản của các mô hình được so sánh, nên khi một
+mô hình đổi phiên bản (hot-swap) các kết quả cũ không bao giờ khớp nữa. Kết quả được lưu
+trong DB của service (xem EvaluationCacheEntry trong ML-app.py); module này chỉ lo key
+và phần gộp request trong process.
+"""
+
+import json
+import asyncio
+import hashlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def dataset_fingerprint(data, data_format):
+    """Hash nội dung body / file dataset (cùng nội dung, cùng định dạng -> cùng fingerprint)"""
+    digest = hashlib.blake2b(f"{data_format}:".encode(), digest_size=16)
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        digest.update(data)
+    else:
+        for chunk in iter(lambda: data.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_key(fingerprint, versions):
+    """Key của kết quả: fingerprint dataset + {tên mô hình: phiên bản}"""
+    payload = json.dumps({'dataset': fingerprint, 'models': versions}, sort_keys=True)
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+
+class SingleFlight:
+    """
+    Gộp các coroutine cùng key đang chạy đồng thời: chỉ lần gọi đầu tiên thực sự tính,
+    các lần gọi sau chờ và nhận cùng kết quả (hoặc cùng exception)
+
+    Phép tính chạy trong task riêng nên request nào bị hủy (client ngắt kết nối), kể cả request
+    đầu tiên, cũng không hủy nó và các request khác vẫn nhận được kết quả.
+    """
+
+    def __init__(self, shared_counter=None):
+        self.shared_counter = shared_counter
+        # {key: task đang tính}; giữ reference tới task cho tới khi xong
+        self._inflight = {}
+
+    async def run(self, key, compute):
+        """compute() là coroutine function; trả về (kết quả, True nếu dùng chung với request khác)"""
+        task = self._inflight.get(key)
+        shared = task is not None
+        if shared:
+            if self.shared_counter is not None:
+                self.shared_counter.inc()
+        else:
+            task = asyncio.get_running_loop().create_task(compute())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        # shield: request chờ bị hủy không hủy phép tính
+        return await asyncio.shield(task), shared
+
+    def _finish(self, key, task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mọi request đã bị hủy thì exception không cần được lấy ra
+        if not task.cancelled():
+            task.exception()
+
+    def __len__(self):
+        return len(self._inflight)
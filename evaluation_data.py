@@ -0,0 +1,221 @@
+"""
+Đọc dữ liệu kiểm thử của /evaluate thành các cột NumPy có kiểu, không qua List[dict] / DataFrame theo dòng.
+
+Các định dạng body được hỗ trợ:
+- JSON dạng cột {tên cột: [giá trị]} (hoặc danh sách bản ghi như trước đây)
+- CSV (body thô hoặc file upload)
+- .npy chứa structured array (mỗi field là một cột)
+- Arrow IPC (stream hoặc file, cần pyarrow)
+
+Ngoài ra có thể tham chiếu một dataset có sẵn trên server (DatasetStore) để không phải upload.
+"""
+
+import io
+import os
+import json
+import logging
+import threading
+import numpy as np
+
+from evaluation_cache import dataset_fingerprint
+
+logger = logging.getLogger(__name__)
+
+TARGET_COLUMNS = ('loan_status', 'target', 'y')
+
+DATASET_EXTENSIONS = ('.csv', '.npy', '.arrow')
+
+CONTENT_TYPES = {
+    'application/json': 'json',
+    'text/csv': 'csv',
+    'application/csv': 'csv',
+    'application/x-npy': 'npy',
+    'application/vnd.apache.arrow.stream': 'arrow',
+    'application/vnd.apache.arrow.file': 'arrow',
+}
+
+
+class UnsupportedFormat(ValueError):
+    """Content-Type / phần mở rộng không được hỗ trợ (hoặc thiếu thư viện để đọc)"""
+
+
+def normalize_columns(columns):
+    """Tên cột không phân biệt hoa thường, bỏ khoảng trắng"""
+    return {str(name).strip().lower(): values for name, values in columns.items()}
+
+
+def columns_from_records(records):
+    """Danh sách bản ghi (dict) -> cột; bản ghi thiếu cột nhận None"""
+    names = {}
+    for record in records:
+        if not isinstance(record, dict):
+            raise ValueError("Each record must be a JSON object of column values")
+        for key in record:
+            names.setdefault(key, None)
+    return {name: np.asarray([record.get(name) for record in records]) for name in names}
+
+
+def columns_from_json(data):
+    payload = json.loads(data)
+    if isinstance(payload, list):
+        return columns_from_records(payload)
+    if isinstance(payload, dict):
+        columns = {name: np.asarray(values) for name, values in payload.items()}
+        not_lists = sorted(name for name, values in columns.items() if values.ndim != 1)
+        if not_lists:
+            raise ValueError(f"Each column must be a list of values, got non-list columns {not_lists}")
+        lengths = {len(values) for values in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError(f"All columns must have the same length, got lengths {sorted(lengths)}")
+        return columns
+    raise ValueError("JSON body must be a list of records or an object of columns")
+
+
+def columns_from_csv(data):
+    import pandas as pd
+
+    source = io.BytesIO(data) if isinstance(data, (bytes, bytearray)) else data
+    df = pd.read_csv(source)
+    return {name: df[name].to_numpy() for name in df.columns}
+
+
+def columns_from_npy(data):
+    if isinstance(data, (bytes, bytearray)):
+        # Đọc trực tiếp trên body (không copy), chỉ parse header .npy
+        source = io.BytesIO(data)
+        version = np.lib.format.read_magic(source)
+        read_header = np.lib.format.read_array_header_1_0 if version == (1, 0) else np.lib.format.read_array_header_2_0
+        shape, fortran_order, dtype = read_header(source)
+        if dtype.hasobject:
+            raise ValueError(".npy payload must not contain Python objects")
+        array = np.frombuffer(data, dtype=dtype, count=int(np.prod(shape)), offset=source.tell())
+        array = array.reshape(shape, order='F' if fortran_order else 'C')
+    else:
+        array = np.load(data, allow_pickle=False)
+    if array.dtype.names is None:
+        raise ValueError(".npy payload must be a structured array with one field per column")
+    return {name: array[name] for name in array.dtype.names}
+
+
+def columns_from_arrow(data):
+    try:
+        import pyarrow as pa
+    except ImportError as e:
+        raise UnsupportedFormat(f"Arrow support is not installed: {e}")
+
+    if isinstance(data, (bytes, bytearray)):
+        source = pa.BufferReader(data)
+    elif isinstance(data, (str, os.PathLike)):
+        source = pa.memory_map(os.fspath(data))
+    else:
+        # File object đã mở (DatasetStore.load)
+        source = pa.PythonFile(data, mode='r')
+    try:
+        table = pa.ipc.open_file(source).read_all()
+    except pa.ArrowInvalid:
+        source.seek(0)
+        table = pa.ipc.open_stream(source).read_all()
+    return {name: table.column(name).to_numpy() for name in table.column_names}
+
+
+READERS = {
+    'json': columns_from_json,
+    'csv': columns_from_csv,
+    'npy': columns_from_npy,
+    'arrow': columns_from_arrow,
+}
+
+
+def detect_format(content_type=None, filename=None):
+    """Định dạng theo phần mở rộng file (nếu có), sau đó theo Content-Type; mặc định JSON"""
+    if filename:
+        extension = os.path.splitext(filename)[1].lower().lstrip('.')
+        if extension in READERS:
+            return extension
+    media_type = (content_type or '').split(';')[0].strip().lower()
+    if not media_type:
+        return 'json'
+    if media_type in CONTENT_TYPES:
+        return CONTENT_TYPES[media_type]
+    raise UnsupportedFormat(
+        f"Unsupported content type: {media_type}. Supported: {', '.join(sorted(CONTENT_TYPES))}"
+    )
+
+
+def parse_columns(data, content_type=None, filename=None):
+    """Đọc body thành {tên cột (chữ thường): mảng NumPy}"""
+    columns = normalize_columns(READERS[detect_format(content_type, filename)](data))
+    if not columns:
+        raise ValueError("No data provided for evaluation")
+    return columns
+
+
+def split_target(columns):
+    """Tách cột nhãn (loan_status, target hoặc y) khỏi các cột features"""
+    for name in TARGET_COLUMNS:
+        if name in columns:
+            return name, np.asarray(columns[name])
+    raise ValueError(
+        f"Dataset must contain a target column (loan_status, target, or y). Available columns: {list(columns)}"
+    )
+
+
+class DatasetStore:
+    """Các dataset kiểm thử có sẵn trên server, đọc một lần và giữ dạng cột cho tới khi file thay đổi"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._cache = {}
+        self._fingerprints = {}
+        self._lock = threading.Lock()
+
+    def names(self):
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(
+            os.path.splitext(file_name)[0] for file_name in os.listdir(self.directory)
+            if os.path.splitext(file_name)[1].lower() in DATASET_EXTENSIONS
+        )
+
+    def path_for(self, name):
+        # Chỉ nhận tên dataset có trong thư mục, không nhận đường dẫn
+        for file_name in os.listdir(self.directory) if os.path.isdir(self.directory) else []:
+            stem, extension = os.path.splitext(file_name)
+            if stem == name and extension.lower() in DATASET_EXTENSIONS:
+                return os.path.join(self.directory, file_name)
+        raise KeyError(f"Unknown dataset: {name}. Available datasets: {self.names()}")
+
+    def signature(self, name):
+        """(đường dẫn, mtime, kích thước) của file dataset, đổi khi file thay đổi"""
+        path = self.path_for(name)
+        stat = os.stat(path)
+        return path, stat.st_mtime_ns, stat.st_size
+
+    def fingerprint(self, name):
+        """Hash nội dung file dataset, tính lại khi file thay đổi"""
+        signature = self.signature(name)
+        with self._lock:
+            cached = self._fingerprints.get(name)
+            if cached is not None and cached[0] == signature:
+                return cached[1]
+
+        with open(signature[0], 'rb') as f:
+            fingerprint = dataset_fingerprint(f, detect_format(filename=signature[0]))
+        with self._lock:
+            self._fingerprints[name] = (signature, fingerprint)
+        return fingerprint
+
+    def load(self, name):
+        signature = self.signature(name)
+        with self._lock:
+            cached = self._cache.get(name)
+            if cached is not None and cached[0] == signature:
+                return cached[1]
+
+        path = signature[0]
+        with open(path, 'rb') as f:
+            columns = parse_columns(f, filename=path)
+        with self._lock:
+            self._cache[name] = (signature, columns)
+        logger.info("Loaded evaluation dataset %s from %s: %s rows", name, path, len(next(iter(columns.values()))))
+        return columns
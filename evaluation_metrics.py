@@ -0,0 +1,123 @@
+"""
+Metrics phân loại nhị phân cho /evaluate, tính trong một lượt NumPy.
+Ma trận nhầm lẫn dựng bằng một lần bincount, các metric ngưỡng (accuracy, precision, recall, F1,
+specificity, MCC) suy ra từ đó; ROC-AUC, average precision và các đường cong ROC / PR
+lấy từ một lần sắp xếp xác suất. Quy ước zero_division=0 giống scikit-learn.
+"""
+
+import numpy as np
+
+
+def _divide(numerator, denominator):
+    return float(numerator / denominator) if denominator else 0.0
+
+
+def _confusion(actual, predicted):
+    tn, fp, fn, tp = np.bincount(actual.astype(np.int64) * 2 + predicted, minlength=4)
+    return int(tn), int(fp), int(fn), int(tp)
+
+
+def confusion_matrix(y_true, y_pred, pos_label=1):
+    """(tn, fp, fn, tp) trong một lần bincount"""
+    return _confusion(np.asarray(y_true) == pos_label, np.asarray(y_pred) == pos_label)
+
+
+def threshold_metrics(tn, fp, fn, tp):
+    """Các metric suy ra từ ma trận nhầm lẫn"""
+    precision = _divide(tp, tp + fp)
+    recall = _divide(tp, tp + fn)
+    # Nhân ở float để tránh tràn số nguyên với tập dữ liệu lớn
+    mcc_denominator = np.sqrt(float(tp + fp) * float(tp + fn) * float(tn + fp) * float(tn + fn))
+    return {
+        'accuracy': _divide(tp + tn, tn + fp + fn + tp),
+        'precision': precision,
+        'recall': recall,
+        'f1': _divide(2 * tp, 2 * tp + fp + fn),
+        'specificity': _divide(tn, tn + fp),
+        'mcc': _divide(float(tp) * tn - float(fp) * fn, mcc_denominator),
+    }
+
+
+def binary_clf_curve(y_true, y_score, pos_label=1):
+    """
+    Số false positive / true positive tại mỗi ngưỡng phân biệt (giảm dần), từ một lần sắp xếp
+
+    Trả về (fps, tps, thresholds) giống sklearn.metrics._ranking._binary_clf_curve
+    """
+    actual = (np.asarray(y_true) == pos_label).astype(np.float64)
+    y_score = np.asarray(y_score, dtype=np.float64)
+    order = np.argsort(y_score, kind='mergesort')[::-1]
+    y_score = y_score[order]
+    actual = actual[order]
+
+    # Chỉ lấy vị trí cuối của mỗi nhóm điểm bằng nhau
+    threshold_idx = np.r_[np.flatnonzero(np.diff(y_score)), actual.size - 1]
+    tps = np.cumsum(actual)[threshold_idx]
+    fps = 1 + threshold_idx - tps
+    return fps, tps, y_score[threshold_idx]
+
+
+def roc_curve(fps, tps):
+    """(fpr, tpr) bắt đầu từ (0, 0); None khi y_true chỉ có một lớp"""
+    if not len(tps) or tps[-1] == 0 or fps[-1] == 0:
+        return None
+    return np.r_[0.0, fps] / fps[-1], np.r_[0.0, tps] / tps[-1]
+
+
+def precision_recall_curve(fps, tps):
+    """(precision, recall) theo ngưỡng giảm dần, kết thúc ở (1, 0) giống scikit-learn sau khi đảo chiều"""
+    predicted = tps + fps
+    precision = np.divide(tps, predicted, out=np.zeros_like(tps), where=predicted != 0)
+    recall = tps / tps[-1] if len(tps) and tps[-1] else np.ones_like(tps)
+    return np.r_[precision[::-1], 1.0], np.r_[recall[::-1], 0.0]
+
+
+def average_precision(fps, tps):
+    """AP = sum((R_n - R_{n-1}) * P_n)"""
+    precision, recall = precision_recall_curve(fps, tps)
+    return float(-np.sum(np.diff(recall) * precision[:-1]))
+
+
+def _downsample(x, y, max_points):
+    """Rút gọn đường cong còn tối đa max_points điểm (giữ điểm đầu và cuối) để trả về trong response"""
+    if max_points is None or len(x) <= max_points:
+        idx = slice(None)
+    else:
+        idx = np.unique(np.linspace(0, len(x) - 1, max_points).round().astype(int))
+    return [round(float(v), 6) for v in x[idx]], [round(float(v), 6) for v in y[idx]]
+
+
+def binary_metrics(y_true, y_score=None, y_pred=None, threshold=0.5, pos_label=1, curve_points=101):
+    """
+    Toàn bộ metrics của một mô hình
+
+    y_score: xác suất lớp dương; nếu có thì y_pred = y_score > threshold (giống predict của
+    XGBoost / Random Forest / Logistic Regression với ngưỡng 0.5) và tính thêm ROC-AUC, AP, đường cong.
+    Không có y_score thì chỉ tính các metric từ y_pred.
+    """
+    if y_pred is not None:
+        predicted = np.asarray(y_pred) == pos_label
+    elif y_score is not None:
+        predicted = np.asarray(y_score) > threshold
+    else:
+        raise ValueError("Either y_score or y_pred is required")
+
+    tn, fp, fn, tp = _confusion(np.asarray(y_true) == pos_label, predicted)
+    result = threshold_metrics(tn, fp, fn, tp)
+    result['confusion_matrix'] = {'tn': tn, 'fp': fp, 'fn': fn, 'tp': tp}
+
+    if y_score is not None:
+        fps, tps, _ = binary_clf_curve(y_true, y_score, pos_label)
+        roc = roc_curve(fps, tps)
+        if roc is None:
+            # ROC-AUC không xác định khi y_true chỉ có một lớp
+            result['roc_auc'] = None
+            result['average_precision'] = None
+        else:
+            fpr, tpr = roc
+            result['roc_auc'] = float(np.trapz(tpr, fpr))
+            result['average_precision'] = average_precision(fps, tps)
+            result['roc_curve'] = dict(zip(('fpr', 'tpr'), _downsample(fpr, tpr, curve_points)))
+            precision, recall = precision_recall_curve(fps, tps)
+            result['pr_curve'] = dict(zip(('precision', 'recall'), _downsample(precision, recall, curve_points)))
+    return result
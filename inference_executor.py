@@ -0,0 +1,112 @@
+"""
+Executor riêng cho suy luận (CPU-bound), tách khỏi threadpool mặc định của Starlette
+để các request /evaluate lớn không chiếm hết thread của login, CRUD khoản vay...
+
+Hàng đợi có giới hạn: khi đầy, submit ném ExecutorFull ngay lập tức để service trả 503
+kèm Retry-After thay vì để request dồn lại.
+"""
+
+import math
+import time
+import asyncio
+import logging
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class ExecutorFull(Exception):
+    """Hàng đợi suy luận đã đầy"""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Inference queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class BoundedExecutor(Executor):
+    """ThreadPoolExecutor với tối đa max_workers task đang chạy và max_queue task đang chờ"""
+
+    def __init__(
+        self,
+        max_workers=4,
+        max_queue=32,
+        queue_histogram=None,
+        execution_histogram=None,
+        rejected_counter=None,
+        in_flight_gauge=None,
+    ):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.queue_histogram = queue_histogram
+        self.execution_histogram = execution_histogram
+        self.rejected_counter = rejected_counter
+        self.in_flight_gauge = in_flight_gauge
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="inference")
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._in_flight = 0
+        self._rejected = 0
+        # Trung bình trượt thời gian chạy, dùng để ước lượng Retry-After
+        self._avg_execution = 0.0
+        self._lock = threading.Lock()
+
+    def retry_after(self):
+        """Ước lượng số giây đến khi hàng đợi hiện tại chạy xong (tối thiểu 1 giây)"""
+        return max(1, math.ceil(self._in_flight * self._avg_execution / self.max_workers))
+
+    def submit(self, fn, *args, **kwargs):
+        operation = getattr(fn, '__name__', 'task')
+        if not self._slots.acquire(blocking=False):
+            self._rejected += 1
+            if self.rejected_counter is not None:
+                self.rejected_counter.labels(operation=operation).inc()
+            raise ExecutorFull(self.retry_after())
+
+        enqueued_at = time.perf_counter()
+
+        def task():
+            started = time.perf_counter()
+            if self.queue_histogram is not None:
+                self.queue_histogram.labels(operation=operation).observe(started - enqueued_at)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                self._avg_execution = 0.8 * self._avg_execution + 0.2 * elapsed if self._avg_execution else elapsed
+                if self.execution_histogram is not None:
+                    self.execution_histogram.labels(operation=operation).observe(elapsed)
+
+        self._track(1)
+        try:
+            future = self._pool.submit(task)
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(lambda _: self._release())
+        return future
+
+    async def run(self, fn, *args, **kwargs):
+        """Chạy fn trên executor và await kết quả từ event loop"""
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def _track(self, delta):
+        with self._lock:
+            self._in_flight += delta
+        if self.in_flight_gauge is not None:
+            self.in_flight_gauge.inc(delta)
+
+    def _release(self):
+        self._track(-1)
+        self._slots.release()
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        self._pool.shutdown(wait=wait, cancel_futures=cancel_futures)
+
+    def stats(self):
+        return {
+            'max_workers': self.max_workers,
+            'max_queue': self.max_queue,
+            'in_flight': self._in_flight,
+            'rejected': self._rejected,
+            'avg_execution_seconds': self._avg_execution,
+        }
@@ -0,0 +1,258 @@
+"""
+Backend suy luận chạy trên pool process (một process mỗi core), tránh GIL của worker uvicorn.
+
+Scorer đã biên dịch của mỗi snapshot được ghi thành file .npy trong một store (mặc định /dev/shm),
+các process worker map read-only nên dùng chung một bản trong page cache thay vì mỗi worker một bản.
+Scorer cây NumPy chỉ nhanh hơn mô hình gốc với batch nhỏ (max_rows): artifact gốc được chép kèm vào store
+và chunk lớn hơn max_rows được worker chấm bằng mô hình gốc (XGBoost / scikit-learn, một thread mỗi worker).
+Ma trận features và kết quả được trao đổi qua shared memory, worker đọc/ghi trực tiếp không copy.
+"""
+
+import os
+import time
+import shutil
+import logging
+import tempfile
+import threading
+import multiprocessing
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+from compiled_scorers import save_scorer, load_scorer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORE_DIR = os.path.join("/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir(), "ml-model-store")
+
+# Batch nhỏ hơn thế này không đáng chia cho nhiều worker
+MIN_CHUNK_ROWS = 256
+
+# Tên file (không đuôi) của artifact gốc trong thư mục scorer
+NATIVE_NAME = 'native'
+
+# ---- Phía worker ----
+_worker_index = None
+_worker_scorers = {}
+_worker_natives = {}
+
+
+def _init_worker(counter):
+    global _worker_index
+    with counter.get_lock():
+        _worker_index = counter.value
+        counter.value += 1
+
+
+def _score_chunk(scorer_dir, input_name, shape, output_name, output_dtype, start, stop, method='predict'):
+    """
+    Chấm điểm các dòng [start, stop) của ma trận trong shared memory, ghi kết quả vào block output
+
+    method='predict_proba' ghi xác suất lớp dương thay vì nhãn
+    """
+    started = time.perf_counter()
+    # Snapshot đã bị xóa khỏi store thì bỏ mmap của nó
+    for cached_dir in list(_worker_scorers):
+        if not os.path.isdir(cached_dir):
+            del _worker_scorers[cached_dir]
+            _worker_natives.pop(cached_dir, None)
+    scorer = _worker_scorers.get(scorer_dir)
+    if scorer is None:
+        scorer = _worker_scorers[scorer_dir] = load_scorer(scorer_dir, mmap_mode='r')
+    if not scorer.handles(stop - start):
+        native = _native_model(scorer_dir)
+        if native is not None:
+            scorer = native
+
+    # Worker chỉ attach; block do process cha tạo và unlink (dùng chung resource tracker với process cha)
+    input_shm = shared_memory.SharedMemory(name=input_name)
+    output_shm = shared_memory.SharedMemory(name=output_name)
+    try:
+        features_matrix = np.ndarray(shape, dtype=np.float64, buffer=input_shm.buf)
+        output = np.ndarray((shape[0],), dtype=output_dtype, buffer=output_shm.buf)
+        if method == 'predict_proba':
+            output[start:stop] = scorer.predict_proba(features_matrix[start:stop])[:, 1]
+        else:
+            output[start:stop] = scorer.predict(features_matrix[start:stop])
+        del features_matrix, output
+    finally:
+        input_shm.close()
+        output_shm.close()
+    return _worker_index, os.getpid(), time.perf_counter() - started
+
+
+def _native_model(scorer_dir):
+    """Mô hình gốc chép kèm scorer trong store (load một lần mỗi worker), None nếu không có"""
+    if scorer_dir not in _worker_natives:
+        path = next((os.path.join(scorer_dir, name) for name in os.listdir(scorer_dir) if name.startswith(NATIVE_NAME)), None)
+        model = None
+        if path is not None:
+            # Import khi cần: worker chỉ chấm batch nhỏ thì không phải load xgboost / scikit-learn
+            from model_registry import LOADERS
+            model = LOADERS[os.path.splitext(path)[1]](path)
+            # Mỗi core một worker: mô hình gốc chỉ dùng một thread
+            if hasattr(model, 'set_params') and 'n_jobs' in model.get_params():
+                model.set_params(n_jobs=1)
+        _worker_natives[scorer_dir] = model
+    return _worker_natives[scorer_dir]
+
+
+# ---- Phía service ----
+class InferencePool:
+    """Pool process chấm điểm bằng scorer đã biên dịch, map từ store dùng chung"""
+
+    def __init__(
+        self,
+        workers=None,
+        store_dir=DEFAULT_STORE_DIR,
+        keep_generations=2,
+        busy_counter=None,
+        task_counter=None,
+        utilization_gauge=None,
+    ):
+        self.workers = workers or os.cpu_count() or 1
+        # Mỗi process service một thư mục riêng để nhiều worker uvicorn không ghi đè store của nhau
+        self.store_root = store_dir
+        self.store_dir = os.path.join(store_dir, str(os.getpid()))
+        self.keep_generations = keep_generations
+        self.busy_counter = busy_counter
+        self.task_counter = task_counter
+        self.utilization_gauge = utilization_gauge
+        self._executor = None
+        self._published = {}
+        self._busy = {}
+        self._tasks = {}
+        self._started_at = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        # spawn: worker không kế thừa thread/socket của service, chỉ import module này và NumPy
+        context = multiprocessing.get_context('spawn')
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(context.Value('i', 0),),
+        )
+        self._started_at = time.monotonic()
+        self._remove_dead_stores()
+        os.makedirs(self.store_dir, exist_ok=True)
+        logger.info("✓ Inference pool started with %s workers, model store %s", self.workers, self.store_dir)
+
+    def _remove_dead_stores(self):
+        """Xóa store còn sót lại của process đã chết (vd: pod bị kill trước khi shutdown)"""
+        if not os.path.isdir(self.store_root):
+            return
+        for entry in os.listdir(self.store_root):
+            if not entry.isdigit() or int(entry) == os.getpid():
+                continue
+            try:
+                os.kill(int(entry), 0)
+            except ProcessLookupError:
+                shutil.rmtree(os.path.join(self.store_root, entry), ignore_errors=True)
+            except PermissionError:
+                pass
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+        shutil.rmtree(self.store_dir, ignore_errors=True)
+        self._published.clear()
+
+    def _generation_dir(self, generation):
+        return os.path.join(self.store_dir, f"g{generation}")
+
+    def publish(self, generation, scorers, natives=None):
+        """
+        Ghi scorer (một phần hoặc toàn bộ) của một snapshot vào store; chỉ giữ keep_generations snapshot gần nhất
+
+        natives: {tên mô hình: đường dẫn artifact gốc} được chép kèm để worker chấm chunk lớn hơn scorer.max_rows
+        """
+        natives = natives or {}
+        generation_dir = self._generation_dir(generation)
+        published = {}
+        for model_name, scorer in scorers.items():
+            if scorer is None:
+                continue
+            scorer_dir = os.path.join(generation_dir, model_name)
+            shutil.rmtree(scorer_dir, ignore_errors=True)
+            save_scorer(scorer, scorer_dir)
+            if natives.get(model_name):
+                shutil.copyfile(natives[model_name], os.path.join(scorer_dir, NATIVE_NAME + os.path.splitext(natives[model_name])[1]))
+            published[model_name] = (scorer_dir, np.asarray(scorer.classes_).dtype)
+
+        with self._lock:
+            self._published.setdefault(generation, {}).update(published)
+            stale = sorted(self._published)[:-self.keep_generations]
+            for old in stale:
+                del self._published[old]
+        for old in stale:
+            shutil.rmtree(self._generation_dir(old), ignore_errors=True)
+        logger.info("Published %s of generation %s to %s", sorted(published), generation, generation_dir)
+
+    def has(self, generation, model_name):
+        return self._executor is not None and model_name in self._published.get(generation, {})
+
+    def predict(self, generation, model_name, features_matrix, method='predict'):
+        """Chia batch cho các worker, đợi kết quả (chạy trong thread của request, không chặn event loop)"""
+        scorer_dir, output_dtype = self._published[generation][model_name]
+        if method == 'predict_proba':
+            output_dtype = np.dtype(np.float64)
+        features_matrix = np.ascontiguousarray(features_matrix, dtype=np.float64)
+        n_rows = len(features_matrix)
+
+        input_shm = shared_memory.SharedMemory(create=True, size=max(features_matrix.nbytes, 1))
+        output_shm = shared_memory.SharedMemory(create=True, size=max(n_rows * output_dtype.itemsize, 1))
+        try:
+            np.ndarray(features_matrix.shape, dtype=np.float64, buffer=input_shm.buf)[:] = features_matrix
+
+            n_chunks = max(1, min(self.workers, n_rows // MIN_CHUNK_ROWS))
+            bounds = np.linspace(0, n_rows, n_chunks + 1).astype(int)
+            futures = [
+                self._executor.submit(
+                    _score_chunk, scorer_dir, input_shm.name, features_matrix.shape,
+                    output_shm.name, output_dtype, int(start), int(stop), method
+                )
+                for start, stop in zip(bounds[:-1], bounds[1:])
+            ]
+            for future in futures:
+                self._record(*future.result())
+
+            return np.ndarray((n_rows,), dtype=output_dtype, buffer=output_shm.buf).copy()
+        finally:
+            input_shm.close()
+            input_shm.unlink()
+            output_shm.close()
+            output_shm.unlink()
+
+    def _record(self, worker_index, pid, busy_seconds):
+        with self._lock:
+            self._busy[worker_index] = self._busy.get(worker_index, 0.0) + busy_seconds
+            self._tasks[worker_index] = self._tasks.get(worker_index, 0) + 1
+            utilization = self._busy[worker_index] / max(time.monotonic() - self._started_at, 1e-9)
+        worker = str(worker_index)
+        if self.busy_counter is not None:
+            self.busy_counter.labels(worker=worker).inc(busy_seconds)
+        if self.task_counter is not None:
+            self.task_counter.labels(worker=worker).inc()
+        if self.utilization_gauge is not None:
+            self.utilization_gauge.labels(worker=worker).set(utilization)
+
+    def stats(self):
+        uptime = time.monotonic() - self._started_at if self._started_at is not None else 0.0
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'store_dir': self.store_dir,
+                'generations': {generation: sorted(models) for generation, models in self._published.items()},
+                'per_worker': [
+                    {
+                        'worker': worker_index,
+                        'tasks': self._tasks[worker_index],
+                        'busy_seconds': self._busy[worker_index],
+                        'utilization': self._busy[worker_index] / uptime if uptime else 0.0,
+                    }
+                    for worker_index in sorted(self._busy)
+                ],
+            }
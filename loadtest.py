@@ -0,0 +1,511 @@
+"""
+Load test cho ML-app.py: chạy app ngay trong process qua httpx.ASGITransport (không cần server, lifespan của
+app vẫn chạy) hoặc bắn vào server đang chạy (--url, vd: uvicorn local).
+
+Traffic là hỗn hợp có trọng số (--mix) của các kịch bản predict, batch, evaluate, loans (CRUD hợp đồng vay)
+và login, hoặc phát lại file JSONL đã ghi (--replay, mỗi dòng một request; --record ghi traffic của lần chạy
+hiện tại theo cùng định dạng). Tải được giữ ở --concurrency request đồng thời (vòng kín), hoặc --rate request/giây
+(vòng mở, độ trễ tính từ thời điểm lẽ ra request được gửi nên không che mất thời gian xếp hàng).
+
+Báo cáo theo endpoint: throughput, p50 / p95 / p99, tỉ lệ lỗi (status >= 400 hoặc lỗi kết nối) và thời gian
+từng giai đoạn lấy từ header Server-Timing; --output lưu JSON, --compare so sánh với một lần chạy trước.
+
+    python loadtest.py --duration 30 --concurrency 16 --output results/baseline.json
+    python loadtest.py --mix predict=80,batch=20 --rate 100 --requests 5000 --compare results/baseline.json
+    python loadtest.py --url http://127.0.0.1:8000 --replay traffic.jsonl
+
+User kiểm thử (--user-prefix, mặc định loadtest_user0..N) được đăng ký nếu chưa có và giữ lại giữa các lần chạy;
+hợp đồng vay tạo ra trong lần chạy được xóa khi kết thúc.
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import uuid
+import random
+import asyncio
+import argparse
+import importlib.util
+from collections import namedtuple
+from contextlib import AsyncExitStack
+from datetime import datetime, timezone
+
+import numpy as np
+import httpx
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_APP = os.path.join(BASE_DIR, 'ML-app.py')
+DEFAULT_DATA = os.path.join(BASE_DIR, 'jupiter_notebook', 'loan_data.csv')
+DEFAULT_MIX = 'predict=60,batch=15,loans=15,evaluate=5,login=5'
+SCENARIOS = ('predict', 'batch', 'evaluate', 'loans', 'login')
+PERCENTILES = (50, 95, 99)
+
+# Kết quả một request; status 0 = lỗi kết nối / timeout (error là tên exception)
+Result = namedtuple('Result', ['endpoint', 'status', 'latency', 'timings', 'error'])
+
+
+def parse_mix(value):
+    """"predict=60,batch=15" -> {"predict": 60.0, "batch": 15.0} (kịch bản trọng số 0 bị bỏ)"""
+    mix = {}
+    for item in (value or '').split(','):
+        if not item.strip():
+            continue
+        name, _, weight = item.partition('=')
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise ValueError(f"Unknown scenario: {name}. Available scenarios: {list(SCENARIOS)}")
+        if float(weight) > 0:
+            mix[name] = float(weight)
+    if not mix:
+        raise ValueError("Traffic mix is empty")
+    return mix
+
+
+def parse_server_timing(value):
+    """"auth;dur=0.4, inference;dur=2.1" -> {"auth": 0.4, "inference": 2.1} (ms); metric không có dur bị bỏ"""
+    timings = {}
+    for metric in (value or '').split(','):
+        name, *params = metric.strip().split(';')
+        for param in params:
+            key, _, number = param.strip().partition('=')
+            if key == 'dur' and name:
+                try:
+                    timings[name] = timings.get(name, 0.0) + float(number)
+                except ValueError:
+                    pass
+    return timings
+
+
+def load_records(path, limit=None):
+    """Các dòng CSV dạng dict, cột số được đổi sang float"""
+    records = []
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            record = {}
+            for key, value in row.items():
+                try:
+                    record[key] = float(value)
+                except ValueError:
+                    record[key] = value
+            records.append(record)
+            if limit is not None and len(records) >= limit:
+                break
+    return records
+
+
+def load_replay(path):
+    """Request đã ghi (JSONL): method, path, và tùy chọn params, json, user (chỉ số user), auth, endpoint"""
+    with open(path) as f:
+        specs = [json.loads(line) for line in f if line.strip()]
+    if not specs:
+        raise ValueError(f"No requests in {path}")
+    return specs
+
+
+def load_app(path=DEFAULT_APP):
+    """Import FastAPI app từ file (tên file có dấu '-' nên không import trực tiếp được)"""
+    # Log từng request của app làm rối báo cáo và làm chậm chính app
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    sys.path.insert(0, os.path.dirname(os.path.abspath(path)))
+    spec = importlib.util.spec_from_file_location('ml_app_under_test', path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module.app
+
+
+class LoadTest:
+    """Sinh request theo mix (hoặc phát lại file), gửi qua httpx.AsyncClient và ghi lại kết quả"""
+
+    def __init__(self, client, mix=None, replay=None, records=None, users=4, user_prefix='loadtest_user',
+                 password='loadtest-password', batch_size=20, evaluate_rows=200, seed=None, record_file=None):
+        self.client = client
+        self.mix = mix or parse_mix(DEFAULT_MIX)
+        self.replay = replay
+        self.records = records or []
+        self.usernames = [f"{user_prefix}{i}" for i in range(users)]
+        self.password = password
+        self.tokens = []
+        self.batch_size = batch_size
+        self.evaluate_rows = evaluate_rows
+        self.rng = random.Random(seed)
+        self.record_file = record_file
+        self.run_id = uuid.uuid4().hex[:8]
+        self._replay_index = 0
+        self._contract_seq = 0
+        # Hợp đồng rảnh (contractNumber, user): request đang dùng một hợp đồng thì hợp đồng đó không được chọn lại
+        self._contracts = []
+        self._in_use = {}
+        if not self.replay:
+            needs_records = {'predict', 'batch', 'evaluate'} & set(self.mix)
+            if needs_records and not self.records:
+                raise ValueError("predict / batch / evaluate scenarios need loan records (--data)")
+            if not self.usernames:
+                raise ValueError("Synthetic traffic needs at least one user")
+
+    async def setup(self):
+        """Đăng ký (nếu chưa có) và đăng nhập các user kiểm thử, không tính vào kết quả"""
+        self.tokens = []
+        for username in self.usernames:
+            response = await self.client.post('/register', json={
+                'username': username, 'email': f"{username}@example.com", 'password': self.password
+            })
+            if response.status_code not in (200, 201, 400):
+                raise RuntimeError(f"Register {username} failed: {response.status_code} {response.text}")
+            response = await self.client.post('/login', json={'username': username, 'password': self.password})
+            if response.status_code != 200:
+                raise RuntimeError(f"Login {username} failed: {response.status_code} {response.text}")
+            self.tokens.append(response.json()['access_token'])
+
+    async def teardown(self):
+        """Xóa các hợp đồng vay còn lại do lần chạy tạo ra"""
+        for contract, user in self._contracts + list(self._in_use.values()):
+            await self.client.delete(f'/loans/{contract}', headers=self._auth(user))
+        self._contracts, self._in_use = [], {}
+
+    def _auth(self, user):
+        if not self.tokens:
+            return {}
+        return {'Authorization': f"Bearer {self.tokens[user % len(self.tokens)]}"}
+
+    # ---------- Sinh request ----------
+    def next_request(self):
+        if self.replay:
+            spec = self.replay[self._replay_index % len(self.replay)]
+            self._replay_index += 1
+            return spec
+        scenario = self.rng.choices(list(self.mix), weights=list(self.mix.values()))[0]
+        return getattr(self, f'_{scenario}_request')(self.rng.randrange(len(self.usernames)))
+
+    def _predict_request(self, user):
+        return {'endpoint': 'POST /predict', 'method': 'POST', 'path': '/predict', 'user': user,
+                'json': self._application(self.rng.choice(self.records))}
+
+    def _batch_request(self, user):
+        rows = [self._application(record) for record in self.rng.sample(self.records, min(self.batch_size, len(self.records)))]
+        return {'endpoint': 'POST /predict/batch', 'method': 'POST', 'path': '/predict/batch', 'user': user, 'json': rows}
+
+    def _evaluate_request(self, user):
+        rows = self.rng.sample(self.records, min(self.evaluate_rows, len(self.records)))
+        return {'endpoint': 'POST /evaluate', 'method': 'POST', 'path': '/evaluate', 'user': user, 'json': rows}
+
+    def _login_request(self, user):
+        return {'endpoint': 'POST /login', 'method': 'POST', 'path': '/login', 'auth': False,
+                'json': {'username': self.usernames[user], 'password': self.password}}
+
+    def _loans_request(self, user):
+        # Giữ số hợp đồng của lần chạy trong khoảng nhỏ: ít thì tạo thêm, nhiều thì xóa bớt
+        if not self._contracts:
+            operation = 'create'
+        elif len(self._contracts) > 50:
+            operation = 'delete'
+        else:
+            operation = self.rng.choices(['list', 'get', 'update', 'create', 'delete'], weights=[20, 30, 20, 15, 15])[0]
+        if operation == 'list':
+            return {'endpoint': 'GET /loans', 'method': 'GET', 'path': '/loans', 'user': user}
+        if operation == 'create':
+            self._contract_seq += 1
+            contract = f"LT-{self.run_id}-{self._contract_seq}"
+            return {'endpoint': 'POST /loans', 'method': 'POST', 'path': '/loans', 'user': user,
+                    'json': self._contract(contract), 'contract': contract}
+
+        contract, owner = self._contracts.pop(self.rng.randrange(len(self._contracts)))
+        self._in_use[contract] = (contract, owner)
+        method = {'get': 'GET', 'update': 'PUT', 'delete': 'DELETE'}[operation]
+        spec = {'endpoint': f"{method} /loans/{{contractNumber}}", 'method': method,
+                'path': f'/loans/{contract}', 'user': owner, 'contract': contract}
+        if operation == 'update':
+            spec['json'] = self._contract(contract, status='approved')
+        return spec
+
+    @staticmethod
+    def _application(record):
+        return {key: value for key, value in record.items() if key != 'loan_status'}
+
+    def _contract(self, contract, status='pending'):
+        return {
+            'contractNumber': contract,
+            'customerName': 'Load Test',
+            'loanAmount': round(self.rng.uniform(1000, 35000), 2),
+            'interestRate': round(self.rng.uniform(5, 20), 2),
+            'loanDuration': self.rng.choice([6, 12, 24, 36]),
+            'createdDate': datetime.now(timezone.utc).date().isoformat(),
+            'status': status,
+        }
+
+    def _release(self, spec, status):
+        """Trả hợp đồng về pool sau request (trừ khi đã xóa); hợp đồng mới tạo được đưa vào pool"""
+        contract = spec.get('contract')
+        if contract is None or self.replay:
+            return
+        if spec['method'] == 'POST':
+            if status in (200, 201):
+                self._contracts.append((contract, spec['user']))
+            return
+        entry = self._in_use.pop(contract, None)
+        if entry is not None and not (spec['method'] == 'DELETE' and status in (200, 204, 404)):
+            self._contracts.append(entry)
+
+    # ---------- Gửi request ----------
+    async def send(self, spec, started=None):
+        """Gửi một request; started (perf_counter) là thời điểm lẽ ra request được gửi (chế độ --rate)"""
+        headers = {} if spec.get('auth', True) is False else self._auth(spec.get('user', 0))
+        if self.record_file is not None:
+            self.record_file.write(json.dumps({key: value for key, value in spec.items() if key != 'contract'}) + '\n')
+        started = time.perf_counter() if started is None else started
+        try:
+            response = await self.client.request(
+                spec['method'], spec['path'], params=spec.get('params'), json=spec.get('json'), headers=headers
+            )
+        except httpx.HTTPError as e:
+            self._release(spec, 0)
+            return Result(spec.get('endpoint') or f"{spec['method']} {spec['path']}", 0, time.perf_counter() - started, None, type(e).__name__)
+        latency = time.perf_counter() - started
+        self._release(spec, response.status_code)
+        timing = response.headers.get('server-timing')
+        return Result(
+            spec.get('endpoint') or f"{spec['method']} {spec['path']}", response.status_code, latency,
+            parse_server_timing(timing) if timing else None, None
+        )
+
+    async def run(self, concurrency=8, rate=None, duration=None, requests=None):
+        """
+        Chạy tới khi hết duration giây hoặc đủ requests request; không có rate: concurrency worker gửi liên tục,
+        có rate: gửi đều rate request/giây với tối đa concurrency request đang chờ
+        """
+        if duration is None and requests is None:
+            raise ValueError("Either duration or requests is required")
+        deadline = None if duration is None else time.perf_counter() + duration
+        sent = 0
+
+        def more():
+            return (requests is None or sent < requests) and (deadline is None or time.perf_counter() < deadline)
+
+        if rate is None:
+            results = []
+
+            async def worker():
+                nonlocal sent
+                while more():
+                    sent += 1
+                    results.append(await self.send(self.next_request()))
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            return results
+
+        limit = asyncio.Semaphore(concurrency)
+
+        async def limited(spec, scheduled):
+            async with limit:
+                return await self.send(spec, started=scheduled)
+
+        tasks = []
+        start = time.perf_counter()
+        while more():
+            scheduled = start + sent / rate
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.ensure_future(limited(self.next_request(), scheduled)))
+            sent += 1
+        return list(await asyncio.gather(*tasks))
+
+
+def latency_summary(latencies):
+    values = np.asarray(latencies, dtype=float) * 1000
+    summary = {f"p{p}": round(float(np.percentile(values, p)), 3) for p in PERCENTILES}
+    summary['mean'] = round(float(values.mean()), 3)
+    summary['max'] = round(float(values.max()), 3)
+    return summary
+
+
+def summarize(results, wall_time):
+    """Thống kê toàn bộ và theo endpoint: throughput (request/giây), độ trễ ms, tỉ lệ lỗi, Server-Timing trung bình"""
+    def stats(group):
+        errors = sum(1 for r in group if r.status == 0 or r.status >= 400)
+        statuses = {}
+        for r in group:
+            key = str(r.status) if r.status else r.error
+            statuses[key] = statuses.get(key, 0) + 1
+        entry = {
+            'requests': len(group),
+            'errors': errors,
+            'error_rate': round(errors / len(group), 4),
+            'throughput_rps': round(len(group) / wall_time, 2) if wall_time > 0 else None,
+            'latency_ms': latency_summary([r.latency for r in group]),
+            'statuses': dict(sorted(statuses.items())),
+        }
+        timed = [r.timings for r in group if r.timings]
+        if timed:
+            stages = {}
+            for timings in timed:
+                for name, value in timings.items():
+                    stages.setdefault(name, []).append(value)
+            # Giai đoạn theo thứ tự xuất hiện, other / total ở cuối
+            names = [name for name in stages if name not in ('other', 'total')] + [name for name in ('other', 'total') if name in stages]
+            entry['server_timing_ms'] = {
+                name: {'mean': round(float(np.mean(stages[name])), 3), 'p95': round(float(np.percentile(stages[name], 95)), 3)}
+                for name in names
+            }
+        return entry
+
+    by_endpoint = {}
+    for r in results:
+        by_endpoint.setdefault(r.endpoint, []).append(r)
+    return {
+        'wall_time_s': round(wall_time, 3),
+        'total': stats(results) if results else {'requests': 0},
+        'endpoints': {endpoint: stats(group) for endpoint, group in sorted(by_endpoint.items())},
+    }
+
+
+def compare(baseline, current):
+    """Thay đổi throughput / p50 / p95 / p99 / tỉ lệ lỗi theo endpoint so với lần chạy trước (chỉ endpoint có ở cả hai)"""
+    rows = []
+    for endpoint in ['total'] + sorted(current.get('endpoints', {})):
+        old = baseline.get('total') if endpoint == 'total' else baseline.get('endpoints', {}).get(endpoint)
+        new = current.get('total') if endpoint == 'total' else current['endpoints'][endpoint]
+        if not old or not new or not old.get('requests') or not new.get('requests'):
+            continue
+        row = {'endpoint': endpoint}
+        pairs = [('throughput_rps', old.get('throughput_rps'), new.get('throughput_rps')),
+                 ('error_rate', old['error_rate'], new['error_rate'])]
+        pairs += [(f"p{p}_ms", old['latency_ms'][f"p{p}"], new['latency_ms'][f"p{p}"]) for p in PERCENTILES]
+        for name, before, after in pairs:
+            row[name] = {'baseline': before, 'current': after,
+                         'change_pct': round((after - before) / before * 100, 1) if before else None}
+        rows.append(row)
+    return rows
+
+
+def format_report(summary, comparison=None):
+    lines = [f"{'endpoint':<32}{'requests':>9}{'rps':>9}{'err%':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}  server-timing mean (ms)"]
+    entries = list(summary['endpoints'].items()) + [('total', summary['total'])]
+    for endpoint, entry in entries:
+        if not entry.get('requests'):
+            continue
+        latency = entry['latency_ms']
+        stages = ' '.join(f"{name}={value['mean']:.2f}" for name, value in entry.get('server_timing_ms', {}).items())
+        lines.append(
+            f"{endpoint:<32}{entry['requests']:>9}{entry['throughput_rps'] or 0:>9.1f}{entry['error_rate'] * 100:>7.1f}"
+            f"{latency['p50']:>10.2f}{latency['p95']:>10.2f}{latency['p99']:>10.2f}  {stages}"
+        )
+    if comparison:
+        lines.append('')
+        lines.append(f"{'vs baseline':<32}{'rps':>12}{'p50':>12}{'p95':>12}{'p99':>12}{'err%':>12}")
+        for row in comparison:
+            cells = []
+            for name in ('throughput_rps', 'p50_ms', 'p95_ms', 'p99_ms'):
+                change = row[name]['change_pct']
+                cells.append(f"{change:+.1f}%" if change is not None else 'n/a')
+            cells.append(f"{(row['error_rate']['current'] - row['error_rate']['baseline']) * 100:+.2f}")
+            lines.append(f"{row['endpoint']:<32}" + ''.join(f"{cell:>12}" for cell in cells))
+    return '\n'.join(lines)
+
+
+def ensure_parent(path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    return path
+
+
+async def run_load_test(args):
+    replay = load_replay(args.replay) if args.replay else None
+    mix = parse_mix(args.mix)
+    records = None
+    if not replay and {'predict', 'batch', 'evaluate'} & set(mix):
+        records = load_records(args.data, limit=args.data_rows)
+
+    async with AsyncExitStack() as stack:
+        if args.url:
+            target = args.url
+            client = httpx.AsyncClient(base_url=args.url, timeout=args.timeout)
+        else:
+            target = f"asgi:{os.path.basename(args.app)}"
+            app = load_app(args.app)
+            # ASGITransport không gửi sự kiện lifespan: tự chạy lifespan để app load mô hình, warmup...
+            await stack.enter_async_context(app.router.lifespan_context(app))
+            client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://loadtest', timeout=args.timeout)
+        await stack.enter_async_context(client)
+        record_file = stack.enter_context(open(ensure_parent(args.record), 'w')) if args.record else None
+
+        test = LoadTest(client, mix=mix, replay=replay, records=records, users=args.users, user_prefix=args.user_prefix,
+                        password=args.password, batch_size=args.batch_size, evaluate_rows=args.evaluate_rows,
+                        seed=args.seed)
+        await test.setup()
+        if args.warmup:
+            await test.run(concurrency=args.concurrency, requests=args.warmup)
+        test.record_file = record_file
+        started_at = datetime.now(timezone.utc).isoformat(timespec='seconds')
+        start = time.perf_counter()
+        results = await test.run(concurrency=args.concurrency, rate=args.rate, duration=args.duration, requests=args.requests)
+        wall_time = time.perf_counter() - start
+        test.record_file = None
+        await test.teardown()
+
+    summary = summarize(results, wall_time)
+    summary['run'] = {
+        'target': target,
+        'started_at': started_at,
+        'mix': None if replay else mix,
+        'replay': args.replay,
+        'concurrency': args.concurrency,
+        'rate': args.rate,
+        'duration_s': args.duration,
+        'requests': args.requests,
+        'warmup': args.warmup,
+        'users': args.users,
+        'batch_size': args.batch_size,
+        'evaluate_rows': args.evaluate_rows,
+        'seed': args.seed,
+    }
+    return summary
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Load test ML-app in-process (ASGI) or against a running server")
+    parser.add_argument('--url', help="Base URL of a running server (default: run the app in-process)")
+    parser.add_argument('--app', default=DEFAULT_APP, help="App file for in-process runs")
+    parser.add_argument('--mix', default=DEFAULT_MIX, help=f"Scenario weights, scenarios: {', '.join(SCENARIOS)}")
+    parser.add_argument('--replay', help="Replay recorded requests from a JSONL file instead of the mix")
+    parser.add_argument('--record', help="Write the requests sent during the run to a JSONL file (replayable)")
+    parser.add_argument('--concurrency', type=int, default=8, help="Concurrent requests (max in flight with --rate)")
+    parser.add_argument('--rate', type=float, help="Target requests per second (open loop)")
+    parser.add_argument('--duration', type=float, help="Run for this many seconds")
+    parser.add_argument('--requests', type=int, help="Stop after this many requests")
+    parser.add_argument('--warmup', type=int, default=20, help="Requests sent before measuring")
+    parser.add_argument('--users', type=int, default=4)
+    parser.add_argument('--user-prefix', default='loadtest_user')
+    parser.add_argument('--password', default='loadtest-password')
+    parser.add_argument('--data', default=DEFAULT_DATA, help="CSV of loan applications for predict / batch / evaluate")
+    parser.add_argument('--data-rows', type=int, default=5000, help="Rows read from --data")
+    parser.add_argument('--batch-size', type=int, default=20)
+    parser.add_argument('--evaluate-rows', type=int, default=200)
+    parser.add_argument('--timeout', type=float, default=30.0)
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--output', help="Save results as JSON")
+    parser.add_argument('--compare', help="Results JSON of a previous run to compare against")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.duration is None and args.requests is None:
+        args.duration = 30.0
+    summary = asyncio.run(run_load_test(args))
+
+    comparison = None
+    if args.compare:
+        with open(args.compare) as f:
+            comparison = compare(json.load(f), summary)
+        summary['comparison'] = {'baseline': args.compare, 'endpoints': comparison}
+    print(format_report(summary, comparison))
+    if args.output:
+        with open(ensure_parent(args.output), 'w') as f:
+            json.dump(summary, f, indent=2)
+        print(f"\nResults saved to {args.output}")
+    return summary
+
+
+if __name__ == '__main__':
+    main()
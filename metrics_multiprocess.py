@@ -0,0 +1,102 @@
+"""
+Metrics Prometheus khi chạy nhiều worker (uvicorn --workers / gunicorn) trong một pod.
+
+Mỗi worker ghi giá trị vào file mmap trong PROMETHEUS_MULTIPROC_DIR (prometheus_client đọc biến môi trường
+này lúc import, nên phải đặt trước khi process import prometheus_client); /metrics của worker bất kỳ
+gộp file của mọi worker: counter / histogram cộng dồn, gauge theo multiprocess_mode khai báo ở từng gauge.
+
+Dọn dẹp:
+- reset_multiprocess_dir(): process cha xóa file của lần chạy trước trước khi tạo worker.
+- cleanup_dead_workers(): worker mới khởi động gộp counter / histogram của worker đã chết vào file
+  *_archive.db (counter không bị giảm) và xóa gauge "live*" của chúng, để số file (và thời gian scrape)
+  không tăng theo số lần worker bị khởi động lại.
+Gộp file và scrape dùng chung một file lock để scrape không đọc file đang bị xóa.
+"""
+
+import os
+import glob
+import fcntl
+from contextlib import contextmanager
+
+from prometheus_client import CollectorRegistry, REGISTRY, generate_latest
+from prometheus_client.mmap_dict import MmapedDict
+from prometheus_client.multiprocess import MultiProcessCollector, mark_process_dead  # noqa: F401 (dùng lại ở ML-app.py)
+
+# Loại metric có giá trị cộng dồn được giữa các process
+ADDITIVE_TYPES = ('counter', 'histogram', 'summary')
+LOCK_FILE = '.lock'
+
+
+def multiprocess_dir():
+    """Thư mục multiprocess đang dùng, None nếu chạy một process"""
+    return os.environ.get('PROMETHEUS_MULTIPROC_DIR') or os.environ.get('prometheus_multiproc_dir')
+
+
+def pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def file_pid(path):
+    """PID trong tên file (counter_123.db, gauge_livesum_123.db), None với file archive"""
+    suffix = os.path.basename(path)[:-len('.db')].rsplit('_', 1)[-1]
+    return int(suffix) if suffix.isdigit() else None
+
+
+@contextmanager
+def directory_lock(path, exclusive=False):
+    with open(os.path.join(path, LOCK_FILE), 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def reset_multiprocess_dir(path):
+    """Tạo thư mục và xóa file .db của lần chạy trước (gọi ở process cha, trước khi tạo worker)"""
+    os.makedirs(path, exist_ok=True)
+    with directory_lock(path, exclusive=True):
+        for db_file in glob.glob(os.path.join(path, '*.db')):
+            os.remove(db_file)
+
+
+def _merge_into(source, target):
+    archive = MmapedDict(target)
+    try:
+        for key, value, timestamp, _ in MmapedDict.read_all_values_from_file(source):
+            current, _ = archive.read_value(key)
+            archive.write_value(key, current + value, timestamp)
+    finally:
+        archive.close()
+
+
+def cleanup_dead_workers(path, is_alive=pid_alive):
+    """Gộp file của các worker đã chết vào archive và xóa gauge live của chúng; trả về danh sách PID đã dọn"""
+    with directory_lock(path, exclusive=True):
+        pids = {file_pid(db_file) for db_file in glob.glob(os.path.join(path, '*.db'))}
+        dead = sorted(pid for pid in pids if pid is not None and pid != os.getpid() and not is_alive(pid))
+        for pid in dead:
+            mark_process_dead(pid, path)
+            for metric_type in ADDITIVE_TYPES:
+                source = os.path.join(path, f'{metric_type}_{pid}.db')
+                if os.path.exists(source):
+                    _merge_into(source, os.path.join(path, f'{metric_type}_archive.db'))
+                    os.remove(source)
+    return dead
+
+
+def generate_metrics():
+    """Nội dung /metrics: gộp mọi worker nếu chạy multiprocess, ngược lại registry mặc định"""
+    path = multiprocess_dir()
+    if not path:
+        return generate_latest(REGISTRY)
+    registry = CollectorRegistry()
+    MultiProcessCollector(registry, path=path)
+    with directory_lock(path):
+        return generate_latest(registry)
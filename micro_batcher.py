@@ -0,0 +1,106 @@
+"""
+Micro-batching cho các request dự đoán đơn lẻ.
+Gom các lời gọi /predict đồng thời trong một cửa sổ ngắn (vd: 2ms hoặc 64 dòng)
+thành một ma trận, chạy một lần predict rồi trả kết quả về đúng từng caller.
+"""
+
+import time
+import asyncio
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """Gom các dòng features theo mô hình và chạy predict theo lô"""
+
+    def __init__(
+        self,
+        predict_fn,
+        max_batch_size=64,
+        max_wait_ms=2.0,
+        executor=None,
+        queue_depth_gauge=None,
+        batch_size_histogram=None,
+        wait_histogram=None,
+    ):
+        # predict_fn(model_name, features_matrix[, context]) -> mảng kết quả, mỗi dòng một phần tử
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.executor = executor
+        self.queue_depth_gauge = queue_depth_gauge
+        self.batch_size_histogram = batch_size_histogram
+        self.wait_histogram = wait_histogram
+        self._pending = {}
+        self._timers = {}
+        # Event loop chỉ giữ weak reference tới task: giữ task của các lô đang chạy tới khi xong
+        self._tasks = set()
+
+    def queue_depth(self):
+        return sum(len(batch) for batch in self._pending.values())
+
+    async def submit(self, model_name, features, context=None):
+        """
+        Đưa một dòng features vào hàng đợi và chờ kết quả của riêng dòng đó
+
+        `context` (vd: snapshot mô hình) được truyền thêm cho predict_fn,
+        chỉ các dòng cùng context mới được gom chung một lô
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        # Gom theo cả số lượng features để một dòng sai kích thước không làm hỏng cả lô
+        key = (model_name, len(features), context)
+        pending = self._pending.setdefault(key, [])
+        pending.append((features, future, time.perf_counter()))
+        if self.queue_depth_gauge is not None:
+            self.queue_depth_gauge.inc()
+
+        if len(pending) >= self.max_batch_size:
+            self._flush(key)
+        elif key not in self._timers:
+            self._timers[key] = loop.call_later(self.max_wait, self._flush, key)
+
+        return await future
+
+    def _flush(self, key):
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+
+        batch = self._pending.pop(key, None)
+        if not batch:
+            return
+        if self.queue_depth_gauge is not None:
+            self.queue_depth_gauge.dec(len(batch))
+
+        task = asyncio.get_running_loop().create_task(self._run_batch(key[0], batch, key[2]))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, model_name, batch, context=None):
+        started = time.perf_counter()
+        if self.batch_size_histogram is not None:
+            self.batch_size_histogram.observe(len(batch))
+        if self.wait_histogram is not None:
+            for _, _, enqueued_at in batch:
+                self.wait_histogram.observe(started - enqueued_at)
+
+        try:
+            features_matrix = np.array([features for features, _, _ in batch], dtype=float)
+            loop = asyncio.get_running_loop()
+            args = (model_name, features_matrix) if context is None else (model_name, features_matrix, context)
+            predictions = await loop.run_in_executor(self.executor, self.predict_fn, *args)
+            predictions = np.asarray(predictions).tolist()
+        except Exception as e:
+            logger.error("Batch prediction with %s failed for %s rows: %s", model_name, len(batch), e)
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future, _), prediction in zip(batch, predictions):
+            if not future.done():
+                future.set_result(prediction)
@@ -0,0 +1,355 @@
+"""
+Registry quản lý các mô hình ML trong bộ nhớ của process.
+Mỗi artifact chỉ được load một lần (lazily, khi được dùng lần đầu), các handler lấy mô hình theo tên.
+Artifact dạng joblib không nén được mmap read-only, mô hình XGBoost ưu tiên file UBJ gốc.
+
+Các mô hình được gom thành một snapshot (thế hệ). Khi reload, snapshot mới được
+load và warmup ở background rồi thay thế snapshot cũ trong một phép gán duy nhất;
+request đang chạy vẫn giữ tham chiếu tới snapshot cũ nên hoàn thành trên phiên bản cũ.
+"""
+
+import os
+import time
+import hashlib
+import logging
+import threading
+
+from preprocessing import load_preprocessors
+
+logger = logging.getLogger(__name__)
+
+MODEL_DIR = "jupiter_notebook"
+
+# Tên mô hình -> file artifact trong MODEL_DIR (tuple: dùng file đầu tiên tồn tại)
+DEFAULT_ARTIFACTS = {
+    'model_ml': ('model_ml.ubj', 'model_ml.joblib'),
+    'xgboost': ('model_xgboost.ubj', 'model_xgboost.joblib'),
+    'random_forest': 'model_random_forest.joblib',
+    'logistic_regression': 'model_logistic_regression.joblib',
+    'scaler_lr': 'scaler_logistic_regression.joblib',
+    'preprocessors': 'preprocessor.json',
+}
+
+
+def _load_joblib(path):
+    # Import khi load lần đầu: unpickle mô hình kéo theo xgboost / scikit-learn / pandas
+    import joblib
+
+    # Mảng numpy trong file không nén được map read-only thay vì copy vào heap
+    return joblib.load(path, mmap_mode='r')
+
+
+def _load_xgboost(path):
+    from xgboost import XGBClassifier
+    model = XGBClassifier()
+    model.load_model(path)
+    return model
+
+
+# Đuôi file -> hàm load artifact
+LOADERS = {
+    '.joblib': _load_joblib,
+    '.ubj': _load_xgboost,
+    '.json': load_preprocessors,
+}
+
+
+def _current_rss_bytes():
+    """Đọc RSS hiện tại của process (chỉ hỗ trợ Linux, trả về None nếu không đọc được)"""
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _file_version(path):
+    """Phiên bản của artifact = hash nội dung file (đổi khi mô hình được train lại)"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
+def _file_signature(path):
+    """(mtime, size) của file, None nếu file không tồn tại"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+class ModelSnapshot:
+    """Một thế hệ mô hình đã load, được thay thế nguyên khối khi reload"""
+
+    def __init__(self, generation):
+        self.generation = generation
+        self.created_at = time.time()
+        self.models = {}
+        self.info = {}
+        # Scorer đã biên dịch của các mô hình trong snapshot (tạo bởi service khi warmup)
+        self.compiled = {}
+
+    def version(self, name):
+        return self.info[name]['version']
+
+    def summary(self):
+        return {
+            'generation': self.generation,
+            'created_at': self.created_at,
+            'versions': {name: info['version'] for name, info in self.info.items() if info.get('loaded')},
+        }
+
+
+class ModelRegistry:
+    """Giữ các mô hình đã load trong bộ nhớ, kèm thời gian load và bộ nhớ tiêu tốn"""
+
+    def __init__(self, model_dir=MODEL_DIR, artifacts=None, on_load=None):
+        self.model_dir = model_dir
+        self.artifacts = dict(artifacts or DEFAULT_ARTIFACTS)
+        # on_load(info) được gọi sau mỗi lần load artifact từ đĩa (vd: cập nhật metrics)
+        self.on_load = on_load
+        self._active = ModelSnapshot(generation=1)
+        self._previous = None
+        self._generation = 1
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+
+    def path_for(self, name):
+        if name not in self.artifacts:
+            raise KeyError(f"Unknown model: {name}")
+        candidates = self.artifacts[name]
+        if isinstance(candidates, str):
+            candidates = (candidates,)
+        paths = [os.path.join(self.model_dir, candidate) for candidate in candidates]
+        return next((path for path in paths if os.path.exists(path)), paths[-1])
+
+    def _load_artifact(self, name, reuse_from=None):
+        """Load một artifact từ đĩa; dùng lại object của snapshot cũ nếu nội dung file không đổi"""
+        path = self.path_for(name)
+        signature = _file_signature(path)
+        version = _file_version(path)
+        if reuse_from is not None and name in reuse_from.models and reuse_from.version(name) == version:
+            info = dict(reuse_from.info[name], signature=signature)
+            return reuse_from.models[name], info
+
+        loader = LOADERS[os.path.splitext(path)[1]]
+        rss_before = _current_rss_bytes()
+        start = time.perf_counter()
+        model = loader(path)
+        load_time = time.perf_counter() - start
+        rss_after = _current_rss_bytes()
+
+        memory_bytes = None
+        if rss_before is not None and rss_after is not None:
+            memory_bytes = max(rss_after - rss_before, 0)
+
+        info = {
+            'name': name,
+            'path': path,
+            'loaded': True,
+            'type': type(model).__name__,
+            'format': os.path.splitext(path)[1].lstrip('.'),
+            'version': version,
+            'signature': signature,
+            'load_time_ms': load_time * 1000,
+            'memory_bytes': memory_bytes,
+            'file_size_bytes': os.path.getsize(path),
+            'loaded_at': time.time(),
+        }
+        logger.info("✓ Loaded %s (%s) from %s in %.1fms", name, version, path, load_time * 1000)
+        if self.on_load is not None:
+            self.on_load(info)
+        return model, info
+
+    def _load_into(self, snapshot, name):
+        with self._lock:
+            if name in snapshot.models:
+                return snapshot.models[name]
+            try:
+                model, info = self._load_artifact(name)
+            except Exception as e:
+                snapshot.info[name] = {
+                    'name': name,
+                    'path': self.path_for(name),
+                    'loaded': False,
+                    'signature': _file_signature(self.path_for(name)),
+                    'error': str(e),
+                }
+                raise
+            snapshot.models[name] = model
+            snapshot.info[name] = info
+            return model
+
+    def load(self, name):
+        """Load một artifact vào snapshot hiện tại (chỉ gọi lúc startup hoặc khi chưa có trong bộ nhớ)"""
+        return self._load_into(self._active, name)
+
+    def load_all(self, names=None):
+        """Load các artifact (mặc định tất cả), trả về dict tên -> load thành công hay không"""
+        status = {}
+        for name in names or self.artifacts:
+            try:
+                self.load(name)
+                status[name] = True
+            except Exception as e:
+                logger.error("Error loading %s: %s", name, e)
+                status[name] = False
+        return status
+
+    def snapshot(self):
+        """Snapshot đang phục vụ; request nên lấy một lần và dùng suốt quá trình xử lý"""
+        return self._active
+
+    def get(self, name, snapshot=None):
+        """Lấy mô hình từ bộ nhớ, load lazily nếu startup chưa load được"""
+        snapshot = snapshot or self._active
+        model = snapshot.models.get(name)
+        if model is None:
+            model = self._load_into(snapshot, name)
+        return model
+
+    def version(self, name, snapshot=None):
+        """Phiên bản của mô hình đang nằm trong bộ nhớ (hoặc đã được hoãn load)"""
+        snapshot = snapshot or self._active
+        if name not in snapshot.models and not snapshot.info.get(name, {}).get('deferred'):
+            self.get(name, snapshot)
+        return snapshot.version(name)
+
+    def artifact_version(self, name):
+        """Phiên bản của file artifact trên đĩa, không load mô hình"""
+        return _file_version(self.path_for(name))
+
+    def recorded_version(self, name, snapshot=None):
+        """
+        Phiên bản của mô hình trong snapshot mà không load: phiên bản đã ghi nhận (đã load / hoãn load),
+        chưa có thì hash file artifact; None nếu file không tồn tại
+        """
+        snapshot = snapshot or self._active
+        version = snapshot.info.get(name, {}).get('version')
+        if version is not None:
+            return version
+        try:
+            return self.artifact_version(name)
+        except FileNotFoundError:
+            return None
+
+    def defer(self, name, version=None):
+        """
+        Ghi nhận artifact vào snapshot hiện tại mà chưa load (vd: đã có scorer biên dịch sẵn),
+        mô hình gốc được load lazily ở lần get đầu tiên
+        """
+        path = self.path_for(name)
+        with self._lock:
+            if name in self._active.models:
+                return
+            self._active.info[name] = {
+                'name': name,
+                'path': path,
+                'loaded': False,
+                'deferred': True,
+                'format': os.path.splitext(path)[1].lstrip('.'),
+                'version': version or _file_version(path),
+                'signature': _file_signature(path),
+                'file_size_bytes': os.path.getsize(path),
+            }
+
+    def is_loaded(self, name):
+        return name in self._active.models
+
+    def names(self):
+        return list(self.artifacts)
+
+    def artifacts_changed(self):
+        """So sánh (mtime, size) các file artifact đã load với snapshot hiện tại"""
+        for name, info in list(self._active.info.items()):
+            if _file_signature(self.path_for(name)) != info.get('signature'):
+                return True
+        return False
+
+    def reload(self, warmup=None):
+        """
+        Load lại toàn bộ artifact vào snapshot mới, warmup rồi thay snapshot đang phục vụ
+
+        Artifact không đổi nội dung được dùng lại, không load lại; artifact chưa từng được dùng
+        vẫn được load lazily ở snapshot mới, artifact đang hoãn load (defer) vẫn hoãn cùng scorer của nó.
+        Nếu load hoặc warmup lỗi, snapshot hiện tại được giữ nguyên và exception được ném ra.
+        """
+        with self._reload_lock:
+            current = self._active
+            candidate = ModelSnapshot(generation=self._generation + 1)
+            for name in list(current.info):
+                if self._carry_deferred(name, current, candidate):
+                    continue
+                try:
+                    model, info = self._load_artifact(name, reuse_from=current)
+                except FileNotFoundError:
+                    if name in current.models:
+                        raise
+                    # Artifact chưa từng tồn tại (vd: chưa train random forest) thì bỏ qua
+                    candidate.info[name] = {
+                        'name': name,
+                        'path': self.path_for(name),
+                        'loaded': False,
+                        'signature': None,
+                        'error': 'Artifact not found',
+                    }
+                    continue
+                candidate.models[name] = model
+                candidate.info[name] = info
+
+            if warmup is not None:
+                warmup(candidate)
+
+            with self._lock:
+                self._generation = candidate.generation
+                self._previous = current
+                self._active = candidate
+            logger.info("Swapped model snapshot: generation %s -> %s", current.generation, candidate.generation)
+            return candidate
+
+    def _carry_deferred(self, name, current, candidate):
+        """Artifact đang hoãn load mà file không đổi: chuyển sang snapshot mới kèm scorer đã biên dịch, vẫn chưa load"""
+        info = current.info[name]
+        if not info.get('deferred') or name in current.models:
+            return False
+        path = self.path_for(name)
+        try:
+            if _file_version(path) != info['version']:
+                return False
+        except FileNotFoundError:
+            return False
+        candidate.info[name] = dict(info, path=path, signature=_file_signature(path))
+        if name in current.compiled:
+            candidate.compiled[name] = current.compiled[name]
+        return True
+
+    def rollback(self):
+        """Quay lại snapshot trước đó (vẫn được giữ trong bộ nhớ)"""
+        with self._reload_lock, self._lock:
+            if self._previous is None:
+                raise ValueError("No previous model snapshot to roll back to")
+            self._active, self._previous = self._previous, self._active
+            logger.info("Rolled back model snapshot: generation %s -> %s", self._previous.generation, self._active.generation)
+            return self._active
+
+    def generations(self):
+        return {
+            'active': self._active.summary(),
+            'previous': self._previous.summary() if self._previous is not None else None,
+        }
+
+    def stats(self):
+        """Thông tin load time / memory của từng mô hình"""
+        return [
+            self._active.info.get(name, {'name': name, 'path': self.path_for(name), 'loaded': False})
+            for name in self.artifacts
+        ]
+
+    def clear(self):
+        with self._lock:
+            self._active = ModelSnapshot(generation=self._generation)
+            self._previous = None
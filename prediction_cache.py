@@ -0,0 +1,153 @@
+"""
+Cache kết quả dự đoán trong bộ nhớ (LRU + TTL, giới hạn số entry và dung lượng).
+Key là fingerprint của (tên mô hình, phiên bản mô hình, vector features),
+nên khi mô hình đổi phiên bản các kết quả cũ không bao giờ được dùng lại. Entry của phiên bản cũ
+không bị xóa ngay (request còn chạy trên snapshot cũ trong lúc hot reload vẫn dùng được) mà tự hết hạn
+theo LRU / TTL.
+"""
+
+import sys
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Ước lượng overhead của một entry trong OrderedDict (node + tuple)
+ENTRY_OVERHEAD_BYTES = 160
+
+MISSING = object()
+
+
+class PredictionCache:
+    """Cache LRU có TTL cho kết quả dự đoán theo từng dòng features"""
+
+    def __init__(
+        self,
+        max_entries=100000,
+        ttl_seconds=600,
+        max_bytes=64 * 1024 * 1024,
+        hit_counter=None,
+        miss_counter=None,
+        eviction_counter=None,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.hit_counter = hit_counter
+        self.miss_counter = miss_counter
+        self.eviction_counter = eviction_counter
+        # key -> (model_name, value, expires_at, size_bytes)
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def fingerprint(model_name, version, features_matrix):
+        """Hash ổn định cho từng dòng của ma trận features"""
+        prefix = f"{model_name}:{version}:".encode()
+        # + 0.0 để -0.0 và 0.0 cho cùng một key
+        rows = np.ascontiguousarray(np.asarray(features_matrix, dtype=np.float64) + 0.0)
+        return [hashlib.blake2b(prefix + row.tobytes(), digest_size=16).digest() for row in rows]
+
+    def _evict(self, key, reason):
+        _, _, _, size = self._entries.pop(key)
+        self._bytes -= size
+        self._evictions += 1
+        if self.eviction_counter is not None:
+            self.eviction_counter.labels(reason=reason).inc()
+
+    def lookup(self, model_name, version, features_matrix):
+        """Trả về (keys, values), dòng chưa có trong cache có value là MISSING"""
+        keys = self.fingerprint(model_name, version, features_matrix)
+        values = []
+        now = time.monotonic()
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and entry[2] < now:
+                    self._evict(key, 'ttl')
+                    entry = None
+                if entry is None:
+                    values.append(MISSING)
+                else:
+                    self._entries.move_to_end(key)
+                    values.append(entry[1])
+            hits = sum(1 for value in values if value is not MISSING)
+            self._hits += hits
+            self._misses += len(values) - hits
+
+        if self.hit_counter is not None and hits:
+            self.hit_counter.inc(hits)
+        if self.miss_counter is not None and len(values) > hits:
+            self.miss_counter.inc(len(values) - hits)
+        return keys, values
+
+    def store(self, model_name, keys, values):
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            for key, value in zip(keys, values):
+                if key in self._entries:
+                    self._evict(key, 'replaced')
+                size = sys.getsizeof(key) + sys.getsizeof(value) + ENTRY_OVERHEAD_BYTES
+                self._entries[key] = (model_name, value, expires_at, size)
+                self._bytes += size
+
+            # LRU: entry ít dùng nhất nằm ở đầu OrderedDict
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                oldest = next(iter(self._entries))
+                self._evict(oldest, 'capacity')
+
+    def predict(self, model_name, version, features_matrix, predict_fn):
+        """
+        Dự đoán qua cache: dòng trùng nhau trong batch chỉ tính một lần,
+        dòng đã có trong cache không chạy lại mô hình
+        """
+        features_matrix = np.asarray(features_matrix, dtype=np.float64)
+        if len(features_matrix) == 0:
+            return []
+        unique_rows, inverse = np.unique(features_matrix, axis=0, return_inverse=True)
+        keys, values = self.lookup(model_name, version, unique_rows)
+
+        miss_idx = [i for i, value in enumerate(values) if value is MISSING]
+        if miss_idx:
+            predictions = np.asarray(predict_fn(model_name, unique_rows[miss_idx])).tolist()
+            for i, prediction in zip(miss_idx, predictions):
+                values[i] = prediction
+            self.store(model_name, [keys[i] for i in miss_idx], predictions)
+
+        return [values[i] for i in inverse.reshape(-1)]
+
+    def _invalidate_locked(self, model_name):
+        stale = [key for key, entry in self._entries.items() if entry[0] == model_name]
+        for key in stale:
+            self._evict(key, 'invalidated')
+        return len(stale)
+
+    def invalidate(self, model_name=None):
+        """Xóa entry của một mô hình, hoặc toàn bộ cache nếu model_name là None"""
+        with self._lock:
+            if model_name is not None:
+                return self._invalidate_locked(model_name)
+            flushed = len(self._entries)
+            self._entries.clear()
+            self._bytes = 0
+            return flushed
+
+    def stats(self):
+        return {
+            'entries': len(self._entries),
+            'bytes': self._bytes,
+            'max_entries': self.max_entries,
+            'max_bytes': self.max_bytes,
+            'ttl_seconds': self.ttl_seconds,
+            'hits': self._hits,
+            'misses': self._misses,
+            'evictions': self._evictions,
+        }
@@ -0,0 +1,258 @@
+"""
+Tiền xử lý features phía server cho hồ sơ vay thô.
+Mã hóa categorical và chuẩn hóa numeric cho cả batch trong một lượt NumPy,
+các thống kê (mean, scale, giá trị fill, từ điển category) lấy từ dữ liệu huấn luyện.
+
+Từ điển category được đóng băng lúc huấn luyện (preprocessor.json) và dùng cho cả training lẫn
+serving, nên mã của một category không phụ thuộc thứ tự xuất hiện trong dữ liệu được gửi lên.
+"""
+
+import json
+import logging
+from itertools import repeat
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+PREPROCESSOR_PATH = "jupiter_notebook/preprocessor.json"
+
+FEATURE_COLS = [
+    'person_age', 'person_gender', 'person_education', 'person_income',
+    'person_emp_exp', 'person_home_ownership', 'loan_amnt', 'loan_intent',
+    'loan_int_rate', 'loan_percent_income', 'cb_person_cred_hist_length',
+    'credit_score', 'previous_loan_defaults_on_file'
+]
+
+CATEGORICAL_COLS = [
+    'person_gender', 'person_education', 'person_home_ownership',
+    'loan_intent', 'previous_loan_defaults_on_file'
+]
+
+NUMERIC_COLS = [col for col in FEATURE_COLS if col not in CATEGORICAL_COLS]
+
+# Các cách viết khác (tiếng Việt, form UI) được quy về category gốc
+CATEGORY_ALIASES = {
+    'person_gender': {'nu': 'female', 'nữ': 'female', 'nam': 'male'},
+    'previous_loan_defaults_on_file': {'khong': 'no', 'không': 'no', 'co': 'yes', 'có': 'yes'},
+    'loan_intent': {'debt': 'debtconsolidation', 'home': 'homeimprovement'},
+}
+
+_MISSING = {'', 'none', 'nan', 'null'}
+
+# Mã của category không có trong từ điển (dòng đó được báo lỗi, không đưa vào mô hình)
+UNKNOWN_CODE = -1
+
+# Mô hình -> bộ tiền xử lý tương ứng trong preprocessor.json
+# model_ml được huấn luyện trong notebook (LabelEncoder + StandardScaler),
+# các mô hình so sánh được huấn luyện bởi train_models.py (factorize, không chuẩn hóa)
+MODEL_PREPROCESSORS = {
+    'model_ml': 'model_ml',
+    'xgboost': 'comparison',
+    'random_forest': 'comparison',
+    'logistic_regression': 'comparison',
+}
+
+
+def normalize_category(value):
+    return str(value).strip().lower()
+
+
+class FeaturePreprocessor:
+    """Biến đổi hồ sơ thô thành ma trận features theo đúng thứ tự FEATURE_COLS"""
+
+    def __init__(self, fill_values, vocabularies, means=None, scales=None):
+        self.fill_values = dict(fill_values)
+        self.vocabularies = {col: list(vocab) for col, vocab in vocabularies.items()}
+        self.means = dict(means or {})
+        self.scales = dict(scales or {})
+
+        # Tính sẵn các mảng dùng khi transform
+        self._numeric_idx = np.array([FEATURE_COLS.index(col) for col in NUMERIC_COLS])
+        self._mean = np.array([self.means.get(col, 0.0) for col in NUMERIC_COLS], dtype=float)
+        self._scale = np.array([self.scales.get(col, 1.0) or 1.0 for col in NUMERIC_COLS], dtype=float)
+        self._lookup = {
+            col: {category: code for code, category in enumerate(vocab)}
+            for col, vocab in self.vocabularies.items()
+        }
+        self._tables = {col: self._lookup_table(col) for col in self.vocabularies}
+
+    @classmethod
+    def fit(cls, df, sort_categories=False, standardize=False):
+        """Tính thống kê từ DataFrame huấn luyện (chỉ dùng lúc training)"""
+        fill_values = {}
+        vocabularies = {}
+        means = {}
+        scales = {}
+        for col in NUMERIC_COLS:
+            fill_values[col] = float(df[col].mean())
+            if standardize:
+                # Giống StandardScaler: độ lệch chuẩn với ddof=0
+                means[col] = float(df[col].mean())
+                scales[col] = float(df[col].std(ddof=0)) or 1.0
+        for col in CATEGORICAL_COLS:
+            mode = df[col].mode()
+            fill_values[col] = normalize_category(mode.iloc[0]) if len(mode) > 0 else 'unknown'
+            # Fill NaN trước khi lấy category giống prepare_data
+            values = df[col].map(normalize_category, na_action='ignore').fillna(fill_values[col])
+            # sort_categories=True giống LabelEncoder, False giống pd.factorize (thứ tự xuất hiện)
+            uniques = list(dict.fromkeys(values.tolist()))
+            vocabularies[col] = sorted(uniques) if sort_categories else uniques
+        return cls(fill_values, vocabularies, means, scales)
+
+    def to_dict(self):
+        return {
+            'fill_values': self.fill_values,
+            'vocabularies': self.vocabularies,
+            'unknown_code': UNKNOWN_CODE,
+            'means': self.means,
+            'scales': self.scales,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['fill_values'], data['vocabularies'], data.get('means'), data.get('scales'))
+
+    def _lookup_table(self, col):
+        """
+        Bảng tra (khóa đã sắp xếp, mã, dict khóa -> mã) của một cột categorical: category, alias,
+        ô trống và mã số viết sẵn, mỗi khóa kèm các kiểu viết hoa / thường hay gặp
+        """
+        lookup = self._lookup[col]
+        spellings = {}
+
+        def add(text, code):
+            for spelling in (text, text.upper(), text.title(), text.capitalize()):
+                spellings.setdefault(spelling, code)
+
+        for category, code in lookup.items():
+            add(category, code)
+        for alias, category in CATEGORY_ALIASES.get(col, {}).items():
+            if category in lookup:
+                add(alias, lookup[category])
+        fill_code = lookup.get(self.fill_values[col], 0)
+        for token in _MISSING | {'NaN'}:
+            add(token, fill_code)
+        for code in range(len(lookup)):
+            add(str(code), code)
+            add(f"{code}.0", code)
+
+        keys = np.array(sorted(spellings))
+        return keys, np.array([spellings[key] for key in keys], dtype=float), {key: float(code) for key, code in spellings.items()}
+
+    def _resolve_category(self, col, value):
+        """Mã của một giá trị không có sẵn trong bảng tra (chuẩn hóa đầy đủ), UNKNOWN_CODE nếu không nhận ra"""
+        lookup = self._lookup[col]
+        category = normalize_category(value)
+        if category in _MISSING:
+            return lookup.get(self.fill_values[col], 0)
+        category = CATEGORY_ALIASES.get(col, {}).get(category, category)
+        if category in lookup:
+            return lookup[category]
+        # Cho phép gửi thẳng mã số (tương thích với file Excel đã mã hóa sẵn)
+        try:
+            code = float(category)
+        except ValueError:
+            return UNKNOWN_CODE
+        return code if code in range(len(lookup)) else UNKNOWN_CODE
+
+    def _encode_categorical(self, col, values, n_rows, row_errors):
+        """Mã hóa một cột categorical bằng bảng tra trong một lượt, chỉ giá trị lạ mới chuẩn hóa từng cái"""
+        keys, table_codes, table = self._tables[col]
+        if isinstance(values, np.ndarray) and values.dtype.kind not in 'UO':
+            values = values.astype(str)
+        if isinstance(values, np.ndarray) and values.dtype.kind == 'U':
+            # Mảng chuỗi NumPy (.npy, Arrow): searchsorted trên các khóa đã sắp xếp
+            raw = values.reshape(-1)
+            idx = np.searchsorted(keys, raw)
+            idx[idx == len(keys)] = 0
+            codes = np.where(keys[idx] == raw, table_codes[idx], np.nan)
+        else:
+            # Cột object / list (JSON, CSV): tra dict trong một lượt map
+            codes = np.array(list(map(table.get, values, repeat(np.nan))), dtype=float)
+
+        misses = np.flatnonzero(np.isnan(codes))
+        if len(misses):
+            unmatched = np.asarray(values, dtype=object).reshape(-1)[misses].astype(str)
+            uniques, inverse = np.unique(unmatched, return_inverse=True)
+            resolved = np.array([self._resolve_category(col, value) for value in uniques.tolist()], dtype=float)
+            codes[misses] = resolved[inverse.reshape(-1)]
+            for row in misses[codes[misses] == UNKNOWN_CODE].tolist():
+                row_errors.setdefault(row, f"Unknown value for {col}: {values[row]}")
+        return codes
+
+    def _to_numeric(self, col, values, n_rows, row_errors):
+        try:
+            column = np.asarray(values, dtype=float)
+        except (TypeError, ValueError):
+            # Có ô không phải số: parse từng phần tử, ô trống được fill, ô sai định dạng báo lỗi
+            column = np.empty(n_rows, dtype=float)
+            for row, value in enumerate(values):
+                if value is None or normalize_category(value) in _MISSING:
+                    column[row] = np.nan
+                    continue
+                try:
+                    column[row] = float(value)
+                except (TypeError, ValueError):
+                    column[row] = np.nan
+                    row_errors.setdefault(row, f"Invalid number for {col}: {value}")
+        return np.where(np.isnan(column), self.fill_values[col], column)
+
+    def transform_columns(self, columns, n_rows=None):
+        """
+        Biến đổi dữ liệu dạng cột {tên cột: danh sách giá trị} thành ma trận (n_rows, 13)
+
+        Trả về (ma trận, {chỉ số dòng: lỗi}); cột bị thiếu được fill bằng giá trị huấn luyện
+        """
+        if n_rows is None:
+            n_rows = len(next(iter(columns.values()))) if columns else 0
+
+        row_errors = {}
+        features_matrix = np.empty((n_rows, len(FEATURE_COLS)), dtype=float)
+        for j, col in enumerate(FEATURE_COLS):
+            values = columns.get(col)
+            if values is None:
+                values = [None] * n_rows
+            if col in self._lookup:
+                features_matrix[:, j] = self._encode_categorical(col, values, n_rows, row_errors)
+            else:
+                features_matrix[:, j] = self._to_numeric(col, values, n_rows, row_errors)
+
+        # Chuẩn hóa tất cả cột numeric trong một phép tính
+        features_matrix[:, self._numeric_idx] = (features_matrix[:, self._numeric_idx] - self._mean) / self._scale
+        return features_matrix, row_errors
+
+    def transform_records(self, records):
+        """Biến đổi danh sách hồ sơ (dict), tên cột không phân biệt hoa thường"""
+        columns = {col: [None] * len(records) for col in FEATURE_COLS}
+        for row, record in enumerate(records):
+            for key, value in record.items():
+                col = key.strip().lower()
+                if col in columns:
+                    columns[col][row] = value
+        return self.transform_columns(columns, n_rows=len(records))
+
+    def synthetic_columns(self, n_rows, seed=0):
+        """Sinh hồ sơ giả quanh giá trị huấn luyện (dùng để warmup mô hình trước khi phục vụ)"""
+        rng = np.random.default_rng(seed)
+        columns = {}
+        for col in NUMERIC_COLS:
+            columns[col] = self.fill_values[col] * rng.uniform(0.5, 1.5, n_rows)
+        for col, vocab in self.vocabularies.items():
+            columns[col] = [vocab[i] for i in rng.integers(0, len(vocab), n_rows)]
+        return columns
+
+    def inverse_numeric(self, features_matrix, col):
+        """Lấy lại giá trị gốc của một cột numeric từ ma trận đã chuẩn hóa"""
+        j = FEATURE_COLS.index(col)
+        return features_matrix[:, j] * self.scales.get(col, 1.0) + self.means.get(col, 0.0)
+
+
+def save_preprocessors(preprocessors, path=PREPROCESSOR_PATH):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({name: p.to_dict() for name, p in preprocessors.items()}, f, indent=2, ensure_ascii=False)
+
+
+def load_preprocessors(path=PREPROCESSOR_PATH):
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    return {name: FeaturePreprocessor.from_dict(spec) for name, spec in data.items()}
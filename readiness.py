@@ -0,0 +1,46 @@
+"""
+Trạng thái sẵn sàng của service theo từng dependency (mô hình, warmup, database...) cho probe /readyz.
+
+/livez chỉ cho biết process còn chạy; /readyz chỉ thành công khi mọi dependency đã sẵn sàng,
+để Kubernetes chỉ đưa traffic tới pod đã load và warmup xong. Kết quả probe chủ động
+(vd: ping DB) được giữ trong ttl giây để probe dày không dội tải xuống dependency.
+"""
+
+import time
+import threading
+
+
+class ReadinessState:
+    """Trạng thái sẵn sàng của từng dependency, an toàn khi gọi từ nhiều thread"""
+
+    def __init__(self, dependencies):
+        self._lock = threading.Lock()
+        self._state = {name: {'ready': False, 'detail': 'not checked yet', 'checked_at': None} for name in dependencies}
+
+    def mark(self, name, ready, detail=None):
+        with self._lock:
+            self._state[name] = {'ready': bool(ready), 'detail': detail, 'checked_at': time.time()}
+
+    def check(self, name, probe, ttl=0):
+        """Chạy probe() (lỗi = chưa sẵn sàng) nếu kết quả lần trước đã cũ hơn ttl giây; trả về trạng thái"""
+        with self._lock:
+            current = self._state.get(name)
+            if current is not None and current['checked_at'] is not None and time.time() - current['checked_at'] < ttl:
+                return current['ready']
+        try:
+            probe()
+        except Exception as e:
+            self.mark(name, False, f"{type(e).__name__}: {e}")
+            return False
+        self.mark(name, True)
+        return True
+
+    def is_ready(self):
+        with self._lock:
+            return all(state['ready'] for state in self._state.values())
+
+    def report(self):
+        with self._lock:
+            dependencies = {name: dict(state) for name, state in self._state.items()}
+        ready = all(state['ready'] for state in dependencies.values())
+        return {'status': 'ready' if ready else 'not_ready', 'dependencies': dependencies}
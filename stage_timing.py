@@ -0,0 +1,171 @@
+"""
+Thời gian từng giai đoạn của request (auth, parse, preprocess, inference, serialize) cho histogram theo `stage`
+và header Server-Timing (hiển thị trong devtools của trình duyệt và load tester).
+
+- ServerTimingMiddleware tạo một StageTimer cho mỗi request HTTP (contextvar); code xử lý request bọc
+  từng giai đoạn bằng `with stage("auth"): ...`. Ngoài request (job nền, startup) stage() không ghi gì.
+- Phần thời gian không thuộc giai đoạn nào (routing, validate pydantic, middleware...) là `other`,
+  toàn bộ tới lúc gửi header response là `total`. Histogram ghi đúng các giá trị trong header: giai đoạn
+  chạy sau khi header đã gửi (body của StreamingResponse) không được tính.
+- Hàm chạy trên executor (thread khác) dùng bind() để ghi vào timer của request đã gửi nó.
+- Chỉ có perf_counter() và list.append trên đường xử lý request (~1µs mỗi giai đoạn); histogram được ghi
+  sau khi response đã gửi.
+"""
+
+from time import perf_counter
+from contextvars import ContextVar
+
+from fastapi.routing import APIRoute
+from fastapi.responses import JSONResponse
+
+# StageTimer của request đang xử lý; None = ngoài request
+_current_timer = ContextVar('stage_timer', default=None)
+
+
+class StageTimer:
+    """Các giai đoạn (tên, giây) của một request, theo thứ tự ghi"""
+
+    __slots__ = ('start', 'stages')
+
+    def __init__(self):
+        self.start = perf_counter()
+        self.stages = []
+
+    def add(self, name, seconds):
+        self.stages.append((name, seconds))
+
+    def totals(self, elapsed=None):
+        """{stage: giây} cộng dồn theo tên; có elapsed thì thêm `other` (phần chưa được đo)"""
+        totals = {}
+        for name, seconds in self.stages:
+            totals[name] = totals.get(name, 0.0) + seconds
+        if elapsed is not None:
+            totals['other'] = max(elapsed - sum(totals.values()), 0.0)
+        return totals
+
+
+def server_timing_header(totals, elapsed):
+    """Giá trị header Server-Timing (ms): "auth;dur=0.412, ..., other;dur=0.150, total;dur=2.310" """
+    metrics = ['%s;dur=%.3f' % (name, seconds * 1000) for name, seconds in totals.items()]
+    metrics.append('total;dur=%.3f' % (elapsed * 1000))
+    return ', '.join(metrics)
+
+
+class stage:
+    """`with stage("inference"): ...` ghi thời gian khối lệnh vào timer của request hiện tại"""
+
+    __slots__ = ('name', 'timer', 'start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.timer = _current_timer.get()
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.timer is not None:
+            self.timer.stages.append((self.name, perf_counter() - self.start))
+        return False
+
+
+def record(name, seconds):
+    """Ghi một giai đoạn đã đo sẵn vào timer của request hiện tại"""
+    timer = _current_timer.get()
+    if timer is not None:
+        timer.add(name, seconds)
+
+
+def bind(fn):
+    """fn chạy trên thread khác (executor) ghi giai đoạn vào timer của request đang gọi bind()"""
+    timer = _current_timer.get()
+    if timer is None:
+        return fn
+
+    def bound(*args, **kwargs):
+        token = _current_timer.set(timer)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _current_timer.reset(token)
+    return bound
+
+
+class TimedRoute(APIRoute):
+    """APIRoute đo giai đoạn `parse` (đọc body + json.loads); FastAPI dùng lại kết quả đã parse của Request"""
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        if self.body_field is None:
+            return handler
+
+        async def timed_handler(request):
+            content_type = request.headers.get('content-type', '')
+            if content_type.startswith('application/json') or '+json' in content_type:
+                with stage('parse'):
+                    try:
+                        await request.json()
+                    except ValueError:
+                        # Body không phải JSON hợp lệ: FastAPI parse lại và trả lỗi 422 như cũ
+                        pass
+            return await handler(request)
+        return timed_handler
+
+
+class TimedJSONResponse(JSONResponse):
+    """JSONResponse đo giai đoạn `serialize` (json.dumps nội dung response)"""
+
+    def render(self, content):
+        with stage('serialize'):
+            return super().render(content)
+
+
+class ServerTimingMiddleware:
+    """
+    ASGI middleware: tạo StageTimer cho mỗi request, thêm header Server-Timing vào response và ghi
+    từng giai đoạn vào histogram (nhãn endpoint = route template, stage) sau khi response đã gửi
+    """
+
+    def __init__(self, app, histogram=None, header=True):
+        self.app = app
+        self.histogram = histogram
+        self.header = header
+        # Histogram con theo (endpoint, stage): labels() chậm hơn observe() nên chỉ gọi một lần mỗi cặp
+        self._children = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+        timer = StageTimer()
+        totals = None
+
+        async def send_with_timing(message):
+            nonlocal totals
+            if message['type'] == 'http.response.start' and totals is None:
+                elapsed = perf_counter() - timer.start
+                totals = timer.totals(elapsed)
+                if self.header:
+                    headers = list(message.get('headers', ()))
+                    headers.append((b'server-timing', server_timing_header(totals, elapsed).encode('latin-1')))
+                    # Cho phép JS của trang khác origin (UI tĩnh) đọc Server-Timing qua Performance API
+                    headers.append((b'timing-allow-origin', b'*'))
+                    message = {**message, 'headers': headers}
+            await send(message)
+
+        token = _current_timer.set(timer)
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_timer.reset(token)
+            route = scope.get('route')
+            # Request không khớp route nào (404) không được ghi: đường dẫn tùy ý không thành nhãn
+            if self.histogram is not None and totals is not None and route is not None:
+                self.observe(getattr(route, 'path', None) or type(route).__name__, totals)
+
+    def observe(self, endpoint, totals):
+        for name, seconds in totals.items():
+            child = self._children.get((endpoint, name))
+            if child is None:
+                child = self._children[(endpoint, name)] = self.histogram.labels(endpoint=endpoint, stage=name)
+            child.observe(seconds)
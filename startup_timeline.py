@@ -0,0 +1,77 @@
+"""
+Mốc thời gian khởi động service: từ lúc process được tạo, import module, khởi tạo DB,
+load mô hình, warmup cho tới khi sẵn sàng nhận request.
+Dùng để theo dõi thời gian container start -> ready (ảnh hưởng tới tốc độ scale-out của HPA).
+"""
+
+import os
+import time
+import logging
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+def process_start_time():
+    """Thời điểm (epoch) process được tạo, đọc từ /proc (chỉ Linux); None nếu không đọc được"""
+    try:
+        with open("/proc/self/stat") as f:
+            # Trường thứ 22 (starttime, tính bằng clock tick từ lúc boot); tên process có thể chứa dấu cách
+            fields = f.read().rsplit(")", 1)[1].split()
+        start_ticks = int(fields[19])
+        with open("/proc/stat") as f:
+            boot_time = next(int(line.split()[1]) for line in f if line.startswith("btime"))
+        return boot_time + start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, StopIteration):
+        return None
+
+
+class StartupTimeline:
+    """Thời gian của từng giai đoạn khởi động, theo thứ tự được ghi lại"""
+
+    def __init__(self):
+        # Tạo ở đầu module service: mốc bắt đầu import
+        self.started_at = time.time()
+        self.process_started_at = process_start_time()
+        self.ready_at = None
+        self.phases = {}
+        self._lap_start = time.perf_counter()
+        if self.process_started_at is not None:
+            # Khởi động interpreter + import của server (uvicorn) trước khi tới module service
+            self.phases['interpreter'] = max(self.started_at - self.process_started_at, 0.0)
+
+    def lap(self, name):
+        """Ghi thời gian từ mốc lap trước (hoặc lúc tạo timeline) tới bây giờ"""
+        now = time.perf_counter()
+        self.phases[name] = now - self._lap_start
+        self._lap_start = now
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = time.perf_counter() - start
+
+    def ready(self):
+        self.ready_at = time.time()
+
+    def seconds_to_ready(self):
+        """Từ lúc process được tạo (hoặc bắt đầu import nếu không biết) tới khi sẵn sàng"""
+        if self.ready_at is None:
+            return None
+        return self.ready_at - (self.process_started_at or self.started_at)
+
+    def summary(self):
+        return {
+            'phases_ms': {name: round(seconds * 1000, 1) for name, seconds in self.phases.items()},
+            'seconds_to_ready': self.seconds_to_ready(),
+            'process_started_at': self.process_started_at,
+            'ready_at': self.ready_at,
+        }
+
+    def log_line(self):
+        phases = ", ".join(f"{name} {seconds * 1000:.1f}ms" for name, seconds in self.phases.items())
+        ready = self.seconds_to_ready()
+        return f"Startup timeline: {phases}" + (f" | ready {ready:.2f}s after process start" if ready is not None else "")
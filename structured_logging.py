@@ -0,0 +1,148 @@
+"""
+Log có cấu trúc (JSON mỗi dòng) ghi qua QueueHandler / QueueListener, kèm lấy mẫu theo route.
+
+- Thread xử lý request chỉ đưa LogRecord vào hàng đợi; format message (lazy, kiểu %s), dựng JSON
+  và ghi stdout chạy trên thread của QueueListener. Hàng đợi là queue trong process nên record không
+  bị format trước khi enqueue: tham số log không được sửa sau khi gọi logger.
+- Mỗi request được quyết định lấy mẫu một lần theo route (LogSamplingMiddleware); log INFO/DEBUG
+  của request không được chọn bị bỏ, WARNING trở lên luôn được ghi đầy đủ.
+- Hàng đợi đầy (stdout bị nghẽn) thì bỏ record và đếm vào `dropped` thay vì chặn request.
+"""
+
+import sys
+import json
+import queue
+import atexit
+import random
+import logging
+import logging.handlers
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+# (route, có lấy mẫu không) của request đang xử lý; None = ngoài request (startup, job nền...)
+_request_sampling = ContextVar('request_sampling', default=None)
+
+# Thuộc tính có sẵn của LogRecord, phần còn lại là field truyền qua `extra`
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'taskName'}
+
+
+def parse_sample_rates(value):
+    """"/predict=0.01,/predict/batch=0.01" -> {"/predict": 0.01, "/predict/batch": 0.01}"""
+    rates = {}
+    for item in (value or '').split(','):
+        if not item.strip():
+            continue
+        route, _, rate = item.rpartition('=')
+        rates[route.strip()] = min(max(float(rate), 0.0), 1.0)
+    return rates
+
+
+class RouteSampler(logging.Filter):
+    """Quyết định lấy mẫu theo route (route không cấu hình: luôn ghi) và lọc record theo quyết định đó"""
+
+    def __init__(self, rates=None, default_rate=1.0):
+        super().__init__()
+        self.rates = dict(rates or {})
+        self.default_rate = default_rate
+
+    def decide(self, route):
+        rate = self.rates.get(route, self.default_rate)
+        return rate >= 1.0 or (rate > 0.0 and random.random() < rate)
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        sampling = _request_sampling.get()
+        return sampling is None or sampling[1]
+
+
+class JsonFormatter(logging.Formatter):
+    """Một object JSON mỗi dòng: thời gian, level, logger, message, route và các field `extra`"""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        route = getattr(record, 'route', None)
+        if route is not None:
+            entry['route'] = route
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and key not in entry:
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry['stack'] = self.formatStack(record.stack_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class AsyncQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler không format ở thread gọi log, hàng đợi đầy thì bỏ record"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Chỉ gắn route của request; message được format lazily trên thread của listener
+        sampling = _request_sampling.get()
+        if sampling is not None:
+            record.route = sampling[0]
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def stop(self):
+        """Dừng listener sau khi ghi hết các record còn trong hàng đợi (gọi nhiều lần không lỗi)"""
+        listener, self.listener = getattr(self, 'listener', None), None
+        if listener is not None:
+            listener.stop()
+
+
+class LogSamplingMiddleware:
+    """ASGI middleware: quyết định lấy mẫu log một lần cho mỗi request theo đường dẫn"""
+
+    def __init__(self, app, sampler):
+        self.app = app
+        self.sampler = sampler
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+        path = scope['path']
+        token = _request_sampling.set((path, self.sampler.decide(path)))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_sampling.reset(token)
+
+
+def configure_logging(level=logging.INFO, json_format=True, sample_rates=None, queue_size=10000, stream=None, logger=None):
+    """
+    Thay handler của logger (mặc định root) bằng AsyncQueueHandler + RouteSampler, ghi ra stream
+    (mặc định stdout) trên thread QueueListener; trả về handler (handler.sampler, handler.listener)
+    """
+    logger = logger or logging.getLogger()
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JsonFormatter() if json_format else logging.Formatter("%(levelname)s:%(name)s:%(message)s"))
+
+    handler = AsyncQueueHandler(queue.Queue(queue_size))
+    handler.sampler = RouteSampler(sample_rates)
+    handler.addFilter(handler.sampler)
+    handler.listener = logging.handlers.QueueListener(handler.queue, output, respect_handler_level=True)
+
+    for existing in list(logger.handlers):
+        logger.removeHandler(existing)
+    logger.addHandler(handler)
+    logger.setLevel(level)
+    handler.listener.start()
+    # Ghi nốt các record còn trong hàng đợi khi process thoát
+    atexit.register(handler.stop)
+    return handler
@@ -0,0 +1,112 @@
+import io
+import os
+import sys
+import json
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batch_upload import read_chunks, count_rows, format_results, csv_header
+from preprocessing import load_preprocessors
+
+PREPROCESSOR_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "jupiter_notebook", "preprocessor.json")
+
+HEADER = "Ho_ten,Name,PERSON_AGE,Person_Gender,person_education,person_income,person_emp_exp,person_home_ownership,loan_amnt,loan_intent,loan_int_rate,loan_percent_income,cb_person_cred_hist_length,Credit_Score,previous_loan_defaults_on_file"
+ROW = "{name},Alias,22,female,Master,71948,0,RENT,35000,PERSONAL,16.02,0.49,3,561,No"
+
+
+def _csv(n_rows, name=lambda i: f"KH {i}"):
+    lines = [HEADER] + [ROW.format(name=name(i)) for i in range(n_rows)]
+    return io.BytesIO(("\ufeff" + "\n".join(lines) + "\n").encode("utf-8"))
+
+
+def test_chunks_grow_and_cover_every_row():
+    """Chunk đầu nhỏ, các chunk sau lớn dần tới chunk_rows, không mất dòng nào"""
+    chunks = list(read_chunks(_csv(1000), "loans.csv", chunk_rows=400, first_chunk_rows=50))
+
+    assert [len(names) for _, names, _ in chunks] == [50, 100, 200, 400, 250]
+    assert [start for start, _, _ in chunks] == [0, 50, 150, 350, 750]
+    assert chunks[-1][1][-1] == "KH 999"
+    assert count_rows(_csv(1000), "loans.csv") == 1000
+
+
+def test_column_matching_like_script_js():
+    """Tên lấy theo thứ tự Ho_ten > Name, cột features không phân biệt hoa thường, dòng trống bị bỏ qua"""
+    fileobj = _csv(3, name=lambda i: "" if i == 1 else f"KH {i}")
+    fileobj = io.BytesIO(fileobj.getvalue().replace(b"\nKH 2", b"\n,,,,,,,,,,,,,,\nKH 2"))
+    (start, names, columns), = read_chunks(fileobj, "loans.csv")
+
+    assert names == ["KH 0", "Alias", "KH 2"]
+    assert columns["person_age"] == ["22", "22", "22"]
+    assert columns["credit_score"] == ["561", "561", "561"]
+    assert "person_gender" in columns
+
+    # Chuỗi từ CSV được tiền xử lý giống hồ sơ JSON
+    preprocessor = load_preprocessors(PREPROCESSOR_PATH)["model_ml"]
+    features_matrix, row_errors = preprocessor.transform_columns(columns, n_rows=len(names))
+    expected, _ = preprocessor.transform_records([{"person_age": 22, "person_gender": "female", "person_education": "Master",
+        "person_income": 71948, "person_emp_exp": 0, "person_home_ownership": "RENT", "loan_amnt": 35000,
+        "loan_intent": "PERSONAL", "loan_int_rate": 16.02, "loan_percent_income": 0.49,
+        "cb_person_cred_hist_length": 3, "credit_score": 561, "previous_loan_defaults_on_file": "No"}])
+    assert not row_errors
+    assert (features_matrix == expected).all()
+
+
+def test_rejects_files_without_features():
+    for fileobj, filename in [(io.BytesIO(b"a,b\n1,2\n"), "loans.csv"), (io.BytesIO(b""), "loans.csv"), (io.BytesIO(b""), "loans.txt")]:
+        try:
+            next(read_chunks(fileobj, filename))
+        except ValueError:
+            continue
+        raise AssertionError(f"{filename} should be rejected")
+
+
+def test_xlsx_upload():
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        print("openpyxl not installed, skipping")
+        return
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(["Full Name", "credit_score", "person_age"])
+    sheet.append(["Nguyen Van A", 700, 30])
+    sheet.append([None, 650, 41])
+    fileobj = io.BytesIO()
+    workbook.save(fileobj)
+    fileobj.seek(0)
+
+    (start, names, columns), = read_chunks(fileobj, "loans.XLSX")
+    assert names == ["Nguyen Van A", "Hồ sơ #2"]
+    assert columns == {"credit_score": [700, 650], "person_age": [30, 41]}
+
+
+def test_format_results():
+    predictions = [1, None, 0]
+    errors = [{"row": 1, "detail": "Credit score must be between 300 and 850"}]
+
+    lines = format_results(10, ["A", "B", "C"], predictions, errors).splitlines()
+    assert [json.loads(line) for line in lines] == [
+        {"row": 10, "name": "A", "prediction": 1},
+        {"row": 11, "name": "B", "error": "Credit score must be between 300 and 850"},
+        {"row": 12, "name": "C", "prediction": 0},
+    ]
+
+    assert csv_header() + format_results(10, ["A", "B", "C"], predictions, errors, output="csv") == (
+        "row,name,prediction,error\r\n"
+        "10,A,1,\r\n"
+        "11,B,,Credit score must be between 300 and 850\r\n"
+        "12,C,0,\r\n"
+    )
+
+
+if __name__ == '__main__':
+    tests = [
+        test_chunks_grow_and_cover_every_row, test_column_matching_like_script_js,
+        test_rejects_files_without_features, test_xlsx_upload, test_format_results
+    ]
+
+    for test_func in tests:
+        test_func()
+        print(f"✓ {test_func.__name__}")
+
+    print("Succeed at Testing!")
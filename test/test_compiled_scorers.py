@@ -0,0 +1,77 @@
+import os
+import sys
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from compiled_scorers import compile_model
+from preprocessing import FEATURE_COLS, load_preprocessors
+
+MODEL_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "jupiter_notebook")
+
+
+def _load_dataset(preprocessor_name):
+    df = pd.read_csv(os.path.join(MODEL_DIR, 'loan_data.csv'))
+    preprocessor = load_preprocessors(os.path.join(MODEL_DIR, 'preprocessor.json'))[preprocessor_name]
+    X, row_errors = preprocessor.transform_columns({col: df[col].to_numpy() for col in FEATURE_COLS})
+    assert not row_errors
+    return X, df['loan_status'].to_numpy()
+
+
+def _assert_parity(model, compiled, X, X_original=None):
+    X_original = X if X_original is None else X_original
+    assert np.array_equal(compiled.predict(X), model.predict(X_original))
+    assert np.allclose(compiled.predict_proba(X)[:, 1], model.predict_proba(X_original)[:, 1], atol=1e-5)
+    # Một dòng đơn lẻ cũng phải khớp
+    assert compiled.predict(X[:1])[0] == model.predict(X_original[:1])[0]
+
+
+def test_compiled_xgboost_parity():
+    """Cây XGBoost trải phẳng cho đúng kết quả của mô hình gốc trên loan_data.csv"""
+    for model_file, preprocessor_name in [('model_ml.joblib', 'model_ml'), ('model_xgboost.joblib', 'comparison')]:
+        model = joblib.load(os.path.join(MODEL_DIR, model_file))
+        X, _ = _load_dataset(preprocessor_name)
+        _assert_parity(model, compile_model(model), X)
+
+
+def test_compiled_random_forest_parity():
+    X, y = _load_dataset('comparison')
+    model = RandomForestClassifier(n_estimators=20, max_depth=10, random_state=42).fit(X[:10000], y[:10000])
+    _assert_parity(model, compile_model(model), X)
+
+
+def test_compiled_logistic_folds_scaler():
+    """StandardScaler được gộp vào hệ số, không cần transform trước khi chấm điểm"""
+    model = joblib.load(os.path.join(MODEL_DIR, 'model_logistic_regression.joblib'))
+    scaler = joblib.load(os.path.join(MODEL_DIR, 'scaler_logistic_regression.joblib'))
+    X, _ = _load_dataset('comparison')
+    compiled = compile_model(model, scaler)
+    _assert_parity(model, compiled, X, scaler.transform(X))
+    assert compiled.weights.shape == (len(FEATURE_COLS),)
+
+
+def test_compiled_tree_handles_missing_values():
+    """Giá trị thiếu đi theo nhánh mặc định giống XGBoost"""
+    model = joblib.load(os.path.join(MODEL_DIR, 'model_xgboost.joblib'))
+    X, _ = _load_dataset('comparison')
+    X = X[:500].copy()
+    X[::7, 3] = np.nan
+    X[::11, 11] = np.nan
+    assert np.array_equal(compile_model(model).predict(X), model.predict(X))
+
+
+if __name__ == '__main__':
+    tests = [
+        test_compiled_xgboost_parity, test_compiled_random_forest_parity,
+        test_compiled_logistic_folds_scaler, test_compiled_tree_handles_missing_values
+    ]
+
+    for test_func in tests:
+        test_func()
+        print(f"✓ {test_func.__name__}")
+
+    print("Succeed at Testing!")
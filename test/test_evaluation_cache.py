@@ -0,0 +1,98 @@
+import io
+import os
+import sys
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from evaluation_cache import SingleFlight, cache_key, dataset_fingerprint
+
+
+def test_keys_follow_dataset_and_model_versions():
+    body = b"person_age,loan_status\n22,1\n" * 1000
+    fingerprint = dataset_fingerprint(body, "csv")
+    assert dataset_fingerprint(io.BytesIO(body), "csv") == fingerprint
+    assert dataset_fingerprint(body, "json") != fingerprint
+    assert dataset_fingerprint(body + b"35,0\n", "csv") != fingerprint
+
+    versions = {"xgboost": "a1", "random_forest": "b2", "logistic_regression": "c3+d4"}
+    key = cache_key(fingerprint, versions)
+    assert cache_key(fingerprint, dict(reversed(list(versions.items())))) == key
+    # Hot-swap một mô hình -> key mới
+    assert cache_key(fingerprint, {**versions, "xgboost": "a2"}) != key
+
+
+def test_concurrent_identical_calls_share_one_computation():
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"samples": 3}
+
+    async def main():
+        flight = SingleFlight()
+        results = await asyncio.gather(*(flight.run("k", compute) for _ in range(5)), flight.run("other", compute))
+        assert len(flight) == 0
+        return results
+
+    results = asyncio.run(main())
+    assert len(calls) == 2
+    assert [shared for _, shared in results] == [False, True, True, True, True, False]
+    assert all(result == {"samples": 3} for result, _ in results)
+
+
+def test_error_reaches_every_waiter_and_is_not_remembered():
+    attempts = []
+
+    async def failing():
+        attempts.append(1)
+        await asyncio.sleep(0.01)
+        raise ValueError("bad dataset")
+
+    async def main():
+        flight = SingleFlight()
+        results = await asyncio.gather(flight.run("k", failing), flight.run("k", failing), return_exceptions=True)
+        assert all(isinstance(result, ValueError) for result in results)
+        # Lần gọi sau tính lại
+        await asyncio.gather(flight.run("k", failing), return_exceptions=True)
+
+    asyncio.run(main())
+    assert len(attempts) == 2
+
+
+def test_cancelled_first_caller_does_not_cancel_waiters():
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"samples": 3}
+
+    async def main():
+        flight = SingleFlight()
+        first = asyncio.ensure_future(flight.run("k", compute))
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(flight.run("k", compute))
+        await asyncio.sleep(0.01)
+        # Client của request đầu tiên ngắt kết nối
+        first.cancel()
+        result = await second
+        assert first.cancelled() and len(flight) == 0
+        return result
+
+    assert asyncio.run(main()) == ({"samples": 3}, True)
+    assert len(calls) == 1
+
+
+if __name__ == '__main__':
+    tests = [
+        test_keys_follow_dataset_and_model_versions, test_concurrent_identical_calls_share_one_computation,
+        test_error_reaches_every_waiter_and_is_not_remembered, test_cancelled_first_caller_does_not_cancel_waiters
+    ]
+
+    for test_func in tests:
+        test_func()
+        print(f"✓ {test_func.__name__}")
+
+    print("Succeed at Testing!")
@@ -0,0 +1,150 @@
+import io
+import os
+import sys
+import json
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from evaluation_data import DatasetStore, UnsupportedFormat, detect_format, parse_columns, split_target
+
+RECORDS = [
+    {"Person_Age": 22, "person_home_ownership": "RENT", "loan_status": 1},
+    {"Person_Age": 35, "person_home_ownership": "OWN", "loan_status": 0},
+    {"Person_Age": 41, "person_home_ownership": "MORTGAGE", "loan_status": 0},
+]
+
+
+def _assert_same_columns(columns, expected):
+    assert sorted(columns) == sorted(expected)
+    for name in expected:
+        assert list(columns[name]) == list(expected[name]), name
+
+
+EXPECTED = {
+    "person_age": [22, 35, 41],
+    "person_home_ownership": ["RENT", "OWN", "MORTGAGE"],
+    "loan_status": [1, 0, 0],
+}
+
+
+def test_json_records_and_columnar_agree():
+    records = parse_columns(json.dumps(RECORDS).encode())
+    columnar = parse_columns(json.dumps({key: [r[key] for r in RECORDS] for key in RECORDS[0]}).encode(), "application/json")
+    _assert_same_columns(records, EXPECTED)
+    _assert_same_columns(columnar, EXPECTED)
+    assert columnar["person_age"].dtype.kind == "i"
+
+    name, y = split_target(columnar)
+    assert name == "loan_status" and list(y) == [1, 0, 0]
+
+    try:
+        parse_columns(b'{"a": [1, 2], "b": [1]}')
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("columns of different lengths should be rejected")
+
+    # Giá trị vô hướng / lồng nhau thay vì danh sách: ValueError (400), không phải TypeError
+    for body in (b'{"a": 1}', b'{"a": [1, 2], "b": "x"}', b'{"a": [[1, 2], [3, 4]]}', b'[1, 2]'):
+        try:
+            parse_columns(body)
+        except ValueError as e:
+            assert "must be" in str(e), body
+        else:
+            raise AssertionError(f"{body} should be rejected")
+
+
+def test_csv_npy_and_arrow_bodies():
+    csv_body = b"Person_Age,person_home_ownership,loan_status\n22,RENT,1\n35,OWN,0\n41,MORTGAGE,0\n"
+    _assert_same_columns(parse_columns(csv_body, "text/csv; charset=utf-8"), EXPECTED)
+    _assert_same_columns(parse_columns(csv_body, "application/octet-stream", filename="test.CSV"), EXPECTED)
+
+    array = np.array(
+        [(22, "RENT", 1), (35, "OWN", 0), (41, "MORTGAGE", 0)],
+        dtype=[("person_age", "i8"), ("person_home_ownership", "U8"), ("loan_status", "i1")],
+    )
+    buffer = io.BytesIO()
+    np.save(buffer, array)
+    _assert_same_columns(parse_columns(buffer.getvalue(), "application/x-npy"), EXPECTED)
+
+    plain = io.BytesIO()
+    np.save(plain, np.arange(3))
+    try:
+        parse_columns(plain.getvalue(), "application/x-npy")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError(".npy without fields should be rejected")
+
+    try:
+        import pyarrow as pa
+    except ImportError:
+        print("pyarrow not installed, skipping Arrow")
+    else:
+        table = pa.table(EXPECTED)
+        for writer in (pa.ipc.new_stream, pa.ipc.new_file):
+            sink = pa.BufferOutputStream()
+            with writer(sink, table.schema) as w:
+                w.write_table(table)
+            _assert_same_columns(parse_columns(sink.getvalue().to_pybytes(), "application/vnd.apache.arrow.stream"), EXPECTED)
+
+    try:
+        detect_format("application/xml")
+    except UnsupportedFormat:
+        pass
+    else:
+        raise AssertionError("unknown content type should be rejected")
+
+
+def test_dataset_store_caches_until_file_changes():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "holdout.csv")
+        with open(path, "w") as f:
+            f.write("person_age,loan_status\n22,1\n")
+        with open(os.path.join(directory, "notes.txt"), "w") as f:
+            f.write("not a dataset")
+
+        store = DatasetStore(directory)
+        assert store.names() == ["holdout"]
+        first = store.load("holdout")
+        assert store.load("holdout") is first
+
+        with open(path, "w") as f:
+            f.write("person_age,loan_status\n22,1\n35,0\n")
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        assert list(store.load("holdout")["person_age"]) == [22, 35]
+
+        for name in ("notes", "../holdout", os.path.join(directory, "holdout"), "missing"):
+            try:
+                store.load(name)
+            except KeyError:
+                continue
+            raise AssertionError(f"{name} should be rejected")
+
+        try:
+            import pyarrow as pa
+        except ImportError:
+            print("pyarrow not installed, skipping Arrow")
+            return
+        # File .arrow được đọc từ file object DatasetStore đã mở
+        with pa.OSFile(os.path.join(directory, "holdout_arrow.arrow"), "wb") as sink:
+            table = pa.table(EXPECTED)
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        assert store.names() == ["holdout", "holdout_arrow"]
+        _assert_same_columns(store.load("holdout_arrow"), EXPECTED)
+        assert store.load("holdout_arrow") is store.load("holdout_arrow")
+
+
+if __name__ == '__main__':
+    tests = [test_json_records_and_columnar_agree, test_csv_npy_and_arrow_bodies, test_dataset_store_caches_until_file_changes]
+
+    for test_func in tests:
+        test_func()
+        print(f"✓ {test_func.__name__}")
+
+    print("Succeed at Testing!")
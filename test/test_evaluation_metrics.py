@@ -0,0 +1,78 @@
+import os
+import sys
+
+import numpy as np
+from sklearn import metrics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from evaluation_metrics import binary_metrics, binary_clf_curve, precision_recall_curve
+
+
+def _dataset(n=5000, seed=0):
+    rng = np.random.default_rng(seed)
+    y_true = rng.integers(0, 2, n)
+    # Xác suất lệch theo nhãn, làm tròn để có nhiều điểm bằng nhau (kiểm tra xử lý ngưỡng trùng)
+    y_score = np.clip(rng.normal(0.35 + 0.3 * y_true, 0.2), 0, 1).round(2)
+    return y_true, y_score
+
+
+def test_threshold_metrics_match_sklearn():
+    y_true, y_score = _dataset()
+    y_pred = (y_score > 0.5).astype(int)
+    result = binary_metrics(y_true, y_score)
+
+    assert np.isclose(result['accuracy'], metrics.accuracy_score(y_true, y_pred))
+    assert np.isclose(result['precision'], metrics.precision_score(y_true, y_pred))
+    assert np.isclose(result['recall'], metrics.recall_score(y_true, y_pred))
+    assert np.isclose(result['f1'], metrics.f1_score(y_true, y_pred))
+    assert np.isclose(result['mcc'], metrics.matthews_corrcoef(y_true, y_pred))
+    tn, fp, fn, tp = metrics.confusion_matrix(y_true, y_pred).ravel()
+    assert result['confusion_matrix'] == {'tn': tn, 'fp': fp, 'fn': fn, 'tp': tp}
+    assert np.isclose(result['specificity'], tn / (tn + fp))
+
+    # Chỉ có nhãn dự đoán: cùng kết quả, không có metric xếp hạng
+    from_labels = binary_metrics(y_true, y_pred=y_pred)
+    assert from_labels['f1'] == result['f1'] and 'roc_auc' not in from_labels
+
+
+def test_ranking_metrics_match_sklearn():
+    y_true, y_score = _dataset()
+    result = binary_metrics(y_true, y_score, curve_points=None)
+
+    assert np.isclose(result['roc_auc'], metrics.roc_auc_score(y_true, y_score))
+    assert np.isclose(result['average_precision'], metrics.average_precision_score(y_true, y_score))
+
+    precision, recall = precision_recall_curve(*binary_clf_curve(y_true, y_score)[:2])
+    expected_precision, expected_recall, _ = metrics.precision_recall_curve(y_true, y_score)
+    assert np.allclose(precision, expected_precision) and np.allclose(recall, expected_recall)
+
+    fpr, tpr, _ = metrics.roc_curve(y_true, y_score, drop_intermediate=False)
+    assert np.allclose(result['roc_curve']['fpr'], fpr, atol=1e-6)
+    assert np.allclose(result['roc_curve']['tpr'], tpr, atol=1e-6)
+
+    # Đường cong trả về trong response được rút gọn
+    short = binary_metrics(y_true, y_score, curve_points=11)
+    assert len(short['roc_curve']['fpr']) == 11 and short['roc_curve']['fpr'][0] == 0.0
+    assert short['pr_curve']['recall'][-1] == 0.0
+
+
+def test_zero_division_and_single_class():
+    """Không có dự đoán dương / chỉ một lớp: metric bằng 0 như zero_division=0, ROC-AUC không xác định"""
+    y_true = np.array([0, 0, 1, 1])
+    result = binary_metrics(y_true, y_pred=np.zeros(4, dtype=int))
+    assert result['precision'] == 0.0 and result['f1'] == 0.0 and result['mcc'] == 0.0
+    assert result['accuracy'] == metrics.accuracy_score(y_true, np.zeros(4))
+
+    single = binary_metrics(np.ones(4, dtype=int), np.array([0.9, 0.2, 0.7, 0.6]))
+    assert single['roc_auc'] is None and single['recall'] == 0.75
+
+
+if __name__ == '__main__':
+    tests = [test_threshold_metrics_match_sklearn, test_ranking_metrics_match_sklearn, test_zero_division_and_single_class]
+
+    for test_func in tests:
+        test_func()
+        print(f"✓ {test_func.__name__}")
+
+    print("Succeed at Testing!")
@@ -0,0 +1,76 @@
+import os
+import sys
+import time
+import asyncio
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from inference_executor import BoundedExecutor, ExecutorFull
+
+
+def test_executor_rejects_when_queue_full():
+    """Hàng đợi đầy thì submit bị từ chối ngay, có Retry-After"""
+    executor = BoundedExecutor(max_workers=1, max_queue=1)
+    release = threading.Event()
+
+    def blocked():
+        release.wait(5)
+        return 'done'
+
+    running = executor.submit(blocked)
+    queued = executor.submit(blocked)
+    try:
+        executor.submit(blocked)
+    except ExecutorFull as e:
+        assert e.retry_after >= 1
+    else:
+        raise AssertionError("Expected ExecutorFull when the queue is full")
+    assert executor.stats()['rejected'] == 1
+
+    release.set()
+    assert running.result(5) == 'done'
+    assert queued.result(5) == 'done'
+
+    # Slot được trả lại sau khi task xong
+    assert executor.submit(lambda: 42).result(5) == 42
+    executor.shutdown()
+
+
+def test_executor_runs_off_event_loop():
+    """Task CPU-bound chạy trên thread riêng, event loop vẫn phục vụ được coroutine khác"""
+    executor = BoundedExecutor(max_workers=1, max_queue=4)
+
+    def slow_inference():
+        time.sleep(0.2)
+        return threading.current_thread().name
+
+    async def main():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        thread_name = await executor.run(slow_inference)
+        task.cancel()
+        return thread_name, ticks
+
+    thread_name, ticks = asyncio.run(main())
+    assert thread_name.startswith('inference')
+    assert ticks >= 5
+    assert executor.stats()['in_flight'] == 0
+    executor.shutdown()
+
+
+if __name__ == '__main__':
+    tests = [test_executor_rejects_when_queue_full, test_executor_runs_off_event_loop]
+
+    for test_func in tests:
+        test_func()
+        print(f"✓ {test_func.__name__}")
+
+    print("Succeed at Testing!")
@@ -0,0 +1,77 @@
+import os
+import sys
+import tempfile
+
+import joblib
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from compiled_scorers import compile_model, load_scorer, save_scorer
+from inference_pool import InferencePool
+
+MODEL_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "jupiter_notebook")
+
+
+def _features(n_rows):
+    return np.random.default_rng(0).normal(size=(n_rows, 13))
+
+
+def test_scorer_store_is_memory_mapped():
+    """Scorer lưu ra store được đọc lại dạng mmap read-only và cho cùng kết quả"""
+    model = joblib.load(os.path.join(MODEL_DIR, 'model_xgboost.joblib'))
+    scorer = compile_model(model)
+    with tempfile.TemporaryDirectory() as store_dir:
+        save_scorer(scorer, store_dir)
+        mapped = load_scorer(store_dir, mmap_mode='r')
+        assert isinstance(mapped.threshold, np.memmap)
+        assert not mapped.threshold.flags.writeable
+        X = _features(100)
+        assert np.array_equal(mapped.predict(X), scorer.predict(X))
+
+
+def test_inference_pool_matches_in_process():
+    """Batch được chia cho các worker qua shared memory, kết quả giống chấm điểm trong process"""
+    model = joblib.load(os.path.join(MODEL_DIR, 'model_xgboost.joblib'))
+    scorer = compile_model(model)
+    with tempfile.TemporaryDirectory() as store_root:
+        pool = InferencePool(workers=2, store_dir=store_root)
+        pool.start()
+        try:
+            pool.publish(1, {'xgboost': scorer, 'random_forest': None})
+            assert pool.has(1, 'xgboost')
+            assert not pool.has(1, 'random_forest')
+
+            X = _features(1000)
+            assert np.array_equal(pool.predict(1, 'xgboost', X), model.predict(X))
+            assert np.allclose(pool.predict(1, 'xgboost', X, 'predict_proba'), model.predict_proba(X)[:, 1], atol=1e-5)
+
+            stats = pool.stats()
+            assert sum(worker['tasks'] for worker in stats['per_worker']) == 4
+            assert all(worker['busy_seconds'] > 0 for worker in stats['per_worker'])
+
+            # Chunk lớn hơn max_rows được worker chấm bằng mô hình gốc chép kèm trong store
+            scorer.max_rows = 32
+            pool.publish(2, {'xgboost': scorer}, natives={'xgboost': os.path.join(MODEL_DIR, 'model_xgboost.joblib')})
+            assert os.path.exists(os.path.join(pool.store_dir, 'g2', 'xgboost', 'native.joblib'))
+            assert np.array_equal(pool.predict(2, 'xgboost', X), model.predict(X))
+            assert np.allclose(pool.predict(2, 'xgboost', X, 'predict_proba'), model.predict_proba(X)[:, 1], atol=1e-5)
+
+            # Chỉ giữ 2 snapshot gần nhất trong store
+            pool.publish(3, {'xgboost': scorer})
+            assert not pool.has(1, 'xgboost')
+            assert not os.path.exists(os.path.join(pool.store_dir, 'g1'))
+            assert np.array_equal(pool.predict(3, 'xgboost', X[:10]), model.predict(X[:10]))
+        finally:
+            pool.shutdown()
+        assert not os.path.exists(pool.store_dir)
+
+
+if __name__ == '__main__':
+    tests = [test_scorer_store_is_memory_mapped, test_inference_pool_matches_in_process]
+
+    for test_func in tests:
+        test_func()
+        print(f"✓ {test_func.__name__}")
+
+    print("Succeed at Testing!")
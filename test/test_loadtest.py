@@ -0,0 +1,159 @@
+import os
+import sys
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from fastapi import FastAPI, Header, HTTPException
+from fastapi.responses import JSONResponse
+
+from loadtest import LoadTest, Result, parse_mix, parse_server_timing, summarize, compare, format_report
+
+
+def make_app():
+    """App giả lập /register, /login, /predict và CRUD /loans (hợp đồng chỉ chủ sở hữu truy cập được)"""
+    app = FastAPI()
+    loans = {}
+
+    def owner(authorization):
+        if not authorization or not authorization.startswith('Bearer '):
+            raise HTTPException(status_code=401)
+        return authorization[len('Bearer '):]
+
+    @app.post('/register')
+    def register(body: dict):
+        return {'username': body['username']}
+
+    @app.post('/login')
+    def login(body: dict):
+        return {'access_token': body['username']}
+
+    @app.post('/predict')
+    async def predict(body: dict, authorization: str = Header(None)):
+        owner(authorization)
+        await asyncio.sleep(0.001)
+        return JSONResponse({'prediction': [1]}, headers={'Server-Timing': 'auth;dur=0.5, inference;dur=1.0, total;dur=1.7'})
+
+    @app.get('/loans')
+    def list_loans(authorization: str = Header(None)):
+        user = owner(authorization)
+        return {'loans': [number for number, loan_owner in loans.items() if loan_owner == user]}
+
+    @app.post('/loans')
+    def create_loan(body: dict, authorization: str = Header(None)):
+        if body['contractNumber'] in loans:
+            raise HTTPException(status_code=400)
+        loans[body['contractNumber']] = owner(authorization)
+        return body
+
+    def check(number, authorization):
+        if number not in loans:
+            raise HTTPException(status_code=404)
+        if loans[number] != owner(authorization):
+            raise HTTPException(status_code=403)
+
+    @app.get('/loans/{number}')
+    def get_loan(number: str, authorization: str = Header(None)):
+        check(number, authorization)
+        return {'contractNumber': number}
+
+    @app.put('/loans/{number}')
+    def update_loan(number: str, body: dict, authorization: str = Header(None)):
+        check(number, authorization)
+        return body
+
+    @app.delete('/loans/{number}')
+    def delete_loan(number: str, authorization: str = Header(None)):
+        check(number, authorization)
+        del loans[number]
+        return {'deleted': number}
+
+    app.state.loans = loans
+    return app
+
+
+def client_for(app):
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://loadtest')
+
+
+def test_parse_mix_and_server_timing():
+    assert parse_mix('predict=60, batch=15,login=0') == {'predict': 60.0, 'batch': 15.0}
+    for bad in ('', 'predict=0', 'upload=5'):
+        try:
+            parse_mix(bad)
+            assert False, bad
+        except ValueError:
+            pass
+    assert parse_server_timing('auth;dur=0.5, cache;desc="hit", inference;dur=2, total;dur=3.1') == {
+        'auth': 0.5, 'inference': 2.0, 'total': 3.1
+    }
+
+
+def test_summarize_and_compare():
+    results = [Result('POST /predict', 200, (i + 1) / 1000, {'auth': 1.0, 'total': 2.0}, None) for i in range(100)]
+    results += [Result('POST /login', 401, 0.2, None, None), Result('POST /login', 0, 0.5, None, 'ConnectTimeout')]
+    summary = summarize(results, wall_time=2.0)
+
+    predict = summary['endpoints']['POST /predict']
+    assert predict['requests'] == 100 and predict['errors'] == 0 and predict['throughput_rps'] == 50.0
+    assert abs(predict['latency_ms']['p50'] - 50.5) < 1e-6 and abs(predict['latency_ms']['p99'] - 99.01) < 1e-6
+    assert predict['server_timing_ms']['auth'] == {'mean': 1.0, 'p95': 1.0}
+    login = summary['endpoints']['POST /login']
+    assert login['error_rate'] == 1.0 and login['statuses'] == {'401': 1, 'ConnectTimeout': 1}
+    assert summary['total']['requests'] == 102 and summary['total']['errors'] == 2
+
+    faster = summarize([r._replace(latency=r.latency / 2) for r in results], wall_time=1.0)
+    rows = {row['endpoint']: row for row in compare(summary, faster)}
+    assert rows['POST /predict']['p50_ms']['change_pct'] == -50.0
+    assert rows['POST /predict']['throughput_rps']['change_pct'] == 100.0
+    assert 'POST /predict' in format_report(faster, compare(summary, faster))
+
+
+def test_synthetic_mix_keeps_loans_consistent():
+    async def run():
+        app = make_app()
+        async with client_for(app) as client:
+            records = [{'person_age': 30.0, 'credit_score': 600.0, 'loan_status': 1.0}]
+            test = LoadTest(client, mix=parse_mix('predict=2,loans=8,login=1'), records=records, users=3, seed=7)
+            await test.setup()
+            results = await test.run(concurrency=6, requests=300)
+            await test.teardown()
+            return results, app.state.loans
+
+    results, remaining = asyncio.run(run())
+    assert len(results) == 300
+    # Hợp đồng đang được một request dùng không bị request khác sửa / xóa: không có 403 / 404
+    assert all(r.status == 200 for r in results), {r.status for r in results}
+    assert {'POST /loans', 'GET /loans/{contractNumber}', 'DELETE /loans/{contractNumber}', 'POST /login'} <= {r.endpoint for r in results}
+    assert remaining == {}
+    predict = [r for r in results if r.endpoint == 'POST /predict']
+    assert predict and predict[0].timings == {'auth': 0.5, 'inference': 1.0, 'total': 1.7}
+
+
+def test_replay_at_target_rate():
+    async def run():
+        async with client_for(make_app()) as client:
+            replay = [{'method': 'GET', 'path': '/loans', 'user': 0}, {'method': 'POST', 'path': '/predict', 'json': {}, 'auth': False}]
+            test = LoadTest(client, replay=replay, users=1)
+            await test.setup()
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            results = await test.run(concurrency=4, rate=200, requests=40)
+            return results, loop.time() - start
+
+    results, elapsed = asyncio.run(run())
+    assert [r.endpoint for r in results[:2]] == ['GET /loans', 'POST /predict']
+    assert [r.status for r in results[:2]] == [200, 401]
+    # 40 request ở 200 request/giây: request cuối được gửi sau ~0.195s
+    assert len(results) == 40 and elapsed >= 0.19
+
+
+if __name__ == '__main__':
+    tests = [test_parse_mix_and_server_timing, test_summarize_and_compare, test_synthetic_mix_keeps_loans_consistent, test_replay_at_target_rate]
+
+    for test_func in tests:
+        test_func()
+        print(f"✓ {test_func.__name__}")
+
+    print("Succeed at Testing!")
@@ -0,0 +1,79 @@
+import os
+import sys
+import glob
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metrics_multiprocess import cleanup_dead_workers, generate_metrics, reset_multiprocess_dir
+
+# Một "worker": ghi metrics vào thư mục multiprocess rồi thoát
+WORKER = """
+from prometheus_client import Counter, Gauge, Histogram
+Counter('requests_total', 'Requests', ['endpoint']).labels(endpoint='/predict').inc({requests})
+Histogram('latency_seconds', 'Latency', buckets=(0.1, 1.0)).observe({latency})
+Gauge('queue_depth', 'Queue depth', multiprocess_mode='livesum').set(5)
+"""
+
+
+def _run_worker(directory, requests, latency):
+    env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=directory)
+    subprocess.run([sys.executable, "-c", WORKER.format(requests=requests, latency=latency)], env=env, check=True)
+
+
+def _scrape(directory):
+    previous = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    os.environ['PROMETHEUS_MULTIPROC_DIR'] = directory
+    try:
+        text = generate_metrics().decode()
+    finally:
+        if previous is None:
+            del os.environ['PROMETHEUS_MULTIPROC_DIR']
+        else:
+            os.environ['PROMETHEUS_MULTIPROC_DIR'] = previous
+    return {line.rsplit(' ', 1)[0]: float(line.rsplit(' ', 1)[1]) for line in text.splitlines() if line and not line.startswith('#')}
+
+
+def test_aggregates_workers_and_merges_dead_worker_files():
+    with tempfile.TemporaryDirectory() as directory:
+        reset_multiprocess_dir(directory)
+        _run_worker(directory, 3, 0.05)
+        _run_worker(directory, 4, 0.5)
+        assert len(glob.glob(os.path.join(directory, '*.db'))) == 6
+
+        # Trước khi dọn: gauge live của worker đã chết vẫn còn trong file
+        before = _scrape(directory)
+        assert before['requests_total{endpoint="/predict"}'] == 7
+        assert before['latency_seconds_bucket{le="0.1"}'] == 1
+        assert before['latency_seconds_count'] == 2
+
+        dead = cleanup_dead_workers(directory)
+        assert len(dead) == 2
+        assert sorted(os.path.basename(f) for f in glob.glob(os.path.join(directory, '*.db'))) == [
+            'counter_archive.db', 'histogram_archive.db'
+        ]
+
+        # Counter / histogram không đổi sau khi gộp, gauge của worker đã chết không còn được tính
+        after = _scrape(directory)
+        assert after['requests_total{endpoint="/predict"}'] == 7
+        assert after['latency_seconds_bucket{le="1.0"}'] == 2
+        assert abs(after['latency_seconds_sum'] - 0.55) < 1e-9
+        assert 'queue_depth' not in after
+
+        # Worker khởi động lại: cộng tiếp vào archive
+        _run_worker(directory, 1, 0.05)
+        assert cleanup_dead_workers(directory) and _scrape(directory)['requests_total{endpoint="/predict"}'] == 8
+
+        reset_multiprocess_dir(directory)
+        assert glob.glob(os.path.join(directory, '*.db')) == []
+
+
+if __name__ == '__main__':
+    tests = [test_aggregates_workers_and_merges_dead_worker_files]
+
+    for test_func in tests:
+        test_func()
+        print(f"✓ {test_func.__name__}")
+
+    print("Succeed at Testing!")
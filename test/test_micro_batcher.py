@@ -0,0 +1,102 @@
+import os
+import gc
+import sys
+import time
+import asyncio
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from micro_batcher import MicroBatcher
+
+
+class CountingModel:
+    """Mô hình giả: trả về tổng features của từng dòng và đếm số lần predict"""
+
+    def __init__(self):
+        self.calls = []
+
+    def predict(self, model_name, features_matrix):
+        self.calls.append(features_matrix.shape)
+        return features_matrix.sum(axis=1)
+
+
+def test_concurrent_requests_share_one_predict():
+    """Các request đồng thời được gom thành một lần predict và nhận đúng kết quả"""
+    model = CountingModel()
+
+    async def run():
+        batcher = MicroBatcher(model.predict, max_batch_size=64, max_wait_ms=5)
+        return await asyncio.gather(*[batcher.submit('model_ml', [i, 1.0]) for i in range(10)])
+
+    results = asyncio.run(run())
+    assert results == [i + 1.0 for i in range(10)]
+    assert model.calls == [(10, 2)]
+
+
+def test_batch_size_limit():
+    """Lô bị cắt khi đạt max_batch_size"""
+    model = CountingModel()
+
+    async def run():
+        batcher = MicroBatcher(model.predict, max_batch_size=4, max_wait_ms=5)
+        return await asyncio.gather(*[batcher.submit('model_ml', [i]) for i in range(10)])
+
+    results = asyncio.run(run())
+    assert results == [float(i) for i in range(10)]
+    assert sorted(shape[0] for shape in model.calls) == [2, 4, 4]
+
+
+def test_bad_row_does_not_poison_batch():
+    """Dòng sai số lượng features lỗi riêng, các dòng khác vẫn có kết quả"""
+
+    def predict(model_name, features_matrix):
+        if features_matrix.shape[1] != 2:
+            raise ValueError("Feature shape mismatch")
+        return np.ones(len(features_matrix))
+
+    async def run():
+        batcher = MicroBatcher(predict, max_batch_size=64, max_wait_ms=5)
+        return await asyncio.gather(
+            batcher.submit('model_ml', [1.0, 2.0]),
+            batcher.submit('model_ml', [1.0]),
+            batcher.submit('model_ml', [3.0, 4.0]),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(run())
+    assert results[0] == 1.0 and results[2] == 1.0
+    assert isinstance(results[1], ValueError)
+
+
+
+def test_running_batch_is_kept_alive():
+    """Task của lô đang chạy được batcher giữ lại (không bị GC) và bỏ đi khi xong"""
+    def slow_predict(model_name, features_matrix):
+        time.sleep(0.02)
+        return features_matrix.sum(axis=1)
+
+    async def run():
+        batcher = MicroBatcher(slow_predict, max_batch_size=2, max_wait_ms=5)
+        waiting = asyncio.gather(batcher.submit('model_ml', [1.0]), batcher.submit('model_ml', [2.0]))
+        await asyncio.sleep(0.005)
+        assert len(batcher._tasks) == 1
+        gc.collect()
+        results = await waiting
+        await asyncio.sleep(0)
+        return results, len(batcher._tasks)
+
+    results, remaining = asyncio.run(run())
+    assert results == [1.0, 2.0] and remaining == 0
+
+
+if __name__ == '__main__':
+    tests = [test_concurrent_requests_share_one_predict, test_batch_size_limit, test_bad_row_does_not_poison_batch,
+             test_running_batch_is_kept_alive]
+
+    for test_func in tests:
+        test_func()
+        print(f"✓ {test_func.__name__}")
+
+    print("Succeed at Testing!")
@@ -0,0 +1,153 @@
+import os
+import sys
+import atexit
+import shutil
+import asyncio
+import tempfile
+import contextlib
+import importlib.util
+
+import numpy as np
+import pandas as pd
+from fastapi import HTTPException
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Không xuất span tới Jaeger trong test
+os.environ.setdefault("TRACE_TAIL_SAMPLING", "0")
+os.environ.setdefault("TRACE_SAMPLE_RATIO", "0")
+
+LOAN_DATA = os.path.join(ROOT, "jupiter_notebook", "loan_data.csv")
+
+_service = None
+_directory = None
+
+
+@contextlib.contextmanager
+def running_service():
+    """
+    ML-app.py import một lần cho cả file (metrics Prometheus chỉ đăng ký được một lần); trong khối lệnh
+    cwd là thư mục tạm chứa DB, mô hình lấy từ jupiter_notebook của repo
+    """
+    global _service, _directory
+    if _directory is None:
+        _directory = tempfile.mkdtemp(prefix="ml_app_test_")
+        atexit.register(shutil.rmtree, _directory, True)
+        os.symlink(os.path.join(ROOT, "jupiter_notebook"), os.path.join(_directory, "jupiter_notebook"))
+    cwd = os.getcwd()
+    os.chdir(_directory)
+    try:
+        if _service is None:
+            spec = importlib.util.spec_from_file_location("ml_app", os.path.join(ROOT, "ML-app.py"))
+            service = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(service)
+            service.init_db()
+            _service = service
+        yield _service
+    finally:
+        os.chdir(cwd)
+
+
+def test_evaluation_cache_with_missing_comparison_model():
+    with running_service() as service:
+        registry = service.model_registry
+        # Repo không có model_random_forest.joblib: phiên bản null trong key, không thử load lại
+        assert not os.path.exists(registry.path_for('random_forest'))
+        versions = service.evaluation_model_versions(registry.snapshot())
+        assert versions['random_forest'] is None and versions['xgboost'] is not None
+
+        columns = {name: values.to_numpy() for name, values in pd.read_csv(LOAN_DATA).head(300).items()}
+        evaluate = lambda: service.cached_evaluation(lambda: "holdout-300", lambda: columns, "alice")
+
+        async def run():
+            return await evaluate(), await evaluate()
+
+        first, second = asyncio.run(run())
+        assert first['cache'] == 'miss' and 'model_random_forest.joblib' in first['random_forest']['error']
+        assert second['cache'] == 'hit' and second['xgboost']['accuracy'] == first['xgboost']['accuracy']
+
+        # Cùng phiên bản thì không bị xóa khi invalidate
+        assert service.invalidate_evaluation_cache(registry.snapshot()) == 0
+        assert service.invalidate_evaluation_cache() == 1
+
+
+def _vectors(service, model, n_rows):
+    """Vector features của n_rows dòng đầu loan_data, tiền xử lý bằng bộ tiền xử lý của model"""
+    records = pd.read_csv(LOAN_DATA).head(n_rows).to_dict('records')
+    features_matrix, row_errors = service.get_preprocessor(model).transform_records(records)
+    assert not row_errors
+    return features_matrix
+
+
+def test_predict_checks_vector_with_selected_model_preprocessor():
+    with running_service() as service:
+        user = service.User(username="alice")
+        xgboost_vector = _vectors(service, 'xgboost', 1)[0].tolist()
+        response = asyncio.run(service.predict(xgboost_vector, model='xgboost', current_user=user))
+        assert response['model'] == 'xgboost' and response['prediction'][0] in (0, 1)
+
+        # Vector chuẩn hóa cho model_ml không phải input hợp lệ của xgboost (credit_score ~0 khi chưa chuẩn hóa)
+        model_ml_vector = _vectors(service, 'model_ml', 1)[0].tolist()
+        try:
+            asyncio.run(service.predict(model_ml_vector, model='xgboost', current_user=user))
+        except HTTPException as e:
+            assert e.status_code == 400 and 'Credit score' in e.detail
+        else:
+            raise AssertionError("model_ml vector should be rejected for xgboost")
+
+
+def test_batch_checks_vectors_with_selected_model_preprocessor():
+    with running_service() as service:
+        snapshot = service.model_registry.snapshot()
+        rows = _vectors(service, 'xgboost', 5).tolist()
+        predictions, errors = service.score_batch(rows, 'xgboost', snapshot)
+        assert errors == [] and all(prediction in (0, 1) for prediction in predictions)
+
+        predictions, errors = service.score_batch(_vectors(service, 'model_ml', 2).tolist(), 'xgboost', snapshot)
+        assert predictions == [None, None] and [error['row'] for error in errors] == [0, 1]
+        # Vector của model_ml vẫn hợp lệ với model_ml
+        predictions, errors = service.score_batch(_vectors(service, 'model_ml', 2).tolist(), 'model_ml', snapshot)
+        assert errors == [] and np.isin(predictions, (0, 1)).all()
+
+
+def test_model_version_does_not_load_models():
+    with running_service() as service:
+        registry = service.model_registry
+        # Snapshot chưa load mô hình nào (như lúc LAZY_MODEL_LOADING=1)
+        snapshot = type(registry.snapshot())(generation=0)
+        assert service.model_version('xgboost', snapshot) == registry.artifact_version('xgboost')
+        assert service.model_version('logistic_regression', snapshot).count('+') == 1
+        assert snapshot.models == {}
+
+
+def test_failed_scorer_cache_write_only_warns():
+    with running_service() as service:
+        def broken_save(scorer, path):
+            os.makedirs(path)
+            raise ValueError("cannot save")
+
+        snapshot = service.model_registry.snapshot()
+        cache_dir, service.SCORER_CACHE_DIR = service.SCORER_CACHE_DIR, tempfile.mkdtemp(dir=_directory)
+        save_scorer, service.save_scorer = service.save_scorer, broken_save
+        try:
+            service.save_cached_scorer('model_ml', snapshot, object())
+            path = service.scorer_cache_path('model_ml', service.model_version('model_ml', snapshot))
+        finally:
+            service.save_scorer = save_scorer
+            service.SCORER_CACHE_DIR = cache_dir
+        assert not os.path.exists(path) and not os.path.exists(f"{path}.tmp-{os.getpid()}")
+
+
+if __name__ == '__main__':
+    tests = [
+        test_evaluation_cache_with_missing_comparison_model, test_predict_checks_vector_with_selected_model_preprocessor,
+        test_batch_checks_vectors_with_selected_model_preprocessor, test_model_version_does_not_load_models,
+        test_failed_scorer_cache_write_only_warns
+    ]
+
+    for test_func in tests:
+        test_func()
+        print(f"✓ {test_func.__name__}")
+
+    print("Succeed at Testing!")
@@ -0,0 +1,206 @@
+import os
+import sys
+import shutil
+import tempfile
+
+import joblib
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model_registry import ModelRegistry
+
+MODEL_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "jupiter_notebook")
+
+
+def test_registry_loads_once():
+    """Mô hình chỉ được load một lần, các lần get sau lấy từ bộ nhớ"""
+    registry = ModelRegistry(model_dir=MODEL_DIR)
+    model = registry.get('model_ml')
+    assert registry.is_loaded('model_ml')
+    assert registry.get('model_ml') is model
+
+    prediction = model.predict(np.zeros((1, 13)))
+    assert prediction[0] in [0, 1]
+
+
+def test_registry_stats():
+    """Registry báo cáo load time và bộ nhớ của từng mô hình"""
+    registry = ModelRegistry(model_dir=MODEL_DIR)
+    status = registry.load_all()
+    assert status['model_ml'] is True
+
+    stats = {info['name']: info for info in registry.stats()}
+    assert set(stats) == set(registry.names())
+    assert stats['model_ml']['loaded'] is True
+    assert stats['model_ml']['load_time_ms'] > 0
+    assert stats['model_ml']['file_size_bytes'] > 0
+
+
+def test_registry_missing_artifact():
+    """Artifact không tồn tại được đánh dấu lỗi, không làm hỏng các mô hình khác"""
+    registry = ModelRegistry(model_dir=MODEL_DIR, artifacts={
+        'model_ml': 'model_ml.joblib',
+        'missing': 'does_not_exist.joblib',
+    })
+    status = registry.load_all()
+    assert status == {'model_ml': True, 'missing': False}
+
+    stats = {info['name']: info for info in registry.stats()}
+    assert stats['missing']['loaded'] is False
+    assert 'error' in stats['missing']
+
+    # Phiên bản đọc không cần load: đã load thì lấy từ snapshot, thiếu file thì None
+    assert registry.recorded_version('model_ml') == registry.version('model_ml')
+    assert registry.recorded_version('missing') is None
+
+
+def test_registry_unknown_model():
+    registry = ModelRegistry(model_dir=MODEL_DIR)
+    try:
+        registry.get('unknown')
+    except KeyError:
+        return
+    raise AssertionError("Expected KeyError for unknown model")
+
+
+def _copy_model_dir(tmp_dir):
+    shutil.copy(os.path.join(MODEL_DIR, 'model_ml.joblib'), tmp_dir)
+    shutil.copy(os.path.join(MODEL_DIR, 'preprocessor.json'), tmp_dir)
+    return ModelRegistry(model_dir=tmp_dir, artifacts={
+        'model_ml': 'model_ml.joblib',
+        'preprocessors': 'preprocessor.json',
+    })
+
+
+def test_registry_hot_reload_and_rollback():
+    """Reload thay snapshot nguyên khối, snapshot cũ vẫn dùng được và rollback được"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        registry = _copy_model_dir(tmp_dir)
+        registry.load_all()
+        old = registry.snapshot()
+        old_model = registry.get('model_ml')
+        assert not registry.artifacts_changed()
+
+        # File không đổi nội dung: object mô hình được dùng lại
+        same = registry.reload()
+        assert same.generation == old.generation + 1
+        assert same.models['model_ml'] is old_model
+
+        # Train lại (giả lập bằng cách thêm byte vào cuối file pickle): phiên bản mới
+        with open(os.path.join(tmp_dir, 'model_ml.joblib'), 'ab') as f:
+            f.write(b'\0')
+        assert registry.artifacts_changed()
+        new = registry.reload(warmup=lambda snapshot: snapshot.models['model_ml'].predict(np.zeros((4, 13))))
+        assert registry.snapshot() is new
+        assert registry.version('model_ml') != same.version('model_ml')
+        assert registry.get('model_ml') is not old_model
+
+        # Request đang giữ snapshot cũ vẫn dự đoán được trên phiên bản cũ
+        assert registry.get('model_ml', same) is old_model
+
+        rolled_back = registry.rollback()
+        assert rolled_back is same
+        assert registry.get('model_ml') is old_model
+        assert registry.generations()['previous']['generation'] == new.generation
+
+
+def test_registry_reload_keeps_deferred_artifacts_unloaded():
+    """Artifact hoãn load (phục vụ từ scorer) không bị unpickle khi reload nếu file không đổi"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        registry = _copy_model_dir(tmp_dir)
+        registry.defer('model_ml')
+        scorer = object()
+        registry.snapshot().compiled['model_ml'] = scorer
+
+        same = registry.reload()
+        assert not registry.is_loaded('model_ml') and same.info['model_ml']['deferred']
+        assert same.compiled['model_ml'] is scorer
+        assert not registry.artifacts_changed()
+
+        # File đổi: scorer cũ không còn đúng, mô hình mới được load
+        with open(os.path.join(tmp_dir, 'model_ml.joblib'), 'ab') as f:
+            f.write(b'\0')
+        new = registry.reload()
+        assert registry.is_loaded('model_ml') and 'model_ml' not in new.compiled
+        assert new.version('model_ml') != same.version('model_ml')
+
+
+def test_registry_failed_warmup_keeps_current():
+    """Warmup lỗi thì không swap, snapshot đang phục vụ giữ nguyên"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        registry = _copy_model_dir(tmp_dir)
+        registry.load_all()
+        current = registry.snapshot()
+
+        def broken_warmup(snapshot):
+            raise ValueError("warmup failed")
+
+        try:
+            registry.reload(warmup=broken_warmup)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("Expected warmup failure to propagate")
+        assert registry.snapshot() is current
+        assert registry.generations()['previous'] is None
+
+        try:
+            registry.rollback()
+        except ValueError:
+            return
+        raise AssertionError("Expected ValueError when there is nothing to roll back to")
+
+
+def test_registry_prefers_ubj_and_mmaps_joblib():
+    """XGBoost dùng file UBJ gốc nếu có, mảng trong joblib không nén được mmap read-only"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        xgb = joblib.load(os.path.join(MODEL_DIR, 'model_xgboost.joblib'))
+        xgb.save_model(os.path.join(tmp_dir, 'model_xgboost.ubj'))
+        shutil.copy(os.path.join(MODEL_DIR, 'model_logistic_regression.joblib'), tmp_dir)
+        registry = ModelRegistry(model_dir=tmp_dir, artifacts={
+            'xgboost': ('model_xgboost.ubj', 'model_xgboost.joblib'),
+            'logistic_regression': 'model_logistic_regression.joblib',
+        })
+
+        # Lazy: chưa có gì được load cho đến khi dùng
+        assert not registry.is_loaded('xgboost')
+        X = np.random.default_rng(0).normal(size=(50, 13))
+        assert np.array_equal(registry.get('xgboost').predict(X), xgb.predict(X))
+
+        lr = registry.get('logistic_regression')
+        assert isinstance(lr.coef_, np.memmap)
+        assert not lr.coef_.flags.writeable
+
+        stats = {info['name']: info for info in registry.stats()}
+        assert stats['xgboost']['format'] == 'ubj'
+        assert stats['logistic_regression']['format'] == 'joblib'
+
+
+def test_registry_defer_reports_version_without_loading():
+    """Mô hình được hoãn load vẫn có phiên bản, chỉ load khi thực sự get"""
+    registry = ModelRegistry(model_dir=MODEL_DIR)
+    version = registry.artifact_version('model_ml')
+    registry.defer('model_ml', version)
+
+    assert registry.version('model_ml') == version
+    assert not registry.is_loaded('model_ml')
+
+    registry.get('model_ml')
+    assert registry.is_loaded('model_ml')
+    assert registry.version('model_ml') == version
+
+
+if __name__ == '__main__':
+    tests = [
+        test_registry_loads_once, test_registry_stats, test_registry_missing_artifact, test_registry_unknown_model,
+        test_registry_hot_reload_and_rollback, test_registry_reload_keeps_deferred_artifacts_unloaded,
+        test_registry_failed_warmup_keeps_current,
+        test_registry_prefers_ubj_and_mmaps_joblib, test_registry_defer_reports_version_without_loading
+    ]
+
+    for test_func in tests:
+        test_func()
+        print(f"✓ {test_func.__name__}")
+
+    print("Succeed at Testing!")
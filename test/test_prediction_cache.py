@@ -0,0 +1,85 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from prediction_cache import PredictionCache, MISSING
+
+
+class CountingModel:
+    """Mô hình giả: trả về tổng features và ghi lại số dòng mỗi lần predict"""
+
+    def __init__(self):
+        self.rows = []
+
+    def predict(self, model_name, features_matrix):
+        self.rows.append(len(features_matrix))
+        return features_matrix.sum(axis=1)
+
+
+def test_batch_dedup_and_hits():
+    """Dòng trùng trong batch chỉ được tính một lần, lần gọi sau lấy từ cache"""
+    cache = PredictionCache()
+    model = CountingModel()
+    features = np.array([[1.0, 2.0], [3.0, 4.0], [1.0, 2.0]])
+
+    assert cache.predict('model_ml', 'v1', features, model.predict) == [3.0, 7.0, 3.0]
+    assert model.rows == [2]
+
+    assert cache.predict('model_ml', 'v1', features, model.predict) == [3.0, 7.0, 3.0]
+    assert model.rows == [2]
+    assert cache.stats()['hits'] == 2
+
+
+def test_versions_are_cached_separately():
+    """Phiên bản mới không dùng kết quả cũ; request xen kẽ hai phiên bản (hot reload) vẫn hit cache của mình"""
+    cache = PredictionCache()
+    model = CountingModel()
+    features = np.array([[1.0, 2.0]])
+
+    cache.predict('model_ml', 'v1', features, model.predict)
+    cache.predict('model_ml', 'v2', features, model.predict)
+    assert model.rows == [1, 1]
+    cache.predict('model_ml', 'v1', features, model.predict)
+    cache.predict('model_ml', 'v2', features, model.predict)
+    assert model.rows == [1, 1]
+    assert cache.stats()['entries'] == 2 and cache.stats()['hits'] == 2
+
+
+def test_lru_and_ttl_eviction():
+    cache = PredictionCache(max_entries=2, ttl_seconds=0.05)
+    rows = np.array([[1.0], [2.0], [3.0]])
+    keys, _ = cache.lookup('model_ml', 'v1', rows)
+    cache.store('model_ml', keys, [1, 2, 3])
+    assert cache.stats()['entries'] == 2
+
+    _, values = cache.lookup('model_ml', 'v1', rows)
+    assert values[0] is MISSING and values[1:] == [2, 3]
+
+    time.sleep(0.06)
+    _, values = cache.lookup('model_ml', 'v1', rows)
+    assert all(value is MISSING for value in values)
+
+
+def test_flush():
+    cache = PredictionCache()
+    model = CountingModel()
+    cache.predict('model_ml', 'v1', np.array([[1.0]]), model.predict)
+    cache.predict('xgboost', 'v1', np.array([[1.0]]), model.predict)
+
+    assert cache.invalidate('xgboost') == 1
+    assert cache.invalidate() == 1
+    assert cache.stats()['entries'] == 0
+
+
+if __name__ == '__main__':
+    tests = [test_batch_dedup_and_hits, test_versions_are_cached_separately, test_lru_and_ttl_eviction, test_flush]
+
+    for test_func in tests:
+        test_func()
+        print(f"✓ {test_func.__name__}")
+
+    print("Succeed at Testing!")
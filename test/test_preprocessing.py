@@ -0,0 +1,103 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from preprocessing import FEATURE_COLS, CATEGORICAL_COLS, UNKNOWN_CODE, load_preprocessors
+from train_models import prepare_data
+
+DATA_PATH = os.path.join(ROOT_DIR, "jupiter_notebook", "loan_data.csv")
+PREPROCESSOR_PATH = os.path.join(ROOT_DIR, "jupiter_notebook", "preprocessor.json")
+
+
+def test_comparison_matches_prepare_data():
+    """Bộ tiền xử lý của các mô hình so sánh cho kết quả giống prepare_data lúc huấn luyện"""
+    df = pd.read_csv(DATA_PATH)
+    X_train, _, _ = prepare_data(df)
+
+    preprocessor = load_preprocessors(PREPROCESSOR_PATH)['comparison']
+    X, row_errors = preprocessor.transform_columns({col: df[col].to_numpy() for col in FEATURE_COLS})
+
+    assert not row_errors
+    assert np.allclose(X, X_train.values.astype(float))
+
+    # Trên dữ liệu huấn luyện, từ điển đóng băng cho đúng mã pd.factorize mà các mô hình đã lưu dùng
+    for col in CATEGORICAL_COLS:
+        assert (X[:, FEATURE_COLS.index(col)] == pd.factorize(df[col])[0]).all()
+
+
+def test_encoding_does_not_depend_on_row_order():
+    """Mã category cố định theo từ điển, không theo thứ tự xuất hiện trong dữ liệu gửi lên"""
+    df = pd.read_csv(DATA_PATH).head(2000)
+    preprocessor = load_preprocessors(PREPROCESSOR_PATH)['comparison']
+    shuffled = df.sample(frac=1, random_state=7)
+
+    X, _, _ = prepare_data(df, preprocessor)
+    X_shuffled, _, _ = prepare_data(shuffled, preprocessor)
+    assert (X_shuffled.values == X.loc[shuffled.index].values).all()
+    assert not (pd.factorize(shuffled['loan_intent'])[0] == pd.factorize(df['loan_intent'])[0][shuffled.index]).all()
+
+
+def test_lookup_table_spellings_and_unknown_bucket():
+    preprocessor = load_preprocessors(PREPROCESSOR_PATH)['comparison']
+    vocab = preprocessor.vocabularies['person_home_ownership']
+    rent, own = vocab.index('rent'), vocab.index('own')
+    fill = vocab.index(preprocessor.fill_values['person_home_ownership'])
+    values = np.array(['RENT', 'Rent', ' rent ', 'own', str(own), f"{own}.0", None, np.nan, '', 'boat', '9'], dtype=object)
+
+    row_errors = {}
+    codes = preprocessor._encode_categorical('person_home_ownership', values, len(values), row_errors)
+
+    assert codes.tolist() == [rent, rent, rent, own, own, own, fill, fill, fill, UNKNOWN_CODE, UNKNOWN_CODE]
+    assert set(row_errors) == {9, 10}
+
+
+def test_model_ml_matches_ui_scaling():
+    """model_ml: LabelEncoder + StandardScaler giống vector UI gửi lên trước đây"""
+    preprocessor = load_preprocessors(PREPROCESSOR_PATH)['model_ml']
+    record = {
+        'person_age': 22, 'person_gender': 'female', 'person_education': 'Master',
+        'person_income': 71948, 'person_emp_exp': 0, 'person_home_ownership': 'RENT',
+        'loan_amnt': 35000, 'loan_intent': 'PERSONAL', 'loan_int_rate': 16.02,
+        'loan_percent_income': 0.49, 'cb_person_cred_hist_length': 3,
+        'credit_score': 561, 'previous_loan_defaults_on_file': 'No'
+    }
+    X, row_errors = preprocessor.transform_records([record])
+
+    assert not row_errors
+    assert X[0, 1] == 0 and X[0, 2] == 4 and X[0, 5] == 3 and X[0, 7] == 4 and X[0, 12] == 0
+    assert abs(X[0, 0] - (22 - 27.76417777777778) / 6.045041043106284) < 1e-9
+    assert abs(preprocessor.inverse_numeric(X, 'credit_score')[0] - 561) < 1e-9
+
+
+def test_row_errors_and_aliases():
+    """Giá trị lạ báo lỗi theo dòng, alias tiếng Việt và ô trống được xử lý"""
+    preprocessor = load_preprocessors(PREPROCESSOR_PATH)['model_ml']
+    records = [
+        {'Person_Gender': 'Nam', 'previous_loan_defaults_on_file': 'khong', 'credit_score': 700},
+        {'person_gender': 'robot', 'credit_score': 700},
+        {'person_gender': 'female', 'credit_score': 'abc'},
+        {'person_gender': '', 'credit_score': None},
+    ]
+    X, row_errors = preprocessor.transform_records(records)
+
+    assert set(row_errors) == {1, 2}
+    assert X[0, 1] == 1 and X[0, 12] == 0
+    assert abs(preprocessor.inverse_numeric(X, 'credit_score')[3] - preprocessor.fill_values['credit_score']) < 1e-9
+
+
+if __name__ == '__main__':
+    tests = [
+        test_comparison_matches_prepare_data, test_encoding_does_not_depend_on_row_order,
+        test_lookup_table_spellings_and_unknown_bucket, test_model_ml_matches_ui_scaling, test_row_errors_and_aliases
+    ]
+
+    for test_func in tests:
+        test_func()
+        print(f"✓ {test_func.__name__}")
+
+    print("Succeed at Testing!")
@@ -0,0 +1,54 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from readiness import ReadinessState
+
+
+def test_ready_only_when_all_dependencies_ready():
+    readiness = ReadinessState(['models', 'warmup'])
+    assert not readiness.is_ready()
+    assert readiness.report()['status'] == 'not_ready'
+
+    readiness.mark('models', True)
+    assert not readiness.is_ready()
+    readiness.mark('warmup', True)
+    report = readiness.report()
+    assert readiness.is_ready() and report['status'] == 'ready'
+    assert report['dependencies']['models']['ready'] is True
+
+    readiness.mark('models', False, "shutting down")
+    report = readiness.report()
+    assert report['status'] == 'not_ready'
+    assert report['dependencies']['models']['detail'] == "shutting down"
+
+
+def test_check_caches_probe_result_for_ttl():
+    readiness = ReadinessState(['database'])
+    calls = []
+
+    def failing_probe():
+        calls.append(1)
+        raise ConnectionError("database is down")
+
+    assert readiness.check('database', failing_probe) is False
+    assert 'database is down' in readiness.report()['dependencies']['database']['detail']
+
+    # Trong ttl: không chạy lại probe
+    assert readiness.check('database', lambda: calls.append(1), ttl=60) is False
+    assert len(calls) == 1
+
+    # ttl=0: luôn chạy lại
+    assert readiness.check('database', lambda: calls.append(1)) is True
+    assert len(calls) == 2 and readiness.is_ready()
+
+
+if __name__ == '__main__':
+    tests = [test_ready_only_when_all_dependencies_ready, test_check_caches_probe_result_for_ttl]
+
+    for test_func in tests:
+        test_func()
+        print(f"✓ {test_func.__name__}")
+
+    print("Succeed at Testing!")
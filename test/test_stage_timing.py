@@ -0,0 +1,108 @@
+import os
+import sys
+import time
+from typing import List
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI, Depends
+from fastapi.testclient import TestClient
+from prometheus_client import CollectorRegistry, Histogram
+
+import stage_timing
+from stage_timing import StageTimer, stage, server_timing_header, ServerTimingMiddleware, TimedRoute, TimedJSONResponse
+
+
+def parse_header(value):
+    return {item.split(';dur=')[0]: float(item.split(';dur=')[1]) for item in value.split(', ')}
+
+
+def test_totals_and_header():
+    timer = StageTimer()
+    timer.add('auth', 0.002)
+    timer.add('inference', 0.003)
+    timer.add('auth', 0.001)
+    totals = timer.totals(0.010)
+    assert list(totals) == ['auth', 'inference', 'other']
+    assert abs(totals['auth'] - 0.003) < 1e-12 and abs(totals['other'] - 0.004) < 1e-12
+    assert server_timing_header(totals, 0.010) == 'auth;dur=3.000, inference;dur=3.000, other;dur=4.000, total;dur=10.000'
+
+    # Ngoài request: stage() / record() không ghi gì và không lỗi
+    with stage('inference'):
+        pass
+    stage_timing.record('parse', 0.1)
+
+
+def make_app(histogram):
+    app = FastAPI(default_response_class=TimedJSONResponse)
+    app.router.route_class = TimedRoute
+    app.add_middleware(ServerTimingMiddleware, histogram=histogram)
+    executor = ThreadPoolExecutor(1)
+
+    def current_user():
+        with stage('auth'):
+            time.sleep(0.002)
+        return 'alice'
+
+    def score(rows):
+        with stage('inference'):
+            time.sleep(0.003)
+        return len(rows)
+
+    @app.post('/items/{item_id}')
+    def predict(item_id: int, rows: List[List[float]], user: str = Depends(current_user)):
+        # Hàm chạy trên thread của executor ghi vào timer của request nhờ bind()
+        count = executor.submit(stage_timing.bind(score), rows).result()
+        return {'item': item_id, 'count': count, 'user': user}
+
+    return app
+
+
+def test_server_timing_header_and_histogram():
+    registry = CollectorRegistry()
+    histogram = Histogram('stage_seconds', 'stage', ['endpoint', 'stage'], registry=registry)
+    client = TestClient(make_app(histogram))
+
+    response = client.post('/items/7', json=[[1, 2], [3, 4]])
+    assert response.status_code == 200 and response.json()['count'] == 2
+    timings = parse_header(response.headers['server-timing'])
+    assert list(timings) == ['parse', 'auth', 'inference', 'serialize', 'other', 'total']
+    assert timings['auth'] >= 2 and timings['inference'] >= 3
+    assert abs(sum(v for k, v in timings.items() if k != 'total') - timings['total']) < 0.01
+
+    # Nhãn endpoint là route template, không phải đường dẫn thực
+    assert registry.get_sample_value('stage_seconds_count', {'endpoint': '/items/{item_id}', 'stage': 'inference'}) == 1
+    client.post('/items/8', json=[])
+    assert registry.get_sample_value('stage_seconds_count', {'endpoint': '/items/{item_id}', 'stage': 'auth'}) == 2
+
+    # Body không phải JSON: FastAPI vẫn trả 422; request không khớp route không được ghi vào histogram
+    response = client.post('/items/7', content=b'{bad', headers={'content-type': 'application/json'})
+    assert response.status_code == 422 and 'total' in parse_header(response.headers['server-timing'])
+    assert client.get('/missing').status_code == 404
+    endpoints = {sample.labels['endpoint'] for metric in registry.collect() for sample in metric.samples}
+    assert endpoints == {'/items/{item_id}'}
+
+
+def test_stage_overhead_is_small():
+    n = 20000
+    token = stage_timing._current_timer.set(StageTimer())
+    try:
+        start = time.perf_counter()
+        for _ in range(n):
+            with stage('inference'):
+                pass
+        per_stage = (time.perf_counter() - start) / n
+    finally:
+        stage_timing._current_timer.reset(token)
+    assert per_stage < 20e-6
+
+
+if __name__ == '__main__':
+    tests = [test_totals_and_header, test_server_timing_header_and_histogram, test_stage_overhead_is_small]
+
+    for test_func in tests:
+        test_func()
+        print(f"✓ {test_func.__name__}")
+
+    print("Succeed at Testing!")
@@ -0,0 +1,47 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from startup_timeline import StartupTimeline, process_start_time
+
+
+def test_timeline_records_phases_in_order():
+    timeline = StartupTimeline()
+    time.sleep(0.01)
+    timeline.lap('import')
+    with timeline.phase('model_load'):
+        time.sleep(0.01)
+
+    phases = list(timeline.phases)
+    assert phases[-2:] == ['import', 'model_load']
+    assert timeline.phases['import'] >= 0.01
+    assert timeline.phases['model_load'] >= 0.01
+    assert timeline.seconds_to_ready() is None
+
+    timeline.ready()
+    summary = timeline.summary()
+    assert summary['seconds_to_ready'] >= 0.02
+    assert summary['phases_ms']['model_load'] >= 10
+    assert 'model_load' in timeline.log_line() and 'ready' in timeline.log_line()
+
+
+def test_process_start_time_precedes_timeline():
+    started = process_start_time()
+    if started is None:
+        print("/proc not available, skipping")
+        return
+    timeline = StartupTimeline()
+    assert started <= timeline.started_at
+    assert timeline.phases['interpreter'] >= 0
+
+
+if __name__ == '__main__':
+    tests = [test_timeline_records_phases_in_order, test_process_start_time_precedes_timeline]
+
+    for test_func in tests:
+        test_func()
+        print(f"✓ {test_func.__name__}")
+
+    print("Succeed at Testing!")
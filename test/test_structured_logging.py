@@ -0,0 +1,80 @@
+import io
+import os
+import sys
+import json
+import asyncio
+import logging
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from structured_logging import LogSamplingMiddleware, configure_logging, parse_sample_rates
+
+
+def _logger(name, stream, **kwargs):
+    logger = logging.getLogger(name)
+    logger.propagate = False
+    return logger, configure_logging(stream=stream, logger=logger, **kwargs)
+
+
+def test_json_lines_with_extra_fields_and_exception():
+    stream = io.StringIO()
+    logger, handler = _logger("test_structured_logging.json", stream)
+    logger.info("Prediction for %s: %s", "alice", [1], extra={'model': 'model_ml', 'duration_ms': 1.5})
+    try:
+        raise ValueError("bad row")
+    except ValueError:
+        logger.exception("Scoring failed")
+    handler.stop()
+    handler.stop()
+
+    info, error = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert info['level'] == 'INFO' and info['message'] == "Prediction for alice: [1]"
+    assert info['model'] == 'model_ml' and info['duration_ms'] == 1.5
+    assert 'route' not in info
+    assert error['level'] == 'ERROR' and 'ValueError: bad row' in error['exception']
+
+
+def test_sampling_per_route_keeps_warnings():
+    stream = io.StringIO()
+    logger, handler = _logger("test_structured_logging.sampling", stream, sample_rates=parse_sample_rates("/predict=0, /hot=1"))
+
+    async def endpoint(scope, receive, send):
+        logger.info("request on %s", scope['path'])
+        logger.warning("slow request on %s", scope['path'])
+
+    app = LogSamplingMiddleware(endpoint, handler.sampler)
+    for path in ("/predict", "/hot", "/loans"):
+        asyncio.run(app({'type': 'http', 'path': path}, None, None))
+    # Ngoài request (startup, job nền): luôn ghi
+    logger.info("outside request")
+    handler.stop()
+
+    entries = [json.loads(line) for line in stream.getvalue().splitlines()]
+    messages = [entry['message'] for entry in entries]
+    assert messages == [
+        "slow request on /predict",
+        "request on /hot", "slow request on /hot",
+        "request on /loans", "slow request on /loans",
+        "outside request",
+    ]
+    assert entries[0]['route'] == "/predict"
+
+
+def test_full_queue_drops_instead_of_blocking():
+    stream = io.StringIO()
+    logger, handler = _logger("test_structured_logging.full", stream, queue_size=1)
+    handler.listener.stop()
+    handler.listener = None
+    for i in range(5):
+        logger.info("message %s", i)
+    assert handler.dropped == 4
+
+
+if __name__ == '__main__':
+    tests = [test_json_lines_with_extra_fields_and_exception, test_sampling_per_route_keeps_warnings, test_full_queue_drops_instead_of_blocking]
+
+    for test_func in tests:
+        test_func()
+        print(f"✓ {test_func.__name__}")
+
+    print("Succeed at Testing!")
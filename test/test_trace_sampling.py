@@ -0,0 +1,95 @@
+import os
+import sys
+import time
+from collections import deque
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from opentelemetry.sdk.trace import TracerProvider, SpanLimits
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from opentelemetry.trace import set_span_in_context
+
+from trace_sampling import ExportQueueProcessor, TailSamplingProcessor, ratio_sampled
+
+
+def _tracer(**kwargs):
+    exporter = InMemorySpanExporter()
+    decisions, drops = [], []
+    processor = TailSamplingProcessor(
+        SimpleSpanProcessor(exporter), on_decision=decisions.append, on_drop=drops.append, **kwargs
+    )
+    provider = TracerProvider(span_limits=SpanLimits(max_span_attribute_length=16))
+    provider.add_span_processor(processor)
+    return provider.get_tracer("test"), exporter, processor, decisions, drops
+
+
+def test_tail_sampling_keeps_error_and_slow_traces():
+    tracer, exporter, processor, decisions, _ = _tracer(ratio=0.0, slow_threshold_ms=20)
+
+    with tracer.start_as_current_span("fast"):
+        with tracer.start_as_current_span("child"):
+            pass
+    assert exporter.get_finished_spans() == ()
+
+    try:
+        with tracer.start_as_current_span("failing"):
+            with tracer.start_as_current_span("child"):
+                raise ValueError("bad input")
+    except ValueError:
+        pass
+    assert [span.name for span in exporter.get_finished_spans()] == ["child", "failing"]
+
+    exporter.clear()
+    with tracer.start_as_current_span("slow") as span:
+        span.set_attribute("input.features", "x" * 1000)
+        time.sleep(0.03)
+    (slow,) = exporter.get_finished_spans()
+    assert len(slow.attributes["input.features"]) == 16
+
+    assert decisions == ['dropped', 'error', 'slow']
+    assert processor.pending_traces() == 0
+
+
+def test_ratio_matches_trace_id_and_all_spans_of_trace_follow():
+    assert ratio_sampled(123, 1.0) and not ratio_sampled(123, 0.0)
+    tracer, exporter, _, decisions, _ = _tracer(ratio=1.0, slow_threshold_ms=10_000)
+    with tracer.start_as_current_span("root"):
+        with tracer.start_as_current_span("a"):
+            pass
+        with tracer.start_as_current_span("b"):
+            pass
+    assert decisions == ['ratio']
+    assert sorted(span.name for span in exporter.get_finished_spans()) == ["a", "b", "root"]
+
+
+def test_drops_are_counted():
+    # Trace không bao giờ kết thúc span gốc: trace cũ nhất bị bỏ khi vượt giới hạn
+    tracer, exporter, processor, _, drops = _tracer(ratio=1.0, max_pending_traces=1)
+    roots = [tracer.start_span(f"root-{i}") for i in range(3)]
+    for root in roots:
+        tracer.start_span("child", context=set_span_in_context(root)).end()
+    assert drops == ['pending_overflow', 'pending_overflow']
+    assert processor.pending_traces() == 1
+
+    class FullQueue:
+        queue = deque([None], maxlen=1)
+        max_queue_size = 1
+
+        def on_end(self, span):
+            self.queue.appendleft(span)
+
+    reasons = []
+    processor = ExportQueueProcessor(FullQueue(), on_drop=reasons.append)
+    processor.on_end(object())
+    assert reasons == ['queue_full'] and processor.queue_depth() == 1
+
+
+if __name__ == '__main__':
+    tests = [test_tail_sampling_keeps_error_and_slow_traces, test_ratio_matches_trace_id_and_all_spans_of_trace_follow, test_drops_are_counted]
+
+    for test_func in tests:
+        test_func()
+        print(f"✓ {test_func.__name__}")
+
+    print("Succeed at Testing!")
@@ -0,0 +1,69 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from usage_tracker import UsageTracker
+
+
+def test_exact_counts_under_capacity_and_drain():
+    tracker = UsageTracker(capacity=10)
+    tracker.record("alice", "/predict", 0.01)
+    tracker.record("alice", "/predict", 0.03, error=True)
+    tracker.record("alice", "/predict/batch", 0.2, rows=100)
+    tracker.record("bob", "/predict", 0.02)
+
+    top = tracker.top()
+    assert (top[0]['username'], top[0]['endpoint'], top[0]['requests']) == ("alice", "/predict", 2)
+    assert top[0]['errors'] == 1 and abs(top[0]['duration_seconds'] - 0.04) < 1e-9
+    assert all(entry['overcount'] == 0 for entry in top)
+
+    window_start, entries = tracker.drain()
+    assert len(entries) == 3 and len(tracker) == 0
+    batch = next(entry for entry in entries if entry['endpoint'] == "/predict/batch")
+    assert batch['rows'] == 100
+    assert tracker.drain()[0] >= window_start
+
+
+def test_heavy_hitters_survive_many_one_off_users():
+    tracker = UsageTracker(capacity=20)
+    for i in range(5000):
+        tracker.record("heavy", "/predict", 0.001)
+        if i % 2 == 0:
+            tracker.record("medium", "/predict", 0.001)
+        tracker.record(f"user-{i}", "/predict", 0.001)
+
+    # Bộ nhớ không tăng theo số user
+    assert len(tracker) == 20
+    top = tracker.top(2)
+    assert [entry['username'] for entry in top] == ["heavy", "medium"]
+    # Space-Saving: số đếm không bao giờ thấp hơn thực tế và phần dư bị chặn bởi overcount
+    for entry, actual in zip(top, (5000, 2500)):
+        assert actual <= entry['requests'] <= actual + entry['overcount']
+
+
+def test_restore_after_failed_flush_keeps_window():
+    tracker = UsageTracker(capacity=10)
+    tracker.record("alice", "/predict", 0.01)
+    tracker.record("bob", "/predict/batch", 0.2, rows=50, error=True)
+    window_start, entries = tracker.drain()
+
+    # Ghi DB lỗi: trả lại tracker, trong lúc đó có request mới
+    tracker.record("alice", "/predict", 0.02)
+    tracker.restore(window_start, entries)
+
+    restored_start, restored = tracker.drain()
+    assert restored_start == window_start
+    counts = {(entry['username'], entry['endpoint']): entry for entry in restored}
+    assert counts[("alice", "/predict")]['requests'] == 2 and abs(counts[("alice", "/predict")]['duration_seconds'] - 0.03) < 1e-9
+    assert counts[("bob", "/predict/batch")]['rows'] == 50 and counts[("bob", "/predict/batch")]['errors'] == 1
+
+
+if __name__ == '__main__':
+    tests = [test_exact_counts_under_capacity_and_drain, test_heavy_hitters_survive_many_one_off_users, test_restore_after_failed_flush_keeps_window]
+
+    for test_func in tests:
+        test_func()
+        print(f"✓ {test_func.__name__}")
+
+    print("Succeed at Testing!")
@@ -108,6 +108,7 @@ try:
         }
         best_model = max(accuracies, key=accuracies.get)
         print(f"✓ Mô hình tốt nhất: {best_model} (Accuracy: {accuracies[best_model]:.4f})")
+        print(f"✓ Wall time 3 mô hình (song song): {result.get('wall_time', 0):.2f}ms, tổng thời gian: {result.get('total_time', 0):.2f}ms")
         
     else:
         print(f"Evaluate error: {response.text}")
@@ -0,0 +1,125 @@
+"""
+Lấy mẫu trace trước khi export sang Jaeger.
+
+- Head sampling (TRACE_TAIL_SAMPLING=0): sampler ParentBased(TraceIdRatioBased) của SDK, span không
+  được chọn không được ghi lại (rẻ nhất) nhưng trace lỗi / chậm cũng có thể bị bỏ.
+- Tail sampling: mọi span được ghi lại và giữ trong bộ nhớ theo trace cho tới khi span gốc trong process
+  kết thúc; trace được export nếu có span lỗi, chậm hơn ngưỡng, hoặc rơi vào tỉ lệ head (theo trace_id,
+  cùng cách tính với TraceIdRatioBased). Các trace còn lại bị bỏ trước khi vào hàng đợi export.
+
+Span được chuyển cho BatchSpanProcessor; khi hàng đợi export đầy, span cũ nhất bị bỏ và được đếm.
+"""
+
+import threading
+from collections import OrderedDict
+
+from opentelemetry.sdk.trace import SpanProcessor
+from opentelemetry.trace import StatusCode
+
+_TRACE_ID_LIMIT = (1 << 64) - 1
+
+
+def ratio_sampled(trace_id, ratio):
+    """Quyết định theo 64 bit thấp của trace_id, giống TraceIdRatioBased"""
+    return (trace_id & _TRACE_ID_LIMIT) < round(ratio * (_TRACE_ID_LIMIT + 1))
+
+
+class ExportQueueProcessor(SpanProcessor):
+    """Chuyển span cho BatchSpanProcessor, đếm span bị bỏ khi hàng đợi export đầy"""
+
+    def __init__(self, processor, on_drop=None):
+        self.processor = processor
+        self.on_drop = on_drop
+
+    def queue_depth(self):
+        return len(getattr(self.processor, 'queue', ()))
+
+    def export(self, span):
+        # Hàng đợi (deque có maxlen) đầy: BatchSpanProcessor bỏ span cũ nhất khi thêm span mới
+        if self.on_drop is not None and self.queue_depth() >= getattr(self.processor, 'max_queue_size', float('inf')):
+            self.on_drop('queue_full')
+        self.processor.on_end(span)
+
+    def on_start(self, span, parent_context=None):
+        self.processor.on_start(span, parent_context)
+
+    def on_end(self, span):
+        self.export(span)
+
+    def shutdown(self):
+        self.processor.shutdown()
+
+    def force_flush(self, timeout_millis=30000):
+        return self.processor.force_flush(timeout_millis)
+
+
+class TailSamplingProcessor(ExportQueueProcessor):
+    """Giữ span theo trace, quyết định export khi span gốc trong process kết thúc"""
+
+    def __init__(self, processor, ratio=0.01, slow_threshold_ms=500, max_pending_traces=10000,
+                 on_decision=None, on_drop=None):
+        super().__init__(processor, on_drop)
+        self.ratio = ratio
+        self.slow_threshold_ns = slow_threshold_ms * 1e6
+        self.max_pending_traces = max_pending_traces
+        self.on_decision = on_decision
+        self._pending = OrderedDict()
+        # Quyết định gần đây: span con kết thúc sau span gốc theo cùng quyết định
+        self._decided = OrderedDict()
+        self._lock = threading.Lock()
+
+    def decide(self, root, spans):
+        """'error' | 'slow' | 'ratio' (giữ) hoặc 'dropped'"""
+        if any(span.status.status_code is StatusCode.ERROR for span in spans):
+            return 'error'
+        if root.end_time - root.start_time >= self.slow_threshold_ns:
+            return 'slow'
+        if ratio_sampled(root.context.trace_id, self.ratio):
+            return 'ratio'
+        return 'dropped'
+
+    def on_start(self, span, parent_context=None):
+        # BatchSpanProcessor không làm gì ở on_start; span chỉ tới đó nếu trace được giữ
+        pass
+
+    def on_end(self, span):
+        trace_id = span.context.trace_id
+        local_root = span.parent is None or span.parent.is_remote
+        overflow = None
+        with self._lock:
+            decision = self._decided.get(trace_id)
+            if decision is None:
+                spans = self._pending.setdefault(trace_id, [])
+                spans.append(span)
+                if local_root:
+                    del self._pending[trace_id]
+                elif len(self._pending) > self.max_pending_traces:
+                    # Trace không bao giờ kết thúc span gốc (hoặc quá nhiều trace dở dang): bỏ trace cũ nhất
+                    _, overflow = self._pending.popitem(last=False)
+                    spans = None
+                else:
+                    return
+        if overflow is not None:
+            if self.on_drop is not None:
+                for _ in overflow:
+                    self.on_drop('pending_overflow')
+            return
+        if decision is not None:
+            if decision != 'dropped':
+                self.export(span)
+            return
+
+        decision = self.decide(span, spans)
+        with self._lock:
+            self._decided[trace_id] = decision
+            if len(self._decided) > self.max_pending_traces:
+                self._decided.popitem(last=False)
+        if self.on_decision is not None:
+            self.on_decision(decision)
+        if decision != 'dropped':
+            for pending in spans:
+                self.export(pending)
+
+    def pending_traces(self):
+        with self._lock:
+            return len(self._pending)
@@ -3,16 +3,17 @@ Script để huấn luyện 3 mô hình ML (XGBoost, Random Forest, Logistic Reg
 và lưu chúng để sử dụng trong ứng dụng
 """
 
+import os
 import joblib
 import logging
 import pandas as pd
-import numpy as np
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.linear_model import LogisticRegression
 from xgboost import XGBClassifier
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
+from preprocessing import FEATURE_COLS, FeaturePreprocessor, save_preprocessors
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -27,17 +28,17 @@ def load_data(csv_path="jupiter_notebook/loan_data.csv"):
     logger.info(f"Data shape: {df.shape}")
     return df
 
-def prepare_data(df):
-    """Chuẩn bị dữ liệu cho training"""
+def prepare_data(df, preprocessor=None):
+    """
+    Chuẩn bị dữ liệu cho training
+
+    Categorical được mã hóa bằng từ điển đóng băng của bộ tiền xử lý 'comparison' (lưu vào
+    preprocessor.json cùng các mô hình), giống hệt cách serving mã hóa hồ sơ
+    """
     logger.info("Preparing data...")
     
     # Danh sách các cột feature
-    feature_cols = [
-        'person_age', 'person_gender', 'person_education', 'person_income',
-        'person_emp_exp', 'person_home_ownership', 'loan_amnt', 'loan_intent',
-        'loan_int_rate', 'loan_percent_income', 'cb_person_cred_hist_length',
-        'credit_score', 'previous_loan_defaults_on_file'
-    ]
+    feature_cols = list(FEATURE_COLS)
     
     # Kiểm tra cột target (có thể là 'loan_status' hoặc 'target')
     target_col = None
@@ -51,29 +52,34 @@ def prepare_data(df):
     
     logger.info(f"Target column: {target_col}")
     
-    X = df[feature_cols].copy()
     y = df[target_col].copy()
-    
-    # Xử lý giá trị NaN cho numeric columns
-    numeric_cols = X.select_dtypes(include=[np.number]).columns
-    X[numeric_cols] = X[numeric_cols].fillna(X[numeric_cols].mean())
-    
-    # Xử lý giá trị NaN cho categorical columns (dùng mode)
-    categorical_cols = X.select_dtypes(include=['object']).columns
-    for col in categorical_cols:
-        X[col] = X[col].fillna(X[col].mode()[0] if len(X[col].mode()) > 0 else 'Unknown')
-    
     y = y.fillna(y.mode()[0] if len(y.mode()) > 0 else y.iloc[0])
     
-    # Chuyển đổi categorical columns thành numeric
-    for col in categorical_cols:
-        X[col] = pd.factorize(X[col])[0]
+    # NaN numeric -> mean, NaN categorical -> mode, categorical -> mã trong từ điển
+    if preprocessor is None:
+        preprocessor = FeaturePreprocessor.fit(df)
+    features_matrix, row_errors = preprocessor.transform_columns(
+        {col: df[col].to_numpy() for col in feature_cols}, n_rows=len(df)
+    )
+    if row_errors:
+        first_errors = list(row_errors.items())[:5]
+        raise ValueError(f"Dữ liệu huấn luyện có {len(row_errors)} dòng không hợp lệ: {first_errors}")
+    X = pd.DataFrame(features_matrix, columns=feature_cols, index=df.index)
     
     logger.info(f"Features shape: {X.shape}, Target shape: {y.shape}")
-    logger.info(f"Data types:\n{X.dtypes}")
+    logger.info(f"Vocabularies: {preprocessor.vocabularies}")
     
     return X, y, feature_cols
 
+def build_preprocessors(df):
+    """Tính thống kê tiền xử lý dùng khi serving từ dữ liệu huấn luyện"""
+    return {
+        # model_ml (notebook): LabelEncoder + StandardScaler cho các cột numeric
+        'model_ml': FeaturePreprocessor.fit(df, sort_categories=True, standardize=True),
+        # Các mô hình so sánh: prepare_data mã hóa bằng chính từ điển này (fill NaN, không chuẩn hóa)
+        'comparison': FeaturePreprocessor.fit(df),
+    }
+
 def train_models(X_train, X_test, y_train, y_test):
     """Huấn luyện 3 mô hình"""
     models = {}
@@ -149,21 +155,31 @@ def train_models(X_train, X_test, y_train, y_test):
     
     return models, results
 
-def save_models(models):
-    """Lưu các mô hình"""
+def save_models(models, model_dir='jupiter_notebook'):
+    """
+    Lưu các mô hình theo dạng serving load nhanh được
+
+    XGBoost lưu bằng định dạng UBJ gốc (không qua pickle), các mô hình scikit-learn lưu
+    bằng joblib không nén để serving mmap read-only các mảng numpy
+    """
     logger.info("\n=== Saving Models ===")
     
-    joblib.dump(models['xgboost'], 'jupiter_notebook/model_xgboost.joblib')
-    logger.info("Saved: model_xgboost.joblib")
-    
-    joblib.dump(models['random_forest'], 'jupiter_notebook/model_random_forest.joblib')
-    logger.info("Saved: model_random_forest.joblib")
-    
-    joblib.dump(models['logistic_regression']['model'], 'jupiter_notebook/model_logistic_regression.joblib')
-    logger.info("Saved: model_logistic_regression.joblib")
-    
-    joblib.dump(models['logistic_regression']['scaler'], 'jupiter_notebook/scaler_logistic_regression.joblib')
-    logger.info("Saved: scaler_logistic_regression.joblib")
+    models['xgboost'].save_model(os.path.join(model_dir, 'model_xgboost.ubj'))
+    logger.info("Saved: model_xgboost.ubj")
+    # Bản pickle cũ không còn được cập nhật: xóa để serving không quay về mô hình cũ khi thiếu file UBJ
+    legacy_path = os.path.join(model_dir, 'model_xgboost.joblib')
+    if os.path.exists(legacy_path):
+        os.remove(legacy_path)
+        logger.info("Removed: model_xgboost.joblib")
+
+    artifacts = {
+        'model_random_forest.joblib': models['random_forest'],
+        'model_logistic_regression.joblib': models['logistic_regression']['model'],
+        'scaler_logistic_regression.joblib': models['logistic_regression']['scaler'],
+    }
+    for file_name, model in artifacts.items():
+        joblib.dump(model, os.path.join(model_dir, file_name), compress=0)
+        logger.info(f"Saved: {file_name}")
 
 def main():
     """Chạy quy trình training và lưu"""
@@ -172,8 +188,11 @@ def main():
     # Load dữ liệu
     df = load_data()
     
+    # Đóng băng từ điển category trước, training và serving cùng dùng
+    preprocessors = build_preprocessors(df)
+    
     # Chuẩn bị dữ liệu
-    X, y, feature_cols = prepare_data(df)
+    X, y, feature_cols = prepare_data(df, preprocessors['comparison'])
     
     # Chia dữ liệu train/test
     X_train, X_test, y_train, y_test = train_test_split(
@@ -187,6 +206,10 @@ def main():
     # Lưu các mô hình
     save_models(models)
     
+    # Lưu thống kê tiền xử lý cho serving
+    save_preprocessors(preprocessors, 'jupiter_notebook/preprocessor.json')
+    logger.info("Saved: preprocessor.json")
+    
     # In tóm tắt kết quả
     logger.info("\n=== MODEL COMPARISON RESULTS ===")
     logger.info("-" * 60)
@@ -0,0 +1,84 @@
+"""
+Thống kê sử dụng theo user trong process, thay cho nhãn `user` trên metrics Prometheus.
+
+Mỗi (user, endpoint) có một bộ đếm (số request, số dòng, số lỗi, tổng thời gian). Số bộ đếm bị giới hạn
+bởi `capacity` theo thuật toán Space-Saving (heavy hitters): khi đầy, bộ đếm có số request nhỏ nhất
+nhường chỗ cho key mới, key mới nhận số request đó + 1 và `overcount` ghi lại phần có thể bị đếm dư.
+Các key dùng nhiều (> tổng số request / capacity) luôn được giữ. Bộ nhớ không tăng theo số user.
+
+drain() trả về các bộ đếm của cửa sổ hiện tại và bắt đầu cửa sổ mới, dùng để ghi theo lô vào DB;
+ghi lỗi thì restore() gộp lại các bộ đếm đó để lần ghi sau không mất cửa sổ.
+"""
+
+import threading
+from datetime import datetime
+
+
+class UsageTracker:
+    def __init__(self, capacity=1000):
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._window_start = datetime.utcnow()
+
+    def record(self, username, endpoint, duration, rows=1, error=False):
+        with self._lock:
+            counter = self._counter((username, endpoint))
+            counter[0] += 1
+            counter[1] += rows
+            counter[2] += bool(error)
+            counter[3] += duration
+
+    def _counter(self, key):
+        """Bộ đếm của key, tạo mới nếu chưa có (gọi khi đang giữ lock)"""
+        counter = self._counters.get(key)
+        if counter is None:
+            overcount = 0
+            if len(self._counters) >= self.capacity:
+                # Space-Saving: thay bộ đếm nhỏ nhất (O(capacity), chỉ khi có key mới lúc đã đầy)
+                evicted = min(self._counters, key=lambda k: self._counters[k][0])
+                overcount = self._counters.pop(evicted)[0]
+            counter = self._counters[key] = [overcount, 0, 0, 0.0, overcount]
+        return counter
+
+    @staticmethod
+    def _entry(key, counter):
+        requests, rows, errors, duration, overcount = counter
+        return {
+            'username': key[0],
+            'endpoint': key[1],
+            'requests': requests,
+            'rows': rows,
+            'errors': errors,
+            'duration_seconds': duration,
+            'overcount': overcount,
+        }
+
+    def top(self, limit=None):
+        """Các (user, endpoint) nhiều request nhất của cửa sổ hiện tại"""
+        with self._lock:
+            items = sorted(self._counters.items(), key=lambda item: item[1][0], reverse=True)[:limit]
+            return [self._entry(key, list(counter)) for key, counter in items]
+
+    def drain(self):
+        """(thời điểm bắt đầu cửa sổ, danh sách bộ đếm) rồi bắt đầu cửa sổ mới"""
+        with self._lock:
+            counters, self._counters = self._counters, {}
+            window_start, self._window_start = self._window_start, datetime.utcnow()
+        return window_start, [self._entry(key, counter) for key, counter in counters.items()]
+
+    def restore(self, window_start, entries):
+        """Gộp lại các bộ đếm đã drain() (ghi DB lỗi) vào cửa sổ hiện tại, cửa sổ bắt đầu từ window_start"""
+        with self._lock:
+            for entry in entries:
+                counter = self._counter((entry['username'], entry['endpoint']))
+                counter[0] += entry['requests']
+                counter[1] += entry['rows']
+                counter[2] += entry['errors']
+                counter[3] += entry['duration_seconds']
+                counter[4] += entry['overcount']
+            self._window_start = min(self._window_start, window_start)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._counters)